@@ -52,6 +52,8 @@
     4. المدير يضيف/يعدل/يحذف الشعب عبر RegistrationSystem
     5. عند اختيار "All" في التخصص، يتم إضافة المقرر لجميع التخصصات
     6. جميع التغييرات تُحفظ في قاعدة البيانات
+    7. عمليات التحميل والحفظ تعمل في خيط قاعدة البيانات (run_async من BaseDashboard)
+       وتُعرض نتائجها في خيط الواجهة، مع مؤشر انشغال أثناء التنفيذ
     
 نظام الوراثة المستخدم:
     ✅ BaseDashboard (من student.py) → AdminDashboard
@@ -79,11 +81,13 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QFrame,
     QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView,
-    QTabWidget, QLineEdit, QFormLayout, QComboBox, QApplication
+    QTabWidget, QLineEdit, QFormLayout, QComboBox, QApplication, QFileDialog
 )
 
 from PyQt6.QtCore import Qt
 
+from typing import Optional
+
 from registration_system import User, RegistrationSystem_registration_system, Course, Section, StudentManager_registration_system
 from student import DashboardBase_QWidget_student
 from styles import apply_shadow, LIGHT_MODE_QSS, DARK_MODE_QSS
@@ -179,6 +183,7 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
         top_bar.addWidget(self.theme_button)
         top_bar.addWidget(self.signout_button)
         top_bar.addStretch()
+        top_bar.addWidget(self.busy_label)
         layout.addLayout(top_bar)
         
         # تبويبات
@@ -268,6 +273,11 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
         clear_btn.clicked.connect(self.clear_course_form)
         form_layout.addWidget(clear_btn)
         
+        import_btn = QPushButton("استيراد كتالوج (CSV/JSON)")
+        import_btn.setProperty("class", "secondary")
+        import_btn.clicked.connect(self.handle_import_catalog)
+        form_layout.addWidget(import_btn)
+        
         form_layout.addStretch()
         
         layout.addWidget(form_frame, 1)
@@ -523,9 +533,9 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
     def load_courses(self):
         """تحميل المقررات في الجدول"""
         self.courses_table.setRowCount(0)
-        courses = self.registration_system._course_cache
+        courses = self.registration_system.get_courses()
         
-        for i, course in enumerate(courses.values()):
+        for i, course in enumerate(courses):
             self.courses_table.insertRow(i)
             self.courses_table.setItem(i, 0, QTableWidgetItem(course.course_code))
             self.courses_table.setItem(i, 1, QTableWidgetItem(course.name))
@@ -536,17 +546,14 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
     def load_sections_courses(self):
         """تحميل المقررات في القائمة المنسدلة للشعب"""
         self.sections_course_combo.clear()
-        courses = self.registration_system._course_cache
-        for code in sorted(courses.keys()):
+        courses = self.registration_system.get_courses()
+        for code in sorted(course.course_code for course in courses):
             self.sections_course_combo.addItem(code)
     
     def load_sections(self, course_code: str):
         """تحميل الشعب للمقرر المحدد"""
         self.sections_table.setRowCount(0)
-        sections = [
-            s for s in self.registration_system._section_cache.values()
-            if s.course_code == course_code
-        ]
+        sections = self.registration_system.get_sections_for_course(course_code)
         
         for i, section in enumerate(sections):
             self.sections_table.insertRow(i)
@@ -559,10 +566,12 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
             self.sections_table.setItem(i, 6, QTableWidgetItem(str(section.current_enrollment)))
     
     def load_students(self):
-        """تحميل الطلاب في الجدول"""
+        """تحميل الطلاب في الجدول (في الخلفية)"""
+        self.run_async(self.student_manager.get_all_students_database, on_done=self.show_students)
+    
+    def show_students(self, students):
+        """عرض الطلاب في الجدول"""
         self.students_table.setRowCount(0)
-        students = self.student_manager.get_all_students_database()
-        
         for i, (sid, name, email, program, level) in enumerate(students):
             self.students_table.insertRow(i)
             self.students_table.setItem(i, 0, QTableWidgetItem(sid))
@@ -592,39 +601,31 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
             else:
                 self.course_prerequisites_input.clear()
             
-            # تحميل المستوى والتخصص من program_plans
-            program_plans = database.get_course_program_plans(course_code)
-            if program_plans:
-                # التحقق من وجود المقرر في جميع التخصصات (All)
-                all_programs = ['Computer', 'Comm', 'Power', 'Biomedical']
-                programs_in_plans = [prog for prog, lev in program_plans]
-                
-                # إذا كان المقرر موجود في جميع التخصصات الأربعة بنفس المستوى
-                if len(program_plans) == 4:
-                    # التحقق من أن جميع البرامج موجودة ونفس المستوى
-                    levels = [lev for prog, lev in program_plans]
-                    if len(set(levels)) == 1 and all(prog in programs_in_plans for prog in all_programs):
-                        # المقرر مضافة لجميع التخصصات
-                        self.course_program_input.setCurrentIndex(0)  # "All" هو أول عنصر
-                        level = program_plans[0][1]  # نفس المستوى لجميع البرامج
-                        index = self.course_level_input.findText(str(level))
-                        if index >= 0:
-                            self.course_level_input.setCurrentIndex(index)
-                    else:
-                        # استخدام أول خطة برنامج موجودة
-                        program, level = program_plans[0]
-                        if program == 'Comm':
-                            program = 'Communications'
-                        index = self.course_program_input.findText(program)
-                        if index >= 0:
-                            self.course_program_input.setCurrentIndex(index)
-                        index = self.course_level_input.findText(str(level))
-                        if index >= 0:
-                            self.course_level_input.setCurrentIndex(index)
+            # تحميل المستوى والتخصص من program_plans (في الخلفية)
+            self.run_async(database.get_course_program_plans, course_code,
+                           on_done=self.show_course_program_plans)
+    
+    def show_course_program_plans(self, program_plans):
+        """تحديد المستوى والتخصص في النموذج من program_plans للمقرر المحدد"""
+        if program_plans:
+            # التحقق من وجود المقرر في جميع التخصصات (All)
+            all_programs = ['Computer', 'Comm', 'Power', 'Biomedical']
+            programs_in_plans = [prog for prog, lev in program_plans]
+            
+            # إذا كان المقرر موجود في جميع التخصصات الأربعة بنفس المستوى
+            if len(program_plans) == 4:
+                # التحقق من أن جميع البرامج موجودة ونفس المستوى
+                levels = [lev for prog, lev in program_plans]
+                if len(set(levels)) == 1 and all(prog in programs_in_plans for prog in all_programs):
+                    # المقرر مضافة لجميع التخصصات
+                    self.course_program_input.setCurrentIndex(0)  # "All" هو أول عنصر
+                    level = program_plans[0][1]  # نفس المستوى لجميع البرامج
+                    index = self.course_level_input.findText(str(level))
+                    if index >= 0:
+                        self.course_level_input.setCurrentIndex(index)
                 else:
                     # استخدام أول خطة برنامج موجودة
                     program, level = program_plans[0]
-                    # تحويل 'Comm' إلى 'Communications' إذا لزم الأمر
                     if program == 'Comm':
                         program = 'Communications'
                     index = self.course_program_input.findText(program)
@@ -633,7 +634,19 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
                     index = self.course_level_input.findText(str(level))
                     if index >= 0:
                         self.course_level_input.setCurrentIndex(index)
-    
+            else:
+                # استخدام أول خطة برنامج موجودة
+                program, level = program_plans[0]
+                # تحويل 'Comm' إلى 'Communications' إذا لزم الأمر
+                if program == 'Comm':
+                    program = 'Communications'
+                index = self.course_program_input.findText(program)
+                if index >= 0:
+                    self.course_program_input.setCurrentIndex(index)
+                index = self.course_level_input.findText(str(level))
+                if index >= 0:
+                    self.course_level_input.setCurrentIndex(index)
+
     def on_sections_course_changed(self, course_code: str):
         """معالجة تغيير اختيار المقرر في تبويب الشعب"""
         if course_code:
@@ -717,43 +730,93 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
                 lab_hours=int(self.course_lab_hours_input.text().strip() or 0),
                 prerequisites=prerequisites
             )
-            
-            self.registration_system.add_course(course)
-            
-            # حفظ المستوى والتخصص في program_plans
-            # أولاً، إزالة خطط البرنامج القديمة لهذا المقرر إذا كان التحديث
-            old_plans = database.get_course_program_plans(course_code)
-            for old_program, old_level in old_plans:
-                database.remove_course_from_program_plan(course_code, old_program, old_level)
-            
-            # إضافة خطة برنامج جديدة
-            level = int(self.course_level_input.currentText())
-            program = self.course_program_input.currentText()
-            
-            # إذا تم اختيار "All"، إضافة المقرر لجميع التخصصات
-            if program == 'All':
-                all_programs = ['Computer', 'Comm', 'Power', 'Biomedical']
-                for prog in all_programs:
-                    database.add_course_to_program_plan(course_code, prog, level)
-            else:
-                # تحويل 'Communications' إلى 'Comm' للتوافق مع قاعدة البيانات
-                if program == 'Communications':
-                    program = 'Comm'
-                database.add_course_to_program_plan(course_code, program, level)
-            
-            self.load_courses()
-            self.load_sections_courses()
-            QMessageBox.information(self, 'نجاح', 'تم حفظ المقرر بنجاح')
-            self.clear_course_form()
         except ValueError as e:
-            error_msg = str(e)
+            self.on_save_course_failed(course_code, e)
+            return
+        
+        level = int(self.course_level_input.currentText())
+        program = self.course_program_input.currentText()
+        self.run_async(
+            self._save_course_database, course, program, level,
+            on_done=lambda _: self.on_course_saved(),
+            on_error=lambda e: self.on_save_course_failed(course_code, e)
+        )
+    
+    # _ private method
+    def _save_course_database(self, course: Course, program: str, level: int):
+        """حفظ المقرر وخطط البرامج (يعمل في خيط قاعدة البيانات)"""
+        course_code = course.course_code
+        self.registration_system.add_course(course)
+        
+        # حفظ المستوى والتخصص في program_plans
+        # أولاً، إزالة خطط البرنامج القديمة لهذا المقرر إذا كان التحديث
+        old_plans = database.get_course_program_plans(course_code)
+        for old_program, old_level in old_plans:
+            database.remove_course_from_program_plan(course_code, old_program, old_level)
+        
+        # إذا تم اختيار "All"، إضافة المقرر لجميع التخصصات
+        if program == 'All':
+            all_programs = ['Computer', 'Comm', 'Power', 'Biomedical']
+            for prog in all_programs:
+                database.add_course_to_program_plan(course_code, prog, level)
+        else:
+            # تحويل 'Communications' إلى 'Comm' للتوافق مع قاعدة البيانات
+            if program == 'Communications':
+                program = 'Comm'
+            database.add_course_to_program_plan(course_code, program, level)
+    
+    def on_course_saved(self):
+        """تحديث الواجهة بعد حفظ المقرر"""
+        self.load_courses()
+        self.load_sections_courses()
+        QMessageBox.information(self, 'نجاح', 'تم حفظ المقرر بنجاح')
+        self.clear_course_form()
+    
+    def on_save_course_failed(self, course_code: str, error: Exception):
+        """عرض خطأ حفظ المقرر"""
+        if isinstance(error, ValueError):
+            error_msg = str(error)
             # تحسين رسالة الخطأ لرمز المقرر المكرر
             if 'already exists' in error_msg.lower() or 'unique' in error_msg.lower():
                 QMessageBox.warning(self, 'خطأ', f"رمز المقرر '{course_code}' موجود بالفعل")
             else:
                 QMessageBox.warning(self, 'خطأ', error_msg)
-        except Exception as e:
-            QMessageBox.critical(self, 'خطأ', f'فشل حفظ المقرر: {str(e)}')
+        else:
+            QMessageBox.critical(self, 'خطأ', f'فشل حفظ المقرر: {str(error)}')
+    
+    def handle_import_catalog(self):
+        """استيراد المقررات/الشعب/المتطلبات/خطط البرامج من ملفات CSV أو JSON دفعة واحدة"""
+        paths, _ = QFileDialog.getOpenFileNames(
+            self, 'استيراد كتالوج', '', 'Catalog (*.csv *.json *.jsonl)'
+        )
+        if not paths:
+            return
+        
+        self.run_async(
+            self.registration_system.import_catalog_files, paths,
+            on_done=self.on_catalog_imported,
+            on_error=self.on_catalog_import_failed
+        )
+    
+    def on_catalog_import_failed(self, error: Exception):
+        """عرض خطأ الاستيراد (قد يكون جزء من الكتالوج قد حُفظ)"""
+        self.load_courses()
+        self.load_sections_courses()
+        if isinstance(error, ValueError):
+            QMessageBox.warning(self, 'خطأ', str(error))
+        else:
+            QMessageBox.critical(self, 'خطأ', f'فشل الاستيراد: {str(error)}')
+    
+    def on_catalog_imported(self, results):
+        """عرض نتيجة الاستيراد"""
+        self.load_courses()
+        self.load_sections_courses()
+        lines = [f"{kind}: {written}" for kind, (written, _) in results.items()]
+        errors = [f"{kind} {error}" for kind, (_, kind_errors) in results.items() for error in kind_errors]
+        message = "تم الاستيراد:\n" + "\n".join(lines)
+        if errors:
+            message += f"\n\nصفوف متجاهلة ({len(errors)}):\n" + "\n".join(errors[:10])
+        QMessageBox.information(self, 'نتيجة الاستيراد', message)
     
     def handle_delete_course(self):
         """حذف المقرر المحدد"""
@@ -769,14 +832,18 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            try:
-                self.registration_system.delete_course(course_code)
-                self.load_courses()
-                self.load_sections_courses()
-                self.clear_course_form()
-                QMessageBox.information(self, 'نجاح', 'تم حذف المقرر بنجاح')
-            except Exception as e:
-                QMessageBox.critical(self, 'خطأ', f'فشل الحذف: {str(e)}')
+            self.run_async(
+                self.registration_system.delete_course, course_code,
+                on_done=lambda _: self.on_course_deleted(),
+                on_error=lambda e: QMessageBox.critical(self, 'خطأ', f'فشل الحذف: {str(e)}')
+            )
+    
+    def on_course_deleted(self):
+        """تحديث الواجهة بعد حذف المقرر"""
+        self.load_courses()
+        self.load_sections_courses()
+        self.clear_course_form()
+        QMessageBox.information(self, 'نجاح', 'تم حذف المقرر بنجاح')
     
     def clear_course_form(self):
         """تفريغ حقول نموذج المقرر"""
@@ -816,13 +883,21 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
                 max_capacity=int(self.section_capacity_input.text().strip()),
                 days=days
             )
-            
-            self.registration_system.add_section(section)
-            self.load_sections(course_code)
-            QMessageBox.information(self, 'نجاح', 'تم حفظ الشعبة بنجاح')
-            self.clear_section_form()
         except ValueError as e:
             QMessageBox.warning(self, 'خطأ', str(e))
+            return
+        
+        self.run_async(
+            self.registration_system.add_section, section,
+            on_done=lambda _: self.on_section_saved(course_code),
+            on_error=lambda e: QMessageBox.warning(self, 'خطأ', str(e))
+        )
+    
+    def on_section_saved(self, course_code: str):
+        """تحديث الواجهة بعد حفظ الشعبة"""
+        self.load_sections(course_code)
+        QMessageBox.information(self, 'نجاح', 'تم حفظ الشعبة بنجاح')
+        self.clear_section_form()
     
     def handle_delete_section(self):
         """حذف الشعبة المحددة"""
@@ -838,14 +913,18 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            try:
-                self.registration_system.delete_section(section_id)
-                course_code = self.sections_course_combo.currentText()
-                self.load_sections(course_code)
-                self.clear_section_form()
-                QMessageBox.information(self, 'نجاح', 'تم حذف الشعبة بنجاح')
-            except Exception as e:
-                QMessageBox.critical(self, 'خطأ', f'فشل الحذف: {str(e)}')
+            self.run_async(
+                self.registration_system.delete_section, section_id,
+                on_done=lambda _: self.on_section_deleted(),
+                on_error=lambda e: QMessageBox.critical(self, 'خطأ', f'فشل الحذف: {str(e)}')
+            )
+    
+    def on_section_deleted(self):
+        """تحديث الواجهة بعد حذف الشعبة"""
+        course_code = self.sections_course_combo.currentText()
+        self.load_sections(course_code)
+        self.clear_section_form()
+        QMessageBox.information(self, 'نجاح', 'تم حذف الشعبة بنجاح')
     
     def on_time_selected(self, index):
         """ملء الأوقات تلقائياً عند اختيار الوقت من القائمة"""
@@ -908,22 +987,28 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            try:
-                self.student_manager.delete_student(student_id)
-                self.load_students()
-                QMessageBox.information(self, 'نجاح', 'تم حذف الطالب بنجاح')
-            except Exception as e:
-                QMessageBox.critical(self, 'خطأ', f'فشل الحذف: {str(e)}')
+            self.run_async(
+                self.student_manager.delete_student_database, student_id,
+                on_done=lambda _: self.on_student_deleted(),
+                on_error=lambda e: QMessageBox.critical(self, 'خطأ', f'فشل الحذف: {str(e)}')
+            )
+    
+    def on_student_deleted(self):
+        """تحديث الواجهة بعد حذف الطالب"""
+        self.load_students()
+        QMessageBox.information(self, 'نجاح', 'تم حذف الطالب بنجاح')
     
     # ============================================================================
     # Doctor/Faculty Management Functions
     # ============================================================================
     
     def load_doctors(self):
-        """تحميل قائمة الأطباء في الجدول"""
+        """تحميل قائمة الأطباء في الجدول (في الخلفية)"""
+        self.run_async(database.get_all_doctors, on_done=self.show_doctors)
+    
+    def show_doctors(self, doctors):
+        """عرض قائمة الأطباء في الجدول"""
         self.doctors_table.setRowCount(0)
-        doctors = database.get_all_doctors()
-        
         for i, (doctor_id, name, email, preferred_courses, time_availability) in enumerate(doctors):
             self.doctors_table.insertRow(i)
             self.doctors_table.setItem(i, 0, QTableWidgetItem(doctor_id))
@@ -932,8 +1017,8 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
         
         # تحميل قائمة المقررات في assign_course_combo
         self.assign_course_combo.clear()
-        courses = self.registration_system._course_cache
-        for code in sorted(courses.keys()):
+        courses = self.registration_system.get_courses()
+        for code in sorted(course.course_code for course in courses):
             self.assign_course_combo.addItem(code)
     
     def on_doctor_selected(self):
@@ -941,18 +1026,21 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
         row = self.doctors_table.currentRow()
         if row >= 0:
             doctor_id = self.doctors_table.item(row, 0).text()
-            doctor = database.get_doctor(doctor_id)
+            self.run_async(database.get_doctor, doctor_id, on_done=self.show_doctor)
+    
+    def show_doctor(self, doctor):
+        """ملء نموذج Doctor ثم تحميل التعيينات والجدول الزمني"""
+        if doctor:
+            doctor_id = doctor[0]
+            self.doctor_id_input.setText(doctor[0])
+            self.doctor_name_input.setText(doctor[1])
+            self.doctor_email_input.setText(doctor[2])
+            self.doctor_preferred_courses_input.setText(doctor[3] or '')
+            self.doctor_time_availability_input.setText(doctor[4] or '')
             
-            if doctor:
-                self.doctor_id_input.setText(doctor[0])
-                self.doctor_name_input.setText(doctor[1])
-                self.doctor_email_input.setText(doctor[2])
-                self.doctor_preferred_courses_input.setText(doctor[3] or '')
-                self.doctor_time_availability_input.setText(doctor[4] or '')
-                
-                # تحميل التعيينات والجدول الزمني
-                self.load_doctor_assignments(doctor_id)
-                self.load_doctor_schedule(doctor_id)
+            # تحميل التعيينات والجدول الزمني
+            self.load_doctor_assignments(doctor_id)
+            self.load_doctor_schedule(doctor_id)
     
     def handle_save_doctor(self):
         """حفظ بيانات Doctor"""
@@ -970,17 +1058,19 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
             QMessageBox.warning(self, 'خطأ', 'البريد الإلكتروني مطلوب')
             return
         
-        try:
-            preferred_courses = self.doctor_preferred_courses_input.text().strip()
-            time_availability = self.doctor_time_availability_input.text().strip()
-            
-            database.add_doctor(doctor_id, name, email, preferred_courses, time_availability)
-            
-            self.load_doctors()
-            QMessageBox.information(self, 'نجاح', 'تم حفظ Doctor بنجاح')
-            self.clear_doctor_form()
-        except Exception as e:
-            QMessageBox.critical(self, 'خطأ', f'فشل حفظ Doctor: {str(e)}')
+        preferred_courses = self.doctor_preferred_courses_input.text().strip()
+        time_availability = self.doctor_time_availability_input.text().strip()
+        self.run_async(
+            database.add_doctor, doctor_id, name, email, preferred_courses, time_availability,
+            on_done=lambda _: self.on_doctor_saved(),
+            on_error=lambda e: QMessageBox.critical(self, 'خطأ', f'فشل حفظ Doctor: {str(e)}')
+        )
+    
+    def on_doctor_saved(self):
+        """تحديث الواجهة بعد حفظ Doctor"""
+        self.load_doctors()
+        QMessageBox.information(self, 'نجاح', 'تم حفظ Doctor بنجاح')
+        self.clear_doctor_form()
     
     def handle_delete_doctor(self):
         """حذف Doctor"""
@@ -996,22 +1086,23 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            try:
-                database.delete_doctor(doctor_id)
-                self.load_doctors()
-                self.clear_doctor_form()
-                QMessageBox.information(self, 'نجاح', 'تم حذف Doctor بنجاح')
-            except Exception as e:
-                QMessageBox.critical(self, 'خطأ', f'فشل الحذف: {str(e)}')
+            self.run_async(
+                database.delete_doctor, doctor_id,
+                on_done=lambda _: self.on_doctor_deleted(),
+                on_error=lambda e: QMessageBox.critical(self, 'خطأ', f'فشل الحذف: {str(e)}')
+            )
+    
+    def on_doctor_deleted(self):
+        """تحديث الواجهة بعد حذف Doctor"""
+        self.load_doctors()
+        self.clear_doctor_form()
+        QMessageBox.information(self, 'نجاح', 'تم حذف Doctor بنجاح')
     
     def update_sections_combo(self, course_code: str):
         """تحديث قائمة الشعب عند اختيار مقرر"""
         self.assign_section_combo.clear()
         if course_code:
-            sections = [
-                s for s in self.registration_system._section_cache.values()
-                if s.course_code == course_code
-            ]
+            sections = self.registration_system.get_sections_for_course(course_code)
             for section in sections:
                 self.assign_section_combo.addItem(section.section_id)
     
@@ -1033,40 +1124,47 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
             QMessageBox.warning(self, 'خطأ', 'الرجاء اختيار شعبة')
             return
         
-        try:
-            # الحصول على بيانات الشعبة
-            section = self.registration_system.get_section(section_id)
-            if not section:
-                QMessageBox.warning(self, 'خطأ', 'الشعبة المحددة غير موجودة')
-                return
-            
-            # التحقق من أن الشعبة تابعة للمقرر المحدد
-            if section.course_code != course_code:
-                QMessageBox.warning(self, 'خطأ', 'الشعبة المحددة لا تنتمي لهذا المقرر')
-                return
-            
-            # فحص التعارضات الزمنية
-            has_conflict = database.check_doctor_time_conflict(
-                doctor_id, section.start_time, section.end_time
+        # الحصول على بيانات الشعبة
+        section = self.registration_system.get_section(section_id)
+        if not section:
+            QMessageBox.warning(self, 'خطأ', 'الشعبة المحددة غير موجودة')
+            return
+        
+        # التحقق من أن الشعبة تابعة للمقرر المحدد
+        if section.course_code != course_code:
+            QMessageBox.warning(self, 'خطأ', 'الشعبة المحددة لا تنتمي لهذا المقرر')
+            return
+        
+        # فحص التعارضات الزمنية (في الخلفية) ثم التعيين بعد تأكيد المستخدم
+        self.run_async(
+            database.check_doctor_time_conflict, doctor_id, section.start_time, section.end_time,
+            on_done=lambda has_conflict: self.confirm_assign_course(doctor_id, course_code, section_id, has_conflict),
+            on_error=lambda e: QMessageBox.critical(self, 'خطأ', f'فشل التعيين: {str(e)}')
+        )
+    
+    def confirm_assign_course(self, doctor_id: str, course_code: str, section_id: str, has_conflict: bool):
+        """طلب التأكيد عند وجود تعارض ثم تعيين المقرر"""
+        if has_conflict:
+            reply = QMessageBox.question(
+                self, 'تعارض زمني',
+                'يوجد تعارض زمني مع التعيينات الموجودة. هل تريد المتابعة؟',
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
             )
-            
-            if has_conflict:
-                reply = QMessageBox.question(
-                    self, 'تعارض زمني',
-                    'يوجد تعارض زمني مع التعيينات الموجودة. هل تريد المتابعة؟',
-                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-                )
-                if reply == QMessageBox.StandardButton.No:
-                    return
-            
-            # تعيين المقرر
-            database.assign_course_to_doctor(doctor_id, course_code, section_id)
-            
+            if reply == QMessageBox.StandardButton.No:
+                return
+        
+        self.run_async(
+            database.assign_course_to_doctor, doctor_id, course_code, section_id,
+            on_done=lambda _: self.on_assignment_changed(doctor_id, 'تم تعيين المقرر بنجاح'),
+            on_error=lambda e: QMessageBox.critical(self, 'خطأ', f'فشل التعيين: {str(e)}')
+        )
+    
+    def on_assignment_changed(self, doctor_id: Optional[str], message: str):
+        """إعادة تحميل التعيينات والجدول الزمني بعد تعيين/إزالة"""
+        if doctor_id:
             self.load_doctor_assignments(doctor_id)
             self.load_doctor_schedule(doctor_id)
-            QMessageBox.information(self, 'نجاح', 'تم تعيين المقرر بنجاح')
-        except Exception as e:
-            QMessageBox.critical(self, 'خطأ', f'فشل التعيين: {str(e)}')
+        QMessageBox.information(self, 'نجاح', message)
     
     def handle_remove_assignment(self):
         """إزالة تعيين من Doctor"""
@@ -1082,25 +1180,15 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
         
         assignment_id = int(assignment_id_item.text())
         
-        try:
-            database.remove_doctor_assignment(assignment_id)
-            
-            # إعادة تحميل البيانات
-            doctor_row = self.doctors_table.currentRow()
-            if doctor_row >= 0:
-                doctor_id = self.doctors_table.item(doctor_row, 0).text()
-                self.load_doctor_assignments(doctor_id)
-                self.load_doctor_schedule(doctor_id)
-            
-            QMessageBox.information(self, 'نجاح', 'تم إزالة التعيين بنجاح')
-        except Exception as e:
-            QMessageBox.critical(self, 'خطأ', f'فشل الإزالة: {str(e)}')
+        self.remove_assignment_by_id(assignment_id)
     
     def load_doctor_assignments(self, doctor_id: str):
-        """تحميل تعيينات Doctor في الجدول"""
+        """تحميل تعيينات Doctor في الجدول (في الخلفية)"""
+        self.run_async(database.get_doctor_assignments, doctor_id, on_done=self.show_doctor_assignments)
+    
+    def show_doctor_assignments(self, assignments):
+        """عرض تعيينات Doctor في الجدول"""
         self.assignments_table.setRowCount(0)
-        assignments = database.get_doctor_assignments(doctor_id)
-        
         for i, (assignment_id, doc_id, course_code, section_id) in enumerate(assignments):
             self.assignments_table.insertRow(i)
             self.assignments_table.setItem(i, 0, QTableWidgetItem(course_code))
@@ -1118,26 +1206,34 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
     
     def remove_assignment_by_id(self, assignment_id: int):
         """إزالة تعيين بواسطة ID"""
-        try:
-            database.remove_doctor_assignment(assignment_id)
-            
-            # إعادة تحميل البيانات
-            doctor_row = self.doctors_table.currentRow()
-            if doctor_row >= 0:
-                doctor_id = self.doctors_table.item(doctor_row, 0).text()
-                self.load_doctor_assignments(doctor_id)
-                self.load_doctor_schedule(doctor_id)
-            
-            QMessageBox.information(self, 'نجاح', 'تم إزالة التعيين بنجاح')
-        except Exception as e:
-            QMessageBox.critical(self, 'خطأ', f'فشل الإزالة: {str(e)}')
+        # الـ Doctor المحدد الآن (لإعادة التحميل بعد الإزالة)
+        doctor_row = self.doctors_table.currentRow()
+        doctor_id = self.doctors_table.item(doctor_row, 0).text() if doctor_row >= 0 else None
+        self.run_async(
+            database.remove_doctor_assignment, assignment_id,
+            on_done=lambda _: self.on_assignment_changed(doctor_id, 'تم إزالة التعيين بنجاح'),
+            on_error=lambda e: QMessageBox.critical(self, 'خطأ', f'فشل الإزالة: {str(e)}')
+        )
     
     def load_doctor_schedule(self, doctor_id: str):
-        """تحميل الجدول الزمني للـ Doctor"""
-        self.doctor_schedule_table.setRowCount(0)
+        """تحميل الجدول الزمني للـ Doctor (في الخلفية، مع فحص التعارضات)"""
+        self.run_async(self._fetch_doctor_schedule, doctor_id, on_done=self.show_doctor_schedule)
+    
+    # _ private method
+    def _fetch_doctor_schedule(self, doctor_id: str):
+        """الجدول الزمني مع حالة التعارض لكل شعبة (يعمل في خيط قاعدة البيانات)"""
         schedule = database.get_doctor_schedule(doctor_id)
-        
-        for i, item in enumerate(schedule):
+        return [
+            (item, database.check_doctor_time_conflict(
+                doctor_id, item.get('start_time', 0), item.get('end_time', 0), item.get('section_id')
+            ))
+            for item in schedule
+        ]
+    
+    def show_doctor_schedule(self, schedule):
+        """عرض الجدول الزمني للـ Doctor"""
+        self.doctor_schedule_table.setRowCount(0)
+        for i, (item, has_conflict) in enumerate(schedule):
             self.doctor_schedule_table.insertRow(i)
             self.doctor_schedule_table.setItem(i, 0, QTableWidgetItem(item.get('course_name', '')))
             
@@ -1149,10 +1245,6 @@ class AdminDashboard_DashboardBase_admin(DashboardBase_QWidget_student):
             
             self.doctor_schedule_table.setItem(i, 2, QTableWidgetItem(item.get('hall', '')))
             
-            # التحقق من التعارضات
-            has_conflict = database.check_doctor_time_conflict(
-                doctor_id, start_time, end_time, item.get('section_id')
-            )
             status = "⚠️ تعارض" if has_conflict else "✅ جيد"
             self.doctor_schedule_table.setItem(i, 3, QTableWidgetItem(status))
     
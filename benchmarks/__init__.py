@@ -0,0 +1,14 @@
+"""حزمة القياس - Benchmarks Package
+
+أدوات لقياس أداء RegistrationSystem_registration_system و database.py على نطاق واسع:
+    * generator.py - مولد بيانات اصطناعية (طلاب، مقررات، شعب، خطط برامج) ببذرة ثابتة
+    * runner.py    - مشغل سيناريو يوم التسجيل (تسجيل/حذف/دخول بشكل متزامن)
+
+الاستخدام:
+    python -m benchmarks --db bench.db --students 2000 --threads 8 --operations 5000
+"""
+
+from benchmarks.generator import generate_dataset
+from benchmarks.runner import ScenarioRunner_benchmarks
+
+__all__ = ['generate_dataset', 'ScenarioRunner_benchmarks']
@@ -0,0 +1,63 @@
+"""نقطة تشغيل القياس: python -m benchmarks --help"""
+
+import argparse
+import json
+import os
+
+import database
+from benchmarks.generator import generate_dataset
+from benchmarks.runner import DEFAULT_MIX, ScenarioRunner_benchmarks, format_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registration-day load generator and benchmark")
+    parser.add_argument("--db", default="bench.db", help="benchmark database file")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--courses", type=int, default=200)
+    parser.add_argument("--sections", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=202)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--mix", default=",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+                        help="operation weights, e.g. register=0.6,unregister=0.2,login=0.2")
+    parser.add_argument("--profile", help="database performance profile (default: ODUS_DB_PROFILE or interactive)")
+    parser.add_argument("--instrument", action="store_true",
+                        help="time every SQL statement and print the slowest ones and all query plans")
+    parser.add_argument("--skip-generate", action="store_true", help="reuse an existing --db")
+    parser.add_argument("--json", help="write the report as JSON to this file")
+    args = parser.parse_args()
+    
+    generation_stats = None
+    if not args.skip_generate:
+        if os.path.exists(args.db):
+            os.remove(args.db)
+        counts = generate_dataset(args.db, args.students, args.courses, args.sections, args.seed,
+                                  instrument=args.instrument)
+        generation_stats = database.get_query_stats()
+        print("generated: " + ", ".join(f"{kind}={count}" for kind, count in counts.items()))
+    
+    mix = {}
+    for part in args.mix.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    
+    runner = ScenarioRunner_benchmarks(args.db, threads=args.threads, operations=args.operations,
+                                       mix=mix, seed=args.seed, profile=args.profile,
+                                       instrument=args.instrument)
+    report = runner.run()
+    print(format_report(report))
+    if args.instrument:
+        print()
+        print(database.slowest_statements_report())
+        print()
+        # خطط جميع الجمل المنفذة أثناء التوليد (الاستيراد الجماعي) والسيناريو
+        sources = [stats for stats in (database.get_query_stats(), generation_stats) if stats is not None]
+        print(database.format_query_plan_report(database.explain_query_plans(*sources)))
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""مولد البيانات الاصطناعية - Synthetic Data Generator (benchmarks/generator.py)
+
+يملأ قاعدة بيانات بـ:
+    - N طالب (مع حسابات مستخدمين وسجل أكاديمي للمستويات السابقة)
+    - M مقرر موزعة على المستويات مع متطلبات سابقة تشكل رسماً غير دوري (DAG)
+    - K شعبة بأنماط أيام/أوقات واقعية (نفس أنماط واجهة المدير)
+    - خطط البرامج (program_plans)
+
+نفس البذرة (seed) تنتج نفس البيانات دائماً.
+"""
+
+import random
+from typing import Dict, List
+
+import database
+from registration_system import PasswordHasher_registration_system
+
+# كلمة مرور جميع الطلاب الاصطناعيين (يستخدمها مشغل السيناريو لتسجيل الدخول)
+BENCH_PASSWORD = "Bench@12345"
+
+# أنماط الأيام ومدة المحاضرة بالساعات
+DAY_PATTERNS = (
+    ("الأحد,الثلاثاء,الخميس", 1),
+    ("الإثنين,الأربعاء", 2),
+    ("الأحد,الثلاثاء", 2),
+    ("الخميس", 3),
+    ("السبت", 3),
+)
+FIRST_HOUR = 8
+LAST_HOUR = 17
+LEVELS = 10
+
+
+def _course_rows(rng: random.Random, courses: int) -> List[Dict]:
+    """مقررات موزعة بالتساوي على المستويات (المستوى في الرمز: C<level><index>)."""
+    rows = []
+    for i in range(courses):
+        level = 1 + i * LEVELS // courses
+        credits = rng.choice((2, 3, 3, 3, 4))
+        rows.append({
+            "course_code": f"C{level:02d}{i:04d}",
+            "name": f"Course {i}",
+            "credits": credits,
+            "lecture_hours": credits,
+            "lab_hours": rng.choice((0, 0, 1, 2)),
+            "level": level,
+        })
+    return rows
+
+
+def _prerequisite_map(rng: random.Random, course_rows: List[Dict]) -> Dict[str, List[str]]:
+    """0-2 متطلبات لكل مقرر من المستويات الأقل فقط (يضمن عدم وجود دورات)."""
+    by_level: Dict[int, List[str]] = {}
+    for row in course_rows:
+        by_level.setdefault(row["level"], []).append(row["course_code"])
+    
+    prerequisites = {}
+    for row in course_rows:
+        lower = [code for level in range(1, row["level"]) for code in by_level.get(level, [])]
+        if not lower:
+            continue
+        # تفضيل المستوى السابق مباشرة كما في الخطط الحقيقية
+        previous = by_level.get(row["level"] - 1, []) or lower
+        count = rng.choice((0, 1, 1, 2))
+        picks = {rng.choice(previous if rng.random() < 0.7 else lower) for _ in range(count)}
+        if picks:
+            prerequisites[row["course_code"]] = sorted(picks)
+    return prerequisites
+
+
+def _section_rows(rng: random.Random, course_rows: List[Dict], sections: int) -> List[Dict]:
+    """شعبة واحدة على الأقل لكل مقرر، والباقي موزع عشوائياً."""
+    codes = [row["course_code"] for row in course_rows]
+    owners = codes[:sections] + [rng.choice(codes) for _ in range(max(0, sections - len(codes)))]
+    rows = []
+    for i, course_code in enumerate(owners):
+        days, duration = rng.choice(DAY_PATTERNS)
+        start = rng.randint(FIRST_HOUR, LAST_HOUR - duration)
+        rows.append({
+            "section_id": f"S{i:05d}",
+            "course_code": course_code,
+            "instructor": f"Dr. {rng.randint(1, max(1, sections // 4))}",
+            "start_time": start,
+            "end_time": start + duration,
+            "hall": f"H{rng.randint(1, 60)}",
+            "max_capacity": rng.randint(25, 60),
+            "days": days,
+        })
+    return rows
+
+
+def _plan_rows(rng: random.Random, course_rows: List[Dict]) -> List[Dict]:
+    """كل مقرر في مستواه: مشترك بين جميع البرامج أو خاص ببرنامج واحد."""
+    return [
+        {
+            "program": "All" if rng.random() < 0.3 else rng.choice(database.ALLOWED_PROGRAMS),
+            "level": row["level"],
+            "course_code": row["course_code"],
+        }
+        for row in course_rows
+    ]
+
+
+def generate_dataset(db_name: str, students: int = 1000, courses: int = 200,
+                     sections: int = 600, seed: int = 202, instrument: bool = False) -> Dict[str, int]:
+    """
+    إنشاء/ملء قاعدة بيانات القياس.
+    
+    Args:
+        db_name: ملف قاعدة البيانات (يتم توجيه database.py إليه عبر use_database)
+        students, courses, sections: أحجام البيانات
+        seed: بذرة المولد العشوائي
+        instrument: قياس جمل الاستيراد (لفحص خططها بعد التوليد)
+    
+    Returns:
+        عدد الصفوف المكتوبة لكل نوع
+    """
+    rng = random.Random(seed)
+    database.use_database(db_name, profile="bulk-load", instrument=instrument)
+    
+    course_rows = _course_rows(rng, courses)
+    prerequisites = _prerequisite_map(rng, course_rows)
+    section_rows = _section_rows(rng, course_rows, sections)
+    plan_rows = _plan_rows(rng, course_rows)
+    
+    counts = {
+        "courses": database.bulk_upsert_courses(course_rows)[0],
+        "sections": database.bulk_upsert_sections(section_rows)[0],
+        "prerequisites": database.bulk_set_prerequisites(prerequisites)[0],
+        "program_plans": database.bulk_program_plans(plan_rows)[0],
+    }
+    
+    plans = database.fetch_program_plans()
+    # تجزئة واحدة لكلمة المرور لجميع الحسابات (التجزئة ليست ما نقيسه هنا)
+    password_hash = PasswordHasher_registration_system.hash_password(BENCH_PASSWORD)
+    
+    student_rows, user_rows, transcript_rows = [], [], []
+    for i in range(students):
+        student_id = str(4400000 + i)
+        program = rng.choice(database.ALLOWED_PROGRAMS)
+        level = rng.randint(1, LEVELS)
+        email = f"{student_id}@bench.local"
+        student_rows.append((student_id, f"Student {i}", email, program, level))
+        user_rows.append((student_id, email, password_hash, "student", f"Student {i}"))
+        # السجل الأكاديمي: جميع مقررات الخطة في المستويات السابقة
+        for previous_level in range(1, level):
+            for course_code in plans.get((program, previous_level), []):
+                transcript_rows.append((student_id, course_code))
+    
+    with database.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE;")
+        cur.executemany(
+            "INSERT OR IGNORE INTO students (student_id, name, email, program, level) VALUES (?, ?, ?, ?, ?)",
+            student_rows,
+        )
+        cur.executemany(
+            """INSERT OR IGNORE INTO users (student_id, email, password_hash, role, display_name)
+               VALUES (?, ?, ?, ?, ?)""",
+            user_rows,
+        )
+        cur.executemany(
+            "INSERT OR IGNORE INTO transcripts (student_id, course_code) VALUES (?, ?)",
+            transcript_rows,
+        )
+        conn.commit()
+    
+    counts.update(students=len(student_rows), users=len(user_rows), transcripts=len(transcript_rows))
+    return counts
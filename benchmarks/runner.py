@@ -0,0 +1,268 @@
+"""مشغل سيناريو يوم التسجيل - Registration-Day Scenario Runner (benchmarks/runner.py)
+
+يعيد تشغيل حركة متزامنة (تسجيل، حذف تسجيل، تسجيل دخول) على قاعدة بيانات القياس
+ويقيس لكل واجهة (API):
+    - الإنتاجية (عمليات/ثانية)
+    - زمن الاستجابة p50 / p95 / p99
+    - عدد مرات انتظار قفل SQLite ومدة الانتظار
+
+قياس انتظار القفل:
+    الاتصالات تُفتح بـ busy_timeout = 0 فيظهر كل تعارض على القفل فوراً كخطأ
+    "database is locked"؛ المشغل يعدّه ثم ينتظر (backoff) ويعيد المحاولة.
+    زمن الاستجابة المقاس يشمل وقت الانتظار (كما يراه المستخدم).
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import database
+from registration_system import (
+    RegistrationSystem_registration_system,
+    StudentManager_registration_system,
+    UserManager_registration_system,
+)
+from benchmarks.generator import BENCH_PASSWORD
+
+# توزيع العمليات الافتراضي في يوم التسجيل
+DEFAULT_MIX = {"register": 0.6, "unregister": 0.2, "login": 0.2}
+
+LOCK_BACKOFF_START = 0.001
+LOCK_BACKOFF_MAX = 0.05
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """النسبة المئوية بطريقة nearest-rank (القائمة يجب أن تكون مرتبة)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@dataclass
+class ApiStats_benchmarks:
+    """إحصائيات واجهة واحدة (تُدمج من جميع الخيوط في النهاية)."""
+    name: str
+    latencies: List[float] = field(default_factory=list)
+    ok: int = 0
+    rejected: int = 0  # رفض منطقي (شعبة ممتلئة، متطلبات ناقصة، ...)
+    errors: int = 0
+    lock_waits: int = 0
+    lock_wait_time: float = 0.0
+    
+    def merge(self, other: 'ApiStats_benchmarks'):
+        self.latencies.extend(other.latencies)
+        self.ok += other.ok
+        self.rejected += other.rejected
+        self.errors += other.errors
+        self.lock_waits += other.lock_waits
+        self.lock_wait_time += other.lock_wait_time
+    
+    def summary(self, elapsed: float) -> Dict[str, float]:
+        latencies = sorted(self.latencies)
+        return {
+            "calls": len(latencies),
+            "ok": self.ok,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "throughput": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "max_ms": (latencies[-1] * 1000) if latencies else 0.0,
+            "lock_waits": self.lock_waits,
+            "lock_wait_ms": self.lock_wait_time * 1000,
+        }
+
+
+def _is_lock_error(message: str) -> bool:
+    return "database is locked" in message or "database table is locked" in message
+
+
+class ScenarioRunner_benchmarks:
+    """
+    مشغل السيناريو.
+    
+    كل خيط يمثل مجموعة من الطلاب (تقسيم ثابت للطلاب بين الخيوط) ويختار العملية
+    حسب mix. نظام التسجيل مشترك بين الخيوط كما في التطبيق الحقيقي.
+    
+    مثال:
+        runner = ScenarioRunner_benchmarks("bench.db", threads=8, operations=5000)
+        report = runner.run()
+    """
+    
+    def __init__(self, db_name: str, threads: int = 8, operations: int = 2000,
+                 mix: Optional[Dict[str, float]] = None, seed: int = 202,
+                 max_students: Optional[int] = None, max_lock_retries: int = 200,
+                 profile: Optional[str] = None, instrument: bool = False):
+        self.db_name = db_name
+        self.profile = profile
+        self.instrument = instrument
+        self.threads = threads
+        self.operations = operations
+        self.mix = mix or dict(DEFAULT_MIX)
+        self.seed = seed
+        self.max_students = max_students
+        self.max_lock_retries = max_lock_retries
+    
+    # _ private method
+    def _call(self, stats: ApiStats_benchmarks, fn: Callable[[], Tuple[bool, str]]):
+        """تنفيذ عملية مع عدّ انتظار القفل وإعادة المحاولة وقياس الزمن الكلي."""
+        backoff = LOCK_BACKOFF_START
+        started = time.perf_counter()
+        for _ in range(self.max_lock_retries + 1):
+            try:
+                success, message = fn()
+            except Exception as e:
+                success, message = False, str(e)
+                if not _is_lock_error(message):
+                    stats.errors += 1
+                    break
+            if success or not _is_lock_error(message or ""):
+                if success:
+                    stats.ok += 1
+                else:
+                    stats.rejected += 1
+                break
+            stats.lock_waits += 1
+            wait_started = time.perf_counter()
+            time.sleep(backoff)
+            stats.lock_wait_time += time.perf_counter() - wait_started
+            backoff = min(backoff * 2, LOCK_BACKOFF_MAX)
+        else:
+            stats.errors += 1
+        stats.latencies.append(time.perf_counter() - started)
+    
+    # _ private method
+    def _register(self, rng: random.Random, student) -> Tuple[bool, str]:
+        registered = {
+            section.course_code
+            for section in (self.registration_system.get_section(reg.get('id')) for reg in student.schedule)
+            if section
+        }
+        candidates = [
+            course for course in self.registration_system.get_eligible_courses(
+                student, self.registration_system.get_available_courses(student.program, student.level)
+            )
+            if course.course_code not in registered
+        ]
+        if not candidates:
+            return False, "No eligible courses"
+        course = rng.choice(candidates)
+        sections = self.registration_system.get_sections_for_course(course.course_code)
+        if not sections:
+            return False, "No sections"
+        section = rng.choice(sections)
+        return self.registration_system.register_student_database_registration_system(
+            student, [section.section_id]
+        )
+    
+    # _ private method
+    def _unregister(self, rng: random.Random, student) -> Tuple[bool, str]:
+        if not student.schedule:
+            return False, "Nothing to unregister"
+        section_id = rng.choice(student.schedule).get('id')
+        return self.registration_system.unregister_student_database_registration_system(student, section_id)
+    
+    # _ private method
+    def _login(self, rng: random.Random, student) -> Tuple[bool, str]:
+        user = self.user_manager.authenticate_user_passwordhasher_accesslogger_registration_system(
+            student.student_id, BENCH_PASSWORD
+        )
+        return (user is not None), ("" if user else "Invalid credentials")
+    
+    # _ private method
+    def _worker(self, index: int, students: List, operations: int,
+                results: Dict[str, ApiStats_benchmarks], barrier: threading.Barrier):
+        rng = random.Random(self.seed * 1000 + index)
+        apis = {"register": self._register, "unregister": self._unregister, "login": self._login}
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        barrier.wait()
+        for _ in range(operations):
+            if not students:
+                break
+            name = rng.choices(names, weights)[0]
+            student = rng.choice(students)
+            self._call(results[name], lambda: apis[name](rng, student))
+    
+    # + public method
+    def run(self) -> Dict[str, Dict[str, float]]:
+        """
+        تشغيل السيناريو.
+        Returns: {api: summary} بالإضافة إلى "total" و "_meta"
+        """
+        database.use_database(self.db_name, profile=self.profile, busy_timeout=0,
+                              instrument=self.instrument)
+        self.registration_system = RegistrationSystem_registration_system()
+        self.user_manager = UserManager_registration_system()
+        student_manager = StudentManager_registration_system()
+        
+        student_ids = [row[0] for row in database.list_students()]
+        if self.max_students:
+            student_ids = student_ids[:self.max_students]
+        students = list(student_manager.get_students(student_ids).values())
+        
+        per_thread = [students[i::self.threads] for i in range(self.threads)]
+        per_thread_ops = [self.operations // self.threads + (1 if i < self.operations % self.threads else 0)
+                          for i in range(self.threads)]
+        thread_results = [{name: ApiStats_benchmarks(name) for name in self.mix} for _ in range(self.threads)]
+        barrier = threading.Barrier(self.threads + 1)
+        workers = [
+            threading.Thread(target=self._worker,
+                             args=(i, per_thread[i], per_thread_ops[i], thread_results[i], barrier))
+            for i in range(self.threads)
+        ]
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        # المدير والمسجل مشتركان: كتابة ما تبقى في قاعدة بيانات هذا التشغيل وإيقاف خيوطهما
+        self.user_manager.session_manager.close()
+        self.user_manager.access_logger.close()
+        
+        merged = {name: ApiStats_benchmarks(name) for name in self.mix}
+        total = ApiStats_benchmarks("total")
+        for result in thread_results:
+            for name, stats in result.items():
+                merged[name].merge(stats)
+                total.merge(stats)
+        
+        report = {name: stats.summary(elapsed) for name, stats in merged.items()}
+        report["total"] = total.summary(elapsed)
+        report["_meta"] = {
+            "elapsed_s": elapsed,
+            "threads": self.threads,
+            "profile": database._db_manager.profile,
+            "students": len(students),
+            "pool": database.get_pool_stats(),
+        }
+        query_stats = database.get_query_stats()
+        if query_stats is not None:
+            report["_statements"] = query_stats.snapshot()
+        return report
+
+
+def format_report(report: Dict[str, Dict]) -> str:
+    """جدول نصي للتقرير."""
+    columns = ("calls", "ok", "rejected", "errors", "throughput", "p50_ms", "p95_ms", "p99_ms",
+               "max_ms", "lock_waits", "lock_wait_ms")
+    lines = ["api".ljust(12) + "".join(column.rjust(13) for column in columns)]
+    for name, summary in report.items():
+        if name.startswith("_"):
+            continue
+        cells = []
+        for column in columns:
+            value = summary[column]
+            cells.append((f"{value:.2f}" if isinstance(value, float) else str(value)).rjust(13))
+        lines.append(name.ljust(12) + "".join(cells))
+    meta = report.get("_meta", {})
+    if meta:
+        lines.append(f"elapsed {meta['elapsed_s']:.2f}s, {meta['threads']} threads, "
+                     f"{meta['students']} students, profile {meta['profile']}")
+    return "\n".join(lines)
@@ -2,15 +2,254 @@
 يحتوي على جميع عمليات قاعدة البيانات SQLite باستخدام OOP.
 """
 
+import csv
+import functools
+import json
+import math
+import os
+import re
 import sqlite3
-from typing import List, Tuple, Optional, Dict
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, List, Tuple, Optional, Dict, Iterable, Iterator
 
 # اسم ملف قاعدة البيانات
 DB_NAME = "plans.db"
 
+# الحد الأقصى لعدد الاتصالات الخاملة المحفوظة في مجمع الاتصالات (Connection Pool)
+DEFAULT_POOL_SIZE = 8
+
+# ملفات أداء SQLite (PRAGMA) تُطبق على كل اتصال جديد
+# - interactive: واجهات المستخدم (قراءة وكتابة متزامنة، WAL يمنع حجب القراءة للكتابة)
+# - bulk-load: الاستيراد الجماعي (synchronous=OFF وذاكرة تخزين أكبر؛ أسرع لكن أقل أماناً عند انقطاع الكهرباء)
+# - read-only-report: التقارير (query_only يمنع أي كتابة عرضية)
+PERFORMANCE_PROFILES: Dict[str, Dict[str, object]] = {
+    "interactive": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,        # ~16MB (القيمة السالبة بالكيلوبايت)
+        "mmap_size": 67108864,       # 64MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,        # ms
+    },
+    "bulk-load": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -65536,        # ~64MB
+        "mmap_size": 268435456,      # 256MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+    "read-only-report": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32000,        # ~32MB
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+        "query_only": "ON",
+    },
+}
+DEFAULT_PROFILE = "interactive"
+
+# متغير البيئة لاختيار الملف عند عدم تمريره للمُنشئ
+PROFILE_ENV_VAR = "ODUS_DB_PROFILE"
+
 # البرامج المسموحة (للتأكد من صحة البيانات)
 ALLOWED_PROGRAMS = ("Computer", "Comm", "Power", "Biomedical")
 
+# أوقات الشعب المسجلة قبل هذه الساعة تعني بعد الظهر (مثل "من 2 إلى 4" و "من 12 إلى 1")
+FIRST_MORNING_HOUR = 8
+
+# الحد الأقصى لعدد المعاملات (?) في جملة واحدة لإصدارات SQLite الأقدم من 3.32
+SQLITE_MAX_VARIABLES = 999
+
+
+# متغير البيئة لتفعيل قياس الاستعلامات (ODUS_DB_INSTRUMENT=1)
+INSTRUMENT_ENV_VAR = "ODUS_DB_INSTRUMENT"
+
+# عدد أزمنة التنفيذ الأخيرة المحفوظة لكل جملة لحساب النسب المئوية
+PERCENTILE_SAMPLE_SIZE = 2048
+
+
+def _normalize_sql(sql: str) -> str:
+    """توحيد نص الجملة: مسافات مفردة، وقوائم IN (?, ?, ...) بأي طول كجملة واحدة."""
+    sql = " ".join(sql.split())
+    return re.sub(r"\?(\s*,\s*\?)+", "?, ...", sql)
+
+
+class QueryStats:
+    """
+    إحصائيات الاستعلامات (طبقة القياس الاختيارية).
+    
+    لكل جملة SQL (بعد التوحيد): عدد الاستدعاءات، الزمن الكلي والأقصى، النسب المئوية
+    (p50/p95/p99 من آخر PERCENTILE_SAMPLE_SIZE تنفيذ)، وعدد الصفوف المرجعة.
+    زمن الجلب (fetchone/fetchall) يُضاف إلى نفس الجملة.
+    
+    الربط:
+        - يُنشأ في DatabaseManager عند instrument=True أو ODUS_DB_INSTRUMENT=1
+        - تسجله InstrumentedCursor
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+    
+    def record(self, sql: str, duration: float, rows: int = 0, params=None, new_call: bool = True):
+        """تسجيل تنفيذ (new_call=True) أو جلب صفوف لجملة سابقة (new_call=False)."""
+        key = _normalize_sql(sql)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {
+                    "calls": 0, "total": 0.0, "max": 0.0, "rows": 0,
+                    "samples": deque(maxlen=PERCENTILE_SAMPLE_SIZE),
+                    "example_sql": sql, "example_params": params,
+                }
+            if new_call:
+                entry["calls"] += 1
+                entry["samples"].append(duration)
+            elif entry["samples"]:
+                entry["samples"][-1] += duration
+            entry["total"] += duration
+            entry["max"] = max(entry["max"], entry["samples"][-1] if entry["samples"] else duration)
+            entry["rows"] += rows
+    
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """نسخة قابلة للتحويل إلى JSON: {sql: {calls, total_ms, mean_ms, p50_ms, p95_ms, p99_ms, max_ms, rows}}"""
+        with self._lock:
+            entries = {key: (dict(entry), sorted(entry["samples"])) for key, entry in self._entries.items()}
+        result = {}
+        for key, (entry, samples) in entries.items():
+            calls = entry["calls"]
+            result[key] = {
+                "calls": calls,
+                "total_ms": entry["total"] * 1000,
+                "mean_ms": (entry["total"] / calls * 1000) if calls else 0.0,
+                "p50_ms": _percentile(samples, 50) * 1000,
+                "p95_ms": _percentile(samples, 95) * 1000,
+                "p99_ms": _percentile(samples, 99) * 1000,
+                "max_ms": entry["max"] * 1000,
+                "rows": entry["rows"],
+            }
+        return result
+    
+    def slowest(self, limit: int = 10, key: str = "total_ms") -> List[Tuple[str, Dict[str, float]]]:
+        """أبطأ الجمل حسب key (الافتراضي: الزمن الكلي)."""
+        return sorted(self.snapshot().items(), key=lambda item: item[1][key], reverse=True)[:limit]
+    
+    def example(self, sql_key: str) -> Tuple[str, object]:
+        """نص ومعاملات أول تنفيذ لجملة (لاستخدامها مع EXPLAIN QUERY PLAN)."""
+        with self._lock:
+            entry = self._entries[sql_key]
+            return entry["example_sql"], entry["example_params"]
+    
+    def export_json(self, path: str, label: str = ""):
+        """حفظ لقطة بصيغة JSON للمقارنة بين الإصدارات."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"label": label, "statements": self.snapshot()}, f, indent=2, ensure_ascii=False)
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """النسبة المئوية بطريقة nearest-rank (القائمة يجب أن تكون مرتبة)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """مؤشر يقيس زمن كل execute/executemany وزمن الجلب وعدد الصفوف."""
+    
+    _last_sql: Optional[str] = None
+    
+    def _stats(self) -> QueryStats:
+        return self.connection.query_stats
+    
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._last_sql = sql
+            self._stats().record(sql, time.perf_counter() - started, params=parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._last_sql = sql
+            self._stats().record(sql, time.perf_counter() - started, rows=max(self.rowcount, 0))
+    
+    def _record_fetch(self, started: float, rows: int):
+        if self._last_sql is not None:
+            self._stats().record(self._last_sql, time.perf_counter() - started, rows=rows, new_call=False)
+    
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._record_fetch(started, 1 if row is not None else 0)
+        return row
+    
+    def fetchmany(self, size: int = None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._record_fetch(started, len(rows))
+        return rows
+    
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._record_fetch(started, len(rows))
+        return rows
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    اتصال المجمع: يمنع الكتل المتداخلة من إنهاء معاملة المستدعي.
+    
+    قاعدة الاستدعاءات المتداخلة:
+        دالة تستعير الاتصال داخل كتلة connection() خارجية لها معاملة مفتوحة
+        لا يجوز لها commit() أو rollback() (ولا BEGIN، وSQLite يرفضه أصلاً)؛
+        المعاملة تخص الكتلة الخارجية وحدها. المخالفة ترفع ProgrammingError
+        بدلاً من حفظ نصف معاملة المستدعي بصمت.
+    """
+    
+    # True داخل كتلة متداخلة بدأت أثناء معاملة مفتوحة (يضبطه DatabaseManager.connection)
+    guard_outer_transaction = False
+    
+    def commit(self):
+        if self.guard_outer_transaction:
+            raise sqlite3.ProgrammingError("nested connection() block must not commit the caller's transaction")
+        super().commit()
+    
+    def rollback(self):
+        if self.guard_outer_transaction:
+            raise sqlite3.ProgrammingError("nested connection() block must not roll back the caller's transaction")
+        super().rollback()
+
+
+class InstrumentedConnection(PooledConnection):
+    """اتصال يستخدم InstrumentedCursor لكل الاستعلامات (بما فيها conn.execute المباشر)."""
+    
+    query_stats: QueryStats
+    
+    def cursor(self, factory=None):
+        return super().cursor(factory or InstrumentedCursor)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
 
 class DatabaseManager:
     """
@@ -31,341 +270,792 @@ class DatabaseManager:
         - الكلاس الأساسي: لا يرث من أي كلاس (كلاس مستقل)
         - الكلاسات التي ترث منه: لا يوجد
         - يتم استخدامه في:
-            * database.py - _db_manager (في السطر 206) - يتم إنشاء مثيل عام واحد
-            * database.py - get_connection() (في السطر 210) - يستدعي _db_manager.get_connection()
-            * database.py - create_database() (في السطر 215) - يستدعي _db_manager.create_database()
-            * جميع دوال database.py تستخدم get_connection() للحصول على اتصال
+            * database.py - _db_manager - يتم إنشاء مثيل عام واحد
+            * database.py - connection() - يستدعي _db_manager.connection()
+            * database.py - get_connection() - يستدعي _db_manager.get_connection()
+            * database.py - create_database() - يستدعي _db_manager.create_database()
+            * جميع دوال database.py تستعير اتصالاً من المجمع (@_pooled أو connection())
     
     مهامه:
         - إنشاء جميع الجداول والبنية الأساسية لقاعدة البيانات
-        - إدارة اتصالات قاعدة البيانات مع تفعيل المفاتيح الخارجية
+        - إدارة مجمع محدود من الاتصالات القابلة لإعادة الاستخدام (Connection Pool)
+        - ربط اتصال واحد بكل خيط (Thread) طوال فترة الاستعارة
+        - تطبيق ملف أداء (PERFORMANCE_PROFILES: WAL, synchronous, cache_size, ...) على كل اتصال
+        - قياس اختياري لزمن كل جملة SQL (QueryStats) مع تقرير أبطأ الجمل وخططها
         - توفير واجهة موحدة لجميع العمليات على قاعدة البيانات
         
     مثال الاستخدام:
         db_manager = DatabaseManager()  # إنشاء مدير قاعدة البيانات
-        conn = db_manager.get_connection()  # الحصول على اتصال
-        db_manager.create_database()  # إنشاء/تحديث الجداول
+        DatabaseManager(profile="bulk-load")  # أو: ODUS_DB_PROFILE=bulk-load
+        with db_manager.connection() as conn:  # استعارة اتصال من المجمع
+            conn.execute("SELECT 1")
+        db_manager.get_pool_stats()  # {'hits': ..., 'misses': ..., ...}
     """
     
-    def __init__(self, db_name: str = DB_NAME):
-        """تهيئة مدير قاعدة البيانات."""
+    def __init__(self, db_name: str = DB_NAME, pool_size: int = DEFAULT_POOL_SIZE,
+                 profile: Optional[str] = None, busy_timeout: Optional[float] = None,
+                 instrument: Optional[bool] = None):
+        """
+        تهيئة مدير قاعدة البيانات.
+        
+        Args:
+            profile: اسم ملف الأداء من PERFORMANCE_PROFILES
+                     (الافتراضي: متغير البيئة ODUS_DB_PROFILE ثم "interactive")
+            busy_timeout: مدة انتظار القفل بالثواني (تتجاوز قيمة الملف إذا مُررت)
+            instrument: تفعيل قياس زمن الاستعلامات (الافتراضي: ODUS_DB_INSTRUMENT)
+        """
+        profile = profile or os.environ.get(PROFILE_ENV_VAR) or DEFAULT_PROFILE
+        if profile not in PERFORMANCE_PROFILES:
+            raise ValueError(
+                f"Unknown database profile '{profile}'. Available: {', '.join(PERFORMANCE_PROFILES)}"
+            )
         self.db_name = db_name
+        self.pool_size = pool_size
+        self.profile = profile
+        self._pragmas = dict(PERFORMANCE_PROFILES[profile])
+        if busy_timeout is not None:
+            self._pragmas["busy_timeout"] = int(busy_timeout * 1000)
+        self.busy_timeout = self._pragmas["busy_timeout"] / 1000.0
+        # _ private: الاتصالات الخاملة الجاهزة لإعادة الاستخدام
+        self._idle_connections: List[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
+        # _ private: الاتصال المستعار حالياً لكل خيط (للاستدعاءات المتداخلة)
+        self._local = threading.local()
+        self._pool_hits = 0
+        self._pool_misses = 0
+        # إحصائيات الاستعلامات (None = القياس معطل)
+        if instrument is None:
+            instrument = os.environ.get(INSTRUMENT_ENV_VAR, "") not in ("", "0")
+        self.query_stats: Optional[QueryStats] = QueryStats() if instrument else None
         self._ensure_database_exists()
     
     def get_connection(self) -> sqlite3.Connection:
-        """الحصول على اتصال بقاعدة البيانات مع تفعيل المفاتيح الخارجية."""
-        conn = sqlite3.connect(self.db_name)
+        """
+        الحصول على اتصال جديد غير مُدار (للتوافق مع الكود القديم).
+        يجب على المستدعي إغلاقه بنفسه؛ الكود الجديد يستخدم connection().
+        """
+        return self._open_connection()
+    
+    # _ private method
+    def _open_connection(self, instrument: bool = True) -> sqlite3.Connection:
+        """فتح اتصال فعلي جديد مع تفعيل المفاتيح الخارجية وتطبيق ملف الأداء (instrument=False: بدون قياس)."""
+        # check_same_thread=False: الاتصال قد يُعاد استخدامه من خيط آخر بعد إرجاعه للمجمع،
+        # لكنه لا يُستخدم أبداً من خيطين في نفس الوقت
+        if instrument and self.query_stats is not None:
+            conn = sqlite3.connect(self.db_name, timeout=self.busy_timeout, check_same_thread=False,
+                                   factory=InstrumentedConnection)
+            conn.query_stats = self.query_stats
+        else:
+            conn = sqlite3.connect(self.db_name, timeout=self.busy_timeout, check_same_thread=False,
+                                   factory=PooledConnection)
         conn.execute("PRAGMA foreign_keys = ON;")
+        for pragma, value in self._pragmas.items():
+            conn.execute(f"PRAGMA {pragma} = {value};")
         return conn
     
-    def _ensure_database_exists(self):
-        """التأكد من وجود قاعدة البيانات وإنشاء الجداول إذا لزم الأمر."""
-        self.create_database()
-    
-    def create_database(self):
-        """
-        إنشاء جميع الجداول المستخدمة في النظام إذا لم تكن موجودة
-        وظيفته: إنشاء البنية الأساسية لقاعدة البيانات
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
         """
-        # التحقق من وجود max_capacity وإزالته إذا لزم الأمر
-        # يجب القيام بذلك في اتصال منفصل مع تعطيل المفاتيح الخارجية
-        temp_conn = sqlite3.connect(self.db_name)
-        temp_cur = temp_conn.cursor()
+        استعارة اتصال من المجمع لمدة كتلة with.
         
-        # تعطيل فحص المفاتيح الخارجية أولاً (يجب أن يكون قبل أي عمليات)
-        temp_cur.execute("PRAGMA foreign_keys = OFF;")
+        - كل خيط يحصل على اتصال واحد؛ الاستدعاءات المتداخلة في نفس الخيط تعيد استخدامه.
+        - الكتلة المتداخلة لا تحفظ ولا تتراجع عن معاملة فتحتها كتلة خارجية (انظر PooledConnection).
+        - عند الخروج يُعاد الاتصال للمجمع (مع التراجع عن أي معاملة لم تُحفظ).
+        """
+        local = self._local
+        conn = getattr(local, "connection", None)
+        if conn is not None:
+            # استدعاء متداخل في نفس الخيط - نفس الاتصال بدون استعارة جديدة
+            local.depth += 1
+            guarded = conn.guard_outer_transaction
+            conn.guard_outer_transaction = guarded or conn.in_transaction
+            try:
+                yield conn
+            finally:
+                conn.guard_outer_transaction = guarded
+                local.depth -= 1
+            return
         
+        conn = self._acquire_connection()
+        local.connection = conn
+        local.depth = 1
         try:
-            temp_cur.execute("PRAGMA table_info(courses);")
-            columns = [row[1] for row in temp_cur.fetchall()]
-            
-            if "max_capacity" in columns:
-                # حفظ البيانات
-                temp_cur.execute("""
-                    CREATE TABLE IF NOT EXISTS courses_backup (
-                        course_code   TEXT PRIMARY KEY,
-                        name          TEXT NOT NULL,
-                        credits       INTEGER NOT NULL CHECK (credits > 0),
-                        lecture_hours INTEGER NOT NULL CHECK (lecture_hours >= 0),
-                        lab_hours     INTEGER DEFAULT 0 CHECK (lab_hours >= 0)
-                    );
-                """)
-                temp_cur.execute("""
-                    INSERT OR IGNORE INTO courses_backup (course_code, name, credits, lecture_hours, lab_hours)
-                    SELECT course_code, name, credits, lecture_hours, COALESCE(lab_hours, 0)
-                    FROM courses;
-                """)
-                
-                # حذف الجدول القديم
-                temp_cur.execute("DROP TABLE IF EXISTS courses;")
-                
-                # إنشاء الجدول الجديد
-                temp_cur.execute("""
-                    CREATE TABLE courses (
-                        course_code   TEXT PRIMARY KEY,
-                        name          TEXT NOT NULL,
-                        credits       INTEGER NOT NULL CHECK (credits > 0),
-                        lecture_hours INTEGER NOT NULL CHECK (lecture_hours >= 0),
-                        lab_hours     INTEGER DEFAULT 0 CHECK (lab_hours >= 0)
-                    );
-                """)
-                
-                # استعادة البيانات
-                temp_cur.execute("""
-                    INSERT OR IGNORE INTO courses (course_code, name, credits, lecture_hours, lab_hours)
-                    SELECT course_code, name, credits, lecture_hours, lab_hours
-                    FROM courses_backup;
-                """)
-                
-                # حذف النسخة الاحتياطية
-                temp_cur.execute("DROP TABLE IF EXISTS courses_backup;")
-                
-                temp_conn.commit()
-                
-                # إعادة تفعيل المفاتيح الخارجية
-                temp_cur.execute("PRAGMA foreign_keys = ON;")
-        except Exception:
-            temp_conn.rollback()
+            yield conn
         finally:
-            temp_conn.close()
+            local.connection = None
+            local.depth = 0
+            self._release_connection(conn)
+    
+    # _ private method
+    def _acquire_connection(self) -> sqlite3.Connection:
+        """أخذ اتصال خامل من المجمع أو فتح اتصال جديد."""
+        with self._pool_lock:
+            if self._idle_connections:
+                self._pool_hits += 1
+                return self._idle_connections.pop()
+            self._pool_misses += 1
+        return self._open_connection()
+    
+    # _ private method
+    def _release_connection(self, conn: sqlite3.Connection):
+        """إرجاع الاتصال للمجمع، أو إغلاقه إذا كان المجمع ممتلئاً."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            return
+        with self._pool_lock:
+            if len(self._idle_connections) < self.pool_size:
+                self._idle_connections.append(conn)
+                return
+        conn.close()
+    
+    def get_pool_stats(self) -> Dict[str, float]:
+        """إحصائيات المجمع: عدد مرات إعادة الاستخدام (hits) وفتح اتصال جديد (misses)."""
+        with self._pool_lock:
+            total = self._pool_hits + self._pool_misses
+            return {
+                "hits": self._pool_hits,
+                "misses": self._pool_misses,
+                "idle": len(self._idle_connections),
+                "pool_size": self.pool_size,
+                "hit_ratio": (self._pool_hits / total) if total else 0.0,
+            }
+    
+    def enable_instrumentation(self) -> QueryStats:
+        """تفعيل القياس أثناء التشغيل (الاتصالات الخاملة غير المقاسة تُغلق لتُفتح من جديد)."""
+        if self.query_stats is None:
+            self.query_stats = QueryStats()
+            self.close_all()
+        return self.query_stats
+    
+    def explain(self, sql: str, params=None) -> List[str]:
+        """خطة تنفيذ جملة (EXPLAIN QUERY PLAN) مع معاملات فارغة بنفس الشكل."""
+        if isinstance(params, dict):
+            params = {name: None for name in params}
+        elif params:
+            params = (None,) * len(params)
+        else:
+            params = ()
+        with self.connection() as conn:
+            rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        return [row[3] for row in rows]
+    
+    def slowest_statements_report(self, limit: int = 10) -> str:
+        """تقرير نصي بأبطأ الجمل مع خطط تنفيذها."""
+        if self.query_stats is None:
+            return "Query instrumentation is disabled (use instrument=True or ODUS_DB_INSTRUMENT=1)"
+        lines = []
+        for sql, stats in self.query_stats.slowest(limit):
+            lines.append(
+                f"{stats['total_ms']:9.2f}ms total  {stats['calls']:6d} calls  "
+                f"p50 {stats['p50_ms']:.3f}  p95 {stats['p95_ms']:.3f}  p99 {stats['p99_ms']:.3f}ms  "
+                f"{stats['rows']} rows"
+            )
+            lines.append(f"    {sql}")
+            example_sql, example_params = self.query_stats.example(sql)
+            try:
+                for detail in self.explain(example_sql, example_params):
+                    lines.append(f"      -> {detail}")
+            except sqlite3.Error:
+                pass  # جمل لا تقبل EXPLAIN (مثل BEGIN/PRAGMA)
+        return "\n".join(lines)
+    
+    def close_all(self):
+        """إغلاق جميع الاتصالات الخاملة في المجمع."""
+        with self._pool_lock:
+            idle, self._idle_connections = self._idle_connections, []
+        for conn in idle:
+            conn.close()
+    
+    def _ensure_database_exists(self):
+        """التأكد من أن مخطط قاعدة البيانات محدث (قراءة PRAGMA واحدة إذا لم يكن هناك ترحيل معلق)."""
+        self.migrate()
+    
+    def get_schema_version(self) -> int:
+        """رقم نسخة المخطط المخزن في PRAGMA user_version."""
+        with self.connection() as conn:
+            return conn.execute("PRAGMA user_version;").fetchone()[0]
+    
+    def migrate(self) -> int:
+        """
+        تطبيق الترحيلات (Migrations) المعلقة بالترتيب.
         
-        # الآن نستخدم الاتصال العادي لإنشاء بقية الجداول
-        conn = self.get_connection()
-        cur = conn.cursor()
-
-        # -----------------------------
-        # 1) جداول المقررات والمناهج
-        # -----------------------------
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS courses (
-                course_code   TEXT PRIMARY KEY,
-                name          TEXT NOT NULL,
-                credits       INTEGER NOT NULL CHECK (credits > 0),
-                lecture_hours INTEGER NOT NULL CHECK (lecture_hours >= 0),
-                lab_hours     INTEGER DEFAULT 0 CHECK (lab_hours >= 0)
-            );
-            """
-        )
+        الوظيفة:
+            يقرأ PRAGMA user_version ويطبق فقط الخطوات الأحدث من MIGRATIONS،
+            كل خطوة في معاملة مستقلة تحدّث user_version عند نجاحها.
+            قاعدة البيانات المحدثة تكلف قراءة PRAGMA واحدة فقط.
         
-        # إضافة عمود lab_hours إذا لم يكن موجوداً (للتوافق مع قواعد البيانات القديمة)
-        cur.execute("PRAGMA table_info(courses);")
-        columns = [row[1] for row in cur.fetchall()]
-        if "lab_hours" not in columns:
-            cur.execute("ALTER TABLE courses ADD COLUMN lab_hours INTEGER DEFAULT 0 CHECK (lab_hours >= 0);")
+        Returns:
+            رقم نسخة المخطط بعد الترحيل
+        """
+        version = self.get_schema_version()
+        if version >= SCHEMA_VERSION:
+            return version
         
-        # ملاحظة: max_capacity لم يعد موجوداً في المقررات، السعة متاحة فقط في الشعب (Section)
+        # اتصال منفصل مع تعطيل المفاتيح الخارجية (لازم لإعادة بناء الجداول)
+        # ملاحظة: PRAGMA foreign_keys لا يمكن تغييره داخل معاملة
+        # جمل الترحيل لمرة واحدة لا تدخل إحصائيات الحمل (ولا تقرير explain_query_plans)
+        conn = self._open_connection(instrument=False)
+        conn.execute("PRAGMA foreign_keys = OFF;")
+        # الترحيل يكتب دائماً حتى مع ملف read-only-report
+        conn.execute("PRAGMA query_only = OFF;")
+        try:
+            for step_version, description, step in MIGRATIONS:
+                cur = conn.cursor()
+                cur.execute("BEGIN IMMEDIATE;")
+                try:
+                    # إعادة القراءة داخل القفل: عملية أخرى قد تكون طبقت الخطوة بالفعل
+                    cur.execute("PRAGMA user_version;")
+                    version = cur.fetchone()[0]
+                    if step_version <= version:
+                        conn.rollback()
+                        continue
+                    step(cur)
+                    cur.execute(f"PRAGMA user_version = {int(step_version)};")
+                    conn.commit()
+                    version = step_version
+                except Exception:
+                    conn.rollback()
+                    raise
+        finally:
+            conn.close()
+            # الاتصالات الخاملة تحتفظ بالمخطط القديم (EXPLAIN لا يعيد تحميله فيتجاهل الفهارس الجديدة)
+            self.close_all()
+        return version
+    
+    def create_database(self):
+        """
+        إنشاء جميع الجداول المستخدمة في النظام إذا لم تكن موجودة (للتوافق مع الكود القديم)
+        وظيفته: تطبيق جميع الترحيلات المعلقة عبر migrate()
+        """
+        self.migrate()
 
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS prerequisites (
-                course_code TEXT NOT NULL,
-                prereq_code TEXT NOT NULL,
-                PRIMARY KEY (course_code, prereq_code),
-                FOREIGN KEY (course_code) REFERENCES courses(course_code) ON DELETE CASCADE,
-                FOREIGN KEY (prereq_code) REFERENCES courses(course_code) ON DELETE RESTRICT
-            );
-            """
-        )
 
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS program_plans (
-                program     TEXT NOT NULL,
-                level       INTEGER NOT NULL,
-                course_code TEXT NOT NULL,
-                PRIMARY KEY (program, level, course_code),
-                FOREIGN KEY (course_code) REFERENCES courses(course_code) ON DELETE RESTRICT
-            );
-            """
-        )
+# ============================================================================
+# SCHEMA MIGRATIONS (ترحيلات مخطط قاعدة البيانات)
+# ============================================================================
+# كل ترحيل دالة تستقبل cursor داخل معاملة مفتوحة (المفاتيح الخارجية معطلة).
+# الترحيلات تفحص البنية الحالية لأن قواعد البيانات القديمة (user_version = 0)
+# قد تكون بأي شكل سابق.
 
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS sections (
-                section_id         TEXT PRIMARY KEY,
-                course_code        TEXT NOT NULL,
-                instructor         TEXT NOT NULL,
-                start_time         INTEGER NOT NULL,
-                end_time           INTEGER NOT NULL,
-                hall               TEXT NOT NULL,
-                max_capacity       INTEGER NOT NULL CHECK (max_capacity > 0),
-                current_enrollment INTEGER NOT NULL DEFAULT 0 CHECK (current_enrollment >= 0),
-                days               TEXT DEFAULT '',
-                FOREIGN KEY (course_code) REFERENCES courses(course_code) ON DELETE CASCADE
-            );
-            """
-        )
-        
-        # إضافة عمود days إذا لم يكن موجوداً (للتوافق مع قواعد البيانات القديمة)
-        cur.execute("PRAGMA table_info(sections);")
-        columns = [row[1] for row in cur.fetchall()]
-        if "days" not in columns:
-            cur.execute("ALTER TABLE sections ADD COLUMN days TEXT DEFAULT '';")
+def _table_columns(cur: sqlite3.Cursor, table: str) -> List[str]:
+    """أسماء أعمدة جدول (قائمة فارغة إذا لم يكن الجدول موجوداً)."""
+    cur.execute(f"PRAGMA table_info({table});")
+    return [row[1] for row in cur.fetchall()]
 
-        # جدول أعضاء هيئة التدريس (Doctors/Faculty)
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS doctors (
-                doctor_id          TEXT PRIMARY KEY,
-                name               TEXT NOT NULL,
-                email              TEXT UNIQUE NOT NULL,
-                preferred_courses  TEXT DEFAULT '',
-                time_availability  TEXT DEFAULT ''
-            );
-            """
-        )
 
-        # جدول تعيين المقررات لأعضاء هيئة التدريس
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS doctor_assignments (
-                assignment_id      INTEGER PRIMARY KEY AUTOINCREMENT,
-                doctor_id          TEXT NOT NULL,
-                course_code        TEXT NOT NULL,
-                section_id         TEXT,
-                FOREIGN KEY (doctor_id) REFERENCES doctors(doctor_id) ON DELETE CASCADE,
-                FOREIGN KEY (course_code) REFERENCES courses(course_code) ON DELETE CASCADE,
-                FOREIGN KEY (section_id) REFERENCES sections(section_id) ON DELETE SET NULL
-            );
-            """
-        )
+def _migration_001_base_schema(cur: sqlite3.Cursor):
+    """إنشاء البنية الأساسية لجميع الجداول."""
+    # -----------------------------
+    # 1) جداول المقررات والمناهج
+    # -----------------------------
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS courses (
+            course_code   TEXT PRIMARY KEY,
+            name          TEXT NOT NULL,
+            credits       INTEGER NOT NULL CHECK (credits > 0),
+            lecture_hours INTEGER NOT NULL CHECK (lecture_hours >= 0),
+            lab_hours     INTEGER DEFAULT 0 CHECK (lab_hours >= 0)
+        );
+        """
+    )
 
-        # ------------------------------------------
-        # 2) جداول بيانات الطلاب والسجلات الأكاديمية
-        # ------------------------------------------
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS students (
-                student_id TEXT PRIMARY KEY,
-                name       TEXT NOT NULL,
-                email      TEXT NOT NULL,
-                program    TEXT NOT NULL,
-                level      INTEGER NOT NULL,
-                CHECK (program IN ('Computer', 'Comm', 'Power', 'Biomedical'))
-            );
-            """
-        )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS prerequisites (
+            course_code TEXT NOT NULL,
+            prereq_code TEXT NOT NULL,
+            PRIMARY KEY (course_code, prereq_code),
+            FOREIGN KEY (course_code) REFERENCES courses(course_code) ON DELETE CASCADE,
+            FOREIGN KEY (prereq_code) REFERENCES courses(course_code) ON DELETE RESTRICT
+        );
+        """
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS program_plans (
+            program     TEXT NOT NULL,
+            level       INTEGER NOT NULL,
+            course_code TEXT NOT NULL,
+            PRIMARY KEY (program, level, course_code),
+            FOREIGN KEY (course_code) REFERENCES courses(course_code) ON DELETE RESTRICT
+        );
+        """
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sections (
+            section_id         TEXT PRIMARY KEY,
+            course_code        TEXT NOT NULL,
+            instructor         TEXT NOT NULL,
+            start_time         INTEGER NOT NULL,
+            end_time           INTEGER NOT NULL,
+            hall               TEXT NOT NULL,
+            max_capacity       INTEGER NOT NULL CHECK (max_capacity > 0),
+            current_enrollment INTEGER NOT NULL DEFAULT 0 CHECK (current_enrollment >= 0),
+            days               TEXT DEFAULT '',
+            FOREIGN KEY (course_code) REFERENCES courses(course_code) ON DELETE CASCADE
+        );
+        """
+    )
+
+    # جدول أعضاء هيئة التدريس (Doctors/Faculty)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS doctors (
+            doctor_id          TEXT PRIMARY KEY,
+            name               TEXT NOT NULL,
+            email              TEXT UNIQUE NOT NULL,
+            preferred_courses  TEXT DEFAULT '',
+            time_availability  TEXT DEFAULT ''
+        );
+        """
+    )
+
+    # جدول تعيين المقررات لأعضاء هيئة التدريس
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS doctor_assignments (
+            assignment_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+            doctor_id          TEXT NOT NULL,
+            course_code        TEXT NOT NULL,
+            section_id         TEXT,
+            FOREIGN KEY (doctor_id) REFERENCES doctors(doctor_id) ON DELETE CASCADE,
+            FOREIGN KEY (course_code) REFERENCES courses(course_code) ON DELETE CASCADE,
+            FOREIGN KEY (section_id) REFERENCES sections(section_id) ON DELETE SET NULL
+        );
+        """
+    )
 
+    # ------------------------------------------
+    # 2) جداول بيانات الطلاب والسجلات الأكاديمية
+    # ------------------------------------------
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS students (
+            student_id TEXT PRIMARY KEY,
+            name       TEXT NOT NULL,
+            email      TEXT NOT NULL,
+            program    TEXT NOT NULL,
+            level      INTEGER NOT NULL,
+            CHECK (program IN ('Computer', 'Comm', 'Power', 'Biomedical'))
+        );
+        """
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS transcripts (
+            student_id TEXT NOT NULL,
+            course_code TEXT NOT NULL,
+            PRIMARY KEY (student_id, course_code),
+            FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE CASCADE,
+            FOREIGN KEY (course_code) REFERENCES courses(course_code) ON DELETE RESTRICT
+        );
+        """
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS registrations (
+            student_id TEXT NOT NULL,
+            section_id TEXT NOT NULL,
+            registration_time TEXT NOT NULL,
+            PRIMARY KEY (student_id, section_id),
+            FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE CASCADE,
+            FOREIGN KEY (section_id) REFERENCES sections(section_id) ON DELETE CASCADE
+        );
+        """
+    )
+
+    # ------------------------------------------
+    # 3) جداول المستخدمين والجلسات
+    # ------------------------------------------
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id       INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id    TEXT UNIQUE,
+            email         TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role          TEXT NOT NULL CHECK (role IN ('student', 'admin')),
+            display_name  TEXT,
+            mobile        TEXT
+        );
+        """
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            user_id    INTEGER,
+            login_time TEXT,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        );
+        """
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS access_logs (
+            log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            action TEXT NOT NULL,
+            success INTEGER NOT NULL,
+            timestamp TEXT NOT NULL,
+            ip_address TEXT
+        );
+        """
+    )
+
+
+def _migration_002_add_course_lab_hours(cur: sqlite3.Cursor):
+    """إضافة عمود lab_hours للمقررات (للتوافق مع قواعد البيانات القديمة)."""
+    if "lab_hours" not in _table_columns(cur, "courses"):
+        cur.execute("ALTER TABLE courses ADD COLUMN lab_hours INTEGER DEFAULT 0 CHECK (lab_hours >= 0);")
+
+
+def _migration_003_drop_course_max_capacity(cur: sqlite3.Cursor):
+    """
+    إزالة max_capacity من المقررات عبر إعادة بناء الجدول (courses_backup).
+    ملاحظة: السعة متاحة فقط في الشعب (Section).
+    """
+    if "max_capacity" not in _table_columns(cur, "courses"):
+        return
+    
+    # حفظ البيانات
+    cur.execute("DROP TABLE IF EXISTS courses_backup;")
+    cur.execute("""
+        CREATE TABLE courses_backup (
+            course_code   TEXT PRIMARY KEY,
+            name          TEXT NOT NULL,
+            credits       INTEGER NOT NULL CHECK (credits > 0),
+            lecture_hours INTEGER NOT NULL CHECK (lecture_hours >= 0),
+            lab_hours     INTEGER DEFAULT 0 CHECK (lab_hours >= 0)
+        );
+    """)
+    cur.execute("""
+        INSERT OR IGNORE INTO courses_backup (course_code, name, credits, lecture_hours, lab_hours)
+        SELECT course_code, name, credits, lecture_hours, COALESCE(lab_hours, 0)
+        FROM courses;
+    """)
+    
+    # حذف الجدول القديم وإنشاء الجدول الجديد
+    cur.execute("DROP TABLE courses;")
+    cur.execute("""
+        CREATE TABLE courses (
+            course_code   TEXT PRIMARY KEY,
+            name          TEXT NOT NULL,
+            credits       INTEGER NOT NULL CHECK (credits > 0),
+            lecture_hours INTEGER NOT NULL CHECK (lecture_hours >= 0),
+            lab_hours     INTEGER DEFAULT 0 CHECK (lab_hours >= 0)
+        );
+    """)
+    
+    # استعادة البيانات وحذف النسخة الاحتياطية
+    cur.execute("""
+        INSERT OR IGNORE INTO courses (course_code, name, credits, lecture_hours, lab_hours)
+        SELECT course_code, name, credits, lecture_hours, lab_hours
+        FROM courses_backup;
+    """)
+    cur.execute("DROP TABLE courses_backup;")
+
+
+def _migration_004_add_section_days(cur: sqlite3.Cursor):
+    """إضافة عمود days للشعب (للتوافق مع قواعد البيانات القديمة)."""
+    if "days" not in _table_columns(cur, "sections"):
+        cur.execute("ALTER TABLE sections ADD COLUMN days TEXT DEFAULT '';")
+
+
+def _migration_005_registrations_by_section(cur: sqlite3.Cursor):
+    """
+    تحويل جدول التسجيلات القديم إلى التسجيل حسب الشعبة (section_id).
+    البيانات القديمة تُحفظ في registrations_backup لأنها لا تحتوي على الشعبة.
+    """
+    columns = _table_columns(cur, "registrations")
+    if "section_id" not in columns:
+        # Backup old data if any
+        cur.execute("DROP TABLE IF EXISTS registrations_backup;")
+        cur.execute("CREATE TABLE registrations_backup AS SELECT * FROM registrations;")
+        
+        # Drop and recreate with correct structure
+        cur.execute("DROP TABLE registrations;")
         cur.execute(
             """
-            CREATE TABLE IF NOT EXISTS transcripts (
+            CREATE TABLE registrations (
                 student_id TEXT NOT NULL,
-                course_code TEXT NOT NULL,
-                PRIMARY KEY (student_id, course_code),
+                section_id TEXT NOT NULL,
+                registration_time TEXT NOT NULL,
+                PRIMARY KEY (student_id, section_id),
                 FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE CASCADE,
-                FOREIGN KEY (course_code) REFERENCES courses(course_code) ON DELETE RESTRICT
+                FOREIGN KEY (section_id) REFERENCES sections(section_id) ON DELETE CASCADE
             );
             """
         )
+    elif "registration_time" not in columns:
+        # Ensure registration_time column exists
+        cur.execute("ALTER TABLE registrations ADD COLUMN registration_time TEXT DEFAULT '';")
+
+
+# فهارس الترحيل 006: (اسم الفهرس، الجدول، الأعمدة) — مجمدة مع الترحيل، لا تُعدَّل
+# الأعمدة الإضافية بعد عمود البحث تجعل الفهرس "مغطياً" (Covering) للاستعلام أو للترتيب
+_MIGRATION_006_INDEXES = (
+    # fetch_courses_with_sections: ORDER BY course_code, section_id + حذف المقرر (CASCADE)
+    ("idx_sections_course", "sections", ("course_code", "section_id")),
+    # get_course_program_plans: WHERE course_code ORDER BY program, level + فحص RESTRICT عند حذف مقرر
+    ("idx_program_plans_course", "program_plans", ("course_code", "program", "level")),
+    # فحص RESTRICT عند حذف مقرر مستخدم كمتطلب
+    ("idx_prerequisites_prereq", "prerequisites", ("prereq_code",)),
+    # فحص RESTRICT عند حذف مقرر موجود في سجلات الطلاب
+    ("idx_transcripts_course", "transcripts", ("course_code",)),
+    # التسجيلات حسب الشعبة (السعة، حذف الشعبة CASCADE)
+    ("idx_registrations_section", "registrations", ("section_id",)),
+    # get_student_registrations: WHERE student_id ORDER BY registration_time (مغطٍّ)
+    ("idx_registrations_student_time", "registrations", ("student_id", "registration_time", "section_id")),
+    # get_doctor_assignments: WHERE doctor_id ORDER BY course_code
+    ("idx_doctor_assignments_doctor", "doctor_assignments", ("doctor_id", "course_code")),
+    # حذف شعبة (ON DELETE SET NULL)
+    ("idx_doctor_assignments_section", "doctor_assignments", ("section_id",)),
+    # get_all_doctors: ORDER BY name
+    ("idx_doctors_name", "doctors", ("name",)),
+)
+
+
+def _create_indexes(cur: sqlite3.Cursor, indexes):
+    for index_name, table, columns in indexes:
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({', '.join(columns)});")
+    # تحديث إحصائيات المخطِّط (Query Planner) للجداول المفهرسة
+    cur.execute("ANALYZE;")
+
+
+def _migration_006_secondary_indexes(cur: sqlite3.Cursor):
+    """إنشاء الفهارس الثانوية والمغطية لمسارات البحث المتكررة."""
+    _create_indexes(cur, _MIGRATION_006_INDEXES)
+
+
+def _migration_007_student_backfilled_level(cur: sqlite3.Cursor):
+    """
+    students.backfilled_level: السجل الأكاديمي يحتوي مقررات الخطة لجميع المستويات الأقل منه.
+    (0 = لم تتم التعبئة بعد؛ يُعاد إلى 0 عند إضافة مقررات إلى خطط البرامج)
+    """
+    if "backfilled_level" not in _table_columns(cur, "students"):
+        cur.execute("ALTER TABLE students ADD COLUMN backfilled_level INTEGER NOT NULL DEFAULT 0;")
 
-        # Create registrations table with migration support
-        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='registrations';")
-        table_exists = cur.fetchone() is not None
-        
-        if table_exists:
-            # Table exists - check columns for migration
-            cur.execute("PRAGMA table_info(registrations);")
-            columns = [row[1] for row in cur.fetchall()]
-            
-            # If section_id doesn't exist, recreate table with correct structure
-            if "section_id" not in columns:
-                # Backup old data if any
-                cur.execute("DROP TABLE IF EXISTS registrations_backup;")
-                cur.execute("CREATE TABLE registrations_backup AS SELECT * FROM registrations;")
-                
-                # Drop and recreate with correct structure
-                cur.execute("DROP TABLE registrations;")
-                cur.execute(
-                    """
-                    CREATE TABLE registrations (
-                        student_id TEXT NOT NULL,
-                        section_id TEXT NOT NULL,
-                        registration_time TEXT NOT NULL,
-                        PRIMARY KEY (student_id, section_id),
-                        FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE CASCADE,
-                        FOREIGN KEY (section_id) REFERENCES sections(section_id) ON DELETE CASCADE
-                    );
-                    """
-                )
-            else:
-                # Ensure registration_time column exists
-                if "registration_time" not in columns:
-                    cur.execute("ALTER TABLE registrations ADD COLUMN registration_time TEXT DEFAULT '';")
-        else:
-            # Create table if it doesn't exist
-            cur.execute(
-                """
-                CREATE TABLE registrations (
-                    student_id TEXT NOT NULL,
-                    section_id TEXT NOT NULL,
-                    registration_time TEXT NOT NULL,
-                    PRIMARY KEY (student_id, section_id),
-                    FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE CASCADE,
-                    FOREIGN KEY (section_id) REFERENCES sections(section_id) ON DELETE CASCADE
-                );
-                """
-            )
 
-        # ------------------------------------------
-        # 3) جداول المستخدمين والجلسات
-        # ------------------------------------------
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                user_id       INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id    TEXT UNIQUE,
-                email         TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                role          TEXT NOT NULL CHECK (role IN ('student', 'admin')),
-                display_name  TEXT,
-                mobile        TEXT
-            );
-            """
-        )
+def _migration_008_session_expiry(cur: sqlite3.Cursor):
+    """
+    sessions.last_activity / sessions.expires_at لانتهاء صلاحية الجلسات وحذفها دفعة واحدة.
+    الجلسات القديمة لا تُستعاد بعد إعادة التشغيل (المخزن في الذاكرة)، لذا تُعتبر منتهية.
+    """
+    columns = _table_columns(cur, "sessions")
+    if "last_activity" not in columns:
+        cur.execute("ALTER TABLE sessions ADD COLUMN last_activity TEXT;")
+    if "expires_at" not in columns:
+        cur.execute("ALTER TABLE sessions ADD COLUMN expires_at TEXT;")
+    cur.execute(
+        "UPDATE sessions SET last_activity = COALESCE(last_activity, login_time), "
+        "expires_at = COALESCE(expires_at, login_time, '')"
+    )
+    # حذف الجلسات المنتهية: WHERE expires_at < ?
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at);")
 
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS sessions (
-                session_id TEXT PRIMARY KEY,
-                user_id    INTEGER,
-                login_time TEXT,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            );
-            """
-        )
 
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS access_logs (
-                log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT,
-                action TEXT NOT NULL,
-                success INTEGER NOT NULL,
-                timestamp TEXT NOT NULL,
-                ip_address TEXT
-            );
-            """
-        )
+def _migration_009_id_sequences(cur: sqlite3.Cursor):
+    """
+    id_sequences: القيمة التالية لكل تسلسل معرفات (انظر IdAllocator).
+    الصف يُنشأ عند أول حجز، لذا لا حاجة لتعبئة مسبقة.
+    """
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS id_sequences (
+            name       TEXT PRIMARY KEY,
+            next_value INTEGER NOT NULL
+        );
+        """
+    )
 
-        conn.commit()
-        conn.close()
+
+_MIGRATION_010_INDEXES = (
+    # إعادة تعبئة السجلات بعد تغيير الخطط: WHERE program = ? AND level > ?
+    ("idx_students_program_level", "students", ("program", "level")),
+)
+
+
+def _migration_010_students_program_level_index(cur: sqlite3.Cursor):
+    """فهرس students (program, level) لإعادة التعبئة بعد تعديل خطط البرامج."""
+    _create_indexes(cur, _MIGRATION_010_INDEXES)
+
+
+_MIGRATION_011_INDEXES = (
+    # فحص CASCADE عند حذف مقرر (idx_doctor_assignments_doctor يبدأ بـ doctor_id)
+    ("idx_doctor_assignments_course", "doctor_assignments", ("course_code",)),
+    # فحص المفتاح الأجنبي عند حذف مستخدم (delete_student_record)
+    ("idx_sessions_user", "sessions", ("user_id",)),
+)
+
+
+def _migration_011_foreign_key_indexes(cur: sqlite3.Cursor):
+    """فهارس أعمدة المفاتيح الأجنبية التي كان حذف الصف الأب يمسح جدولها كاملاً."""
+    _create_indexes(cur, _MIGRATION_011_INDEXES)
+
+
+# قائمة الترحيلات المرتبة: (رقم النسخة، الوصف، الدالة)
+# لإضافة تغيير على المخطط: أضف دالة جديدة برقم أكبر في نهاية القائمة
+MIGRATIONS = [
+    (1, "base schema", _migration_001_base_schema),
+    (2, "courses.lab_hours", _migration_002_add_course_lab_hours),
+    (3, "drop courses.max_capacity", _migration_003_drop_course_max_capacity),
+    (4, "sections.days", _migration_004_add_section_days),
+    (5, "registrations by section", _migration_005_registrations_by_section),
+    (6, "secondary indexes", _migration_006_secondary_indexes),
+    (7, "students.backfilled_level", _migration_007_student_backfilled_level),
+    (8, "sessions expiry", _migration_008_session_expiry),
+    (9, "id_sequences", _migration_009_id_sequences),
+    (10, "students (program, level) index", _migration_010_students_program_level_index),
+    (11, "foreign key indexes", _migration_011_foreign_key_indexes),
+]
+
+# كل الفهارس الثانوية المُدارة (للقراءة فقط): لا تعدّلها — أضف فهرساً جديداً كترحيل جديد
+SECONDARY_INDEXES = [*_MIGRATION_006_INDEXES, *_MIGRATION_010_INDEXES, *_MIGRATION_011_INDEXES]
+
+# أحدث نسخة للمخطط
+SCHEMA_VERSION = MIGRATIONS[-1][0]
 
 
 # إنشاء مثيل عام من DatabaseManager
 _db_manager = DatabaseManager()
 
 
+def connection():
+    """استعارة اتصال من مجمع الاتصالات (Context Manager): with connection() as conn: ..."""
+    return _db_manager.connection()
+
+
+def _pooled(func):
+    """
+    استعارة اتصال من المجمع طوال استدعاء الدالة (مثل with connection() حول جسمها كاملاً)؛
+    الدالة تقرأ الاتصال بـ _current_connection(). الاستدعاءات المتداخلة تشارك نفس الاتصال.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _db_manager.connection():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _current_connection() -> sqlite3.Connection:
+    """الاتصال المستعار للخيط الحالي (داخل دالة @_pooled أو كتلة connection())."""
+    conn = getattr(_db_manager._local, "connection", None)
+    if conn is None:
+        raise RuntimeError("_current_connection() called outside a pooled connection")
+    return conn
+
+
+# جميع استعلامات هذه الوحدة: (الاسم، SQL، مسح الجدول مقصود)
+# تُملأ عند الاستيراد من ثوابت _SQL_* التي تنفذها الدوال نفسها (انظر explain_query_plans)
+QUERY_PLAN_CHECKS: List[Tuple[str, str, bool]] = []
+
+
+def _query(name: str, sql: str, allow_scan: bool = False) -> str:
+    """تسجيل جملة SQL في QUERY_PLAN_CHECKS وإرجاعها دون تغيير (تُعرّف بجانب الدالة المنفذة)."""
+    QUERY_PLAN_CHECKS.append((name, sql, allow_scan))
+    return sql
+
+
 # دالة مساعدة للتوافق مع الكود القديم
 def get_connection():
     """الحصول على اتصال بقاعدة البيانات (للتوافق مع الكود القديم)"""
     return _db_manager.get_connection()
 
 
+def get_pool_stats() -> Dict[str, float]:
+    """إحصائيات مجمع الاتصالات (hits/misses)."""
+    return _db_manager.get_pool_stats()
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    """إحصائيات الاستعلامات الحالية (None إذا كان القياس معطلاً)."""
+    return _db_manager.query_stats
+
+
+def enable_query_instrumentation() -> QueryStats:
+    """تفعيل قياس الاستعلامات لمدير قاعدة البيانات الحالي."""
+    return _db_manager.enable_instrumentation()
+
+
+def slowest_statements_report(limit: int = 10) -> str:
+    """أبطأ الجمل مع خطط تنفيذها."""
+    return _db_manager.slowest_statements_report(limit)
+
+
+def use_database(db_name: str, **manager_options) -> DatabaseManager:
+    """
+    توجيه جميع دوال هذه الوحدة إلى ملف قاعدة بيانات آخر (مثل قاعدة بيانات الاختبار/القياس).
+    
+    Args:
+        db_name: مسار ملف قاعدة البيانات (يُنشأ ويُرحَّل إذا لم يكن موجوداً)
+        manager_options: خيارات DatabaseManager (pool_size, profile, busy_timeout, instrument)
+    
+    Returns:
+        مدير قاعدة البيانات الجديد
+    """
+    global _db_manager
+    old_manager = _db_manager
+    _db_manager = DatabaseManager(db_name, **manager_options)
+    old_manager.close_all()
+    # الفهارس في الذاكرة المبنية من قاعدة البيانات السابقة أصبحت قديمة
+    _bump_program_plan_version()
+    _notify_student_changed(None)
+    # الكتل المحجوزة تخص جدول id_sequences في قاعدة البيانات السابقة
+    _id_allocator.reset()
+    return _db_manager
+
+
+# ============================================================================
+# Student Change Notifications
+# ============================================================================
+
+# مستمعون يُستدعون بعد كل كتابة تغيّر السجل الأكاديمي أو جدول طالب، حتى تتمكن
+# الذاكرات المؤقتة (مثل ذاكرة ملفات الطلاب في registration_system) من الإبطال.
+# يُمرَّر student_id، أو None عندما يتأثر جميع الطلاب.
+_student_change_listeners: List[Callable[[Optional[str]], None]] = []
+
+
+def add_student_change_listener(listener: Callable[[Optional[str]], None]):
+    """تسجيل دالة تُستدعى بـ student_id (أو None للجميع) بعد كل تغيير على بيانات طالب."""
+    if listener not in _student_change_listeners:
+        _student_change_listeners.append(listener)
+
+
+def remove_student_change_listener(listener: Callable[[Optional[str]], None]):
+    """إلغاء تسجيل مستمع سبق تسجيله."""
+    if listener in _student_change_listeners:
+        _student_change_listeners.remove(listener)
+
+
+def _notify_student_changed(student_id: Optional[str]):
+    for listener in list(_student_change_listeners):
+        listener(student_id)
+
+
 # ============================================================================
 # Student Management Functions
 # ============================================================================
 
+_SQL_STUDENT_EXISTS = _query("add_student.duplicate", "SELECT student_id FROM students WHERE student_id = ?")
+_SQL_INSERT_STUDENT = _query("add_student.insert", """
+    INSERT INTO students (student_id, name, email, program, level)
+    VALUES (?, ?, ?, ?, ?)
+""")
+
+
+@_pooled
 def add_student(student_id: str, name: str, email: str, program: str, level: int) -> str:
     """Insert a new student after simple validation."""
     # تحويل 'Communications' إلى 'Comm' للتوافق مع قاعدة البيانات
@@ -375,113 +1065,275 @@ def add_student(student_id: str, name: str, email: str, program: str, level: int
     if program not in ALLOWED_PROGRAMS:
         return "❌ Please select a valid program."
 
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
 
     # check duplicate ID
-    cur.execute("SELECT student_id FROM students WHERE student_id = ?", (student_id,))
+    cur.execute(_SQL_STUDENT_EXISTS, (student_id,))
     if cur.fetchone():
-        conn.close()
         return "❌ Student ID already exists."
 
-    cur.execute(
-        """
-        INSERT INTO students (student_id, name, email, program, level)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (student_id, name, email, program, level),
-    )
+    cur.execute(_SQL_INSERT_STUDENT, (student_id, name, email, program, level))
 
     conn.commit()
-    conn.close()
     return "✅ Student registered successfully!"
 
 
+_SQL_GET_TRANSCRIPT = _query("get_transcript", """
+    SELECT course_code
+    FROM transcripts
+    WHERE student_id = ?
+""")
+
+
+@_pooled
 def get_transcript(student_id: str):
     """Return transcript rows for a given student_id as a list of tuples.
     Returns: list of tuples (course_code,)
     """
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
 
-    cur.execute(
-        """
-        SELECT course_code
-        FROM transcripts
-        WHERE student_id = ?
-        """,
-        (student_id,),
-    )
+    cur.execute(_SQL_GET_TRANSCRIPT, (student_id,))
+
+    return cur.fetchall()
 
-    data = cur.fetchall()
-    conn.close()
-    return data
 
+_SQL_ADD_TRANSCRIPT_COURSE = _query("add_course_to_transcript", """
+    INSERT OR IGNORE INTO transcripts (student_id, course_code)
+    VALUES (?, ?)
+""")
 
+
+@_pooled
 def add_course_to_transcript(student_id: str, course_code: str):
     """Add a course to student transcript in database.
     If the course already exists, it will be ignored (due to PRIMARY KEY constraint).
     """
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
-    
     try:
-        cur.execute(
-            """
-            INSERT OR IGNORE INTO transcripts (student_id, course_code)
-            VALUES (?, ?)
-            """,
-            (student_id, course_code)
-        )
+        cur.execute(_SQL_ADD_TRANSCRIPT_COURSE, (student_id, course_code))
         conn.commit()
     except sqlite3.Error as e:
         conn.rollback()
         raise e
+    _notify_student_changed(student_id)
+
+
+_SQL_BACKFILL_STATE = _query(
+    "backfill_transcript.state",
+    "SELECT program, level, backfilled_level FROM students WHERE student_id = ?"
+)
+_SQL_BACKFILL_INSERT = _query("backfill_transcript.insert", """
+    INSERT OR IGNORE INTO transcripts (student_id, course_code)
+    SELECT ?, course_code
+    FROM program_plans
+    WHERE program = ? AND level < ?
+""")
+_SQL_BACKFILL_MARK = _query(
+    "backfill_transcript.mark",
+    "UPDATE students SET backfilled_level = ? WHERE student_id = ?"
+)
+
+
+@_pooled
+def backfill_transcript(student_id: str) -> int:
+    """
+    إضافة جميع مقررات خطة البرنامج للمستويات السابقة إلى السجل الأكاديمي للطالب.
+    
+    الوظيفة:
+        معاملة واحدة: INSERT OR IGNORE ... SELECT FROM program_plans WHERE level < ?
+        ثم تعيين backfilled_level = level حتى لا تتكرر العملية في تسجيلات الدخول التالية.
+    
+    Returns:
+        عدد المقررات المضافة (0 إذا كان السجل معبأً مسبقاً أو الطالب غير موجود)
+    """
+    conn = _current_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("BEGIN IMMEDIATE;")
+        cur.execute(_SQL_BACKFILL_STATE, (student_id,))
+        row = cur.fetchone()
+        if not row or row[2] >= row[1]:
+            conn.rollback()
+            return 0
+        program, level, _ = row
+        cur.execute(_SQL_BACKFILL_INSERT, (student_id, program, level))
+        inserted = cur.rowcount
+        cur.execute(_SQL_BACKFILL_MARK, (level, student_id))
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    if inserted:
+        _notify_student_changed(student_id)
+    return inserted
+
+
+def _student_profile_query(id_count: int) -> str:
+    """
+    استعلام واحد (UNION ALL موسوم) يعيد صف الطالب وسجله الأكاديمي وجدوله معاً:
+        (0, student_id, name, email, program, level, backfilled_level)
+        (1, student_id, course_code, NULL, ...)
+        (2, student_id, section_id, registration_time, ...)
+    كل فرع يستخدم فهرس student_id (المفتاح الأساسي / idx_registrations_student_time).
+    """
+    placeholders = ",".join("?" * id_count)
+    return f"""
+        SELECT 0, student_id, name, email, program, level, backfilled_level
+        FROM students WHERE student_id IN ({placeholders})
+        UNION ALL
+        SELECT 1, student_id, course_code, NULL, NULL, NULL, NULL
+        FROM transcripts WHERE student_id IN ({placeholders})
+        UNION ALL
+        SELECT 2, student_id, section_id, registration_time, NULL, NULL, NULL
+        FROM registrations WHERE student_id IN ({placeholders})
+    """
+
+
+# نفس الاستعلام لأي عدد من المعرفات (normalize يطوي قوائم IN)
+_query("load_student_profiles", _student_profile_query(3))
+
+# الاستعلام يربط كل معرف ثلاث مرات (فرع لكل جدول)
+PROFILE_CHUNK_SIZE = SQLITE_MAX_VARIABLES // 3
+
+
+def load_student_profile(student_id: str) -> Optional[Dict]:
+    """
+    تحميل ملف طالب كامل باستعلام واحد على اتصال واحد.
+    
+    Returns:
+        None إذا لم يوجد الطالب، وإلا قاموس:
+        {student_id, name, email, program, level, backfilled_level,
+         transcript: [course_code, ...],
+         schedule: [(section_id, registration_time), ...] مرتبة حسب وقت التسجيل}
+    """
+    return load_student_profiles([student_id]).get(student_id)
+
+
+@_pooled
+def load_student_profiles(student_ids: Iterable[str]) -> Dict[str, Dict]:
+    """
+    تحميل ملفات عدة طلاب دفعة واحدة (للتقارير الإدارية).
+    
+    الوظيفة:
+        استعلام واحد لكل دفعة من PROFILE_CHUNK_SIZE طالب، وجميع الدفعات داخل معاملة
+        قراءة واحدة حتى تكون النتيجة لقطة متسقة من قاعدة البيانات.
+    
+    Returns:
+        {student_id: profile} للطلاب الموجودين فقط (نفس شكل load_student_profile)
+    """
+    ids = list(dict.fromkeys(student_ids))
+    profiles: Dict[str, Dict] = {}
+    transcripts: Dict[str, List[str]] = {}
+    schedules: Dict[str, List[Tuple[str, str]]] = {}
+    
+    conn = _current_connection()
+    # معاملة القراءة تُفتح فقط عند الحاجة لأكثر من استعلام (الاستعلام الواحد لقطة بذاته)
+    own_transaction = len(ids) > PROFILE_CHUNK_SIZE and not conn.in_transaction
+    if own_transaction:
+        conn.execute("BEGIN")
+    try:
+        cur = conn.cursor()
+        for part in _chunked(ids, PROFILE_CHUNK_SIZE):
+            cur.execute(_student_profile_query(len(part)), part * 3)
+            for kind, sid, a, b, program, level, backfilled_level in cur.fetchall():
+                if kind == 0:
+                    profiles[sid] = {
+                        'student_id': sid,
+                        'name': a,
+                        'email': b,
+                        'program': program,
+                        'level': level,
+                        'backfilled_level': backfilled_level,
+                    }
+                elif kind == 1:
+                    transcripts.setdefault(sid, []).append(a)
+                else:
+                    schedules.setdefault(sid, []).append((a, b))
     finally:
-        conn.close()
+        if own_transaction:
+            conn.rollback()  # قراءة فقط: لا شيء للحفظ
+    
+    for sid, profile in profiles.items():
+        profile['transcript'] = transcripts.get(sid, [])
+        profile['schedule'] = sorted(schedules.get(sid, []), key=lambda item: item[1])
+    return profiles
+
+
+_SQL_LIST_STUDENTS = _query("list_students", """
+    SELECT s.student_id, s.name, s.email, s.program, s.level
+    FROM students s
+    ORDER BY s.student_id
+""", allow_scan=True)
 
 
+@_pooled
 def list_students():
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT s.student_id, s.name, s.email, s.program, s.level
-        FROM students s
-        ORDER BY s.student_id
-        """
-    )
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    cur.execute(_SQL_LIST_STUDENTS)
+    return cur.fetchall()
+
+
+_SQL_DELETE_STUDENT_REGISTRATIONS = _query(
+    "delete_student_record.registrations", "DELETE FROM registrations WHERE student_id = ?"
+)
+_SQL_DELETE_STUDENT_TRANSCRIPTS = _query(
+    "delete_student_record.transcripts", "DELETE FROM transcripts WHERE student_id = ?"
+)
+_SQL_DELETE_STUDENT = _query("delete_student_record.student", "DELETE FROM students WHERE student_id = ?")
+_SQL_DELETE_STUDENT_USER = _query("delete_student_record.user", "DELETE FROM users WHERE user_id = ?")
 
 
+@_pooled
 def delete_student_record(student_id):
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
-    cur.execute("DELETE FROM registrations WHERE student_id = ?", (student_id,))
-    cur.execute("DELETE FROM transcripts WHERE student_id = ?", (student_id,))
-    cur.execute("DELETE FROM students WHERE student_id = ?", (student_id,))
-    cur.execute("DELETE FROM users WHERE user_id = ?", (student_id,))
+    cur.execute(_SQL_DELETE_STUDENT_REGISTRATIONS, (student_id,))
+    cur.execute(_SQL_DELETE_STUDENT_TRANSCRIPTS, (student_id,))
+    cur.execute(_SQL_DELETE_STUDENT, (student_id,))
+    cur.execute(_SQL_DELETE_STUDENT_USER, (student_id,))
     conn.commit()
-    conn.close()
+    _notify_student_changed(student_id)
 
 
 # ============================================================================
 # Course & Section Management Functions
 # ============================================================================
 
+_SQL_FETCH_COURSES = _query("fetch_courses_with_sections.courses", """
+    SELECT course_code, name, credits, lecture_hours, COALESCE(lab_hours, 0)
+    FROM courses
+    ORDER BY course_code
+""", allow_scan=True)
+_SQL_FETCH_PREREQUISITES = _query("fetch_courses_with_sections.prerequisites", """
+    SELECT course_code, prereq_code
+    FROM prerequisites
+    ORDER BY course_code
+""", allow_scan=True)
+_SQL_FETCH_SECTIONS = _query("fetch_courses_with_sections.sections", """
+    SELECT section_id,
+           course_code,
+           instructor,
+           start_time,
+           end_time,
+           hall,
+           max_capacity,
+           current_enrollment,
+           COALESCE(days, '')
+    FROM sections
+    ORDER BY course_code, section_id
+""", allow_scan=True)
+
+
+@_pooled
 def fetch_courses_with_sections():
     """Return a nested dict of courses -> sections -> prerequisites."""
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT course_code, name, credits, lecture_hours, COALESCE(lab_hours, 0)
-        FROM courses
-        ORDER BY course_code
-        """
-    )
+    cur.execute(_SQL_FETCH_COURSES)
     courses = {}
     for course_code, name, credits, lecture_hours, lab_hours in cur.fetchall():
         courses[course_code] = {
@@ -493,32 +1345,12 @@ def fetch_courses_with_sections():
             "sections": [],
         }
 
-    cur.execute(
-        """
-        SELECT course_code, prereq_code
-        FROM prerequisites
-        ORDER BY course_code
-        """
-    )
+    cur.execute(_SQL_FETCH_PREREQUISITES)
     for course_code, prereq_code in cur.fetchall():
         if course_code in courses:
             courses[course_code]["prerequisites"].append(prereq_code)
 
-    cur.execute(
-        """
-        SELECT section_id,
-               course_code,
-               instructor,
-               start_time,
-               end_time,
-               hall,
-               max_capacity,
-               current_enrollment,
-               COALESCE(days, '')
-        FROM sections
-        ORDER BY course_code, section_id
-        """
-    )
+    cur.execute(_SQL_FETCH_SECTIONS)
     for (
         section_id,
         course_code,
@@ -545,46 +1377,59 @@ def fetch_courses_with_sections():
             }
         )
 
-    conn.close()
     return courses
 
 
+_SQL_UPSERT_COURSE = _query("upsert_course", """
+    INSERT INTO courses (course_code, name, credits, lecture_hours, lab_hours)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(course_code) DO UPDATE SET
+        name = excluded.name,
+        credits = excluded.credits,
+        lecture_hours = excluded.lecture_hours,
+        lab_hours = excluded.lab_hours
+""")
+
+
+@_pooled
 def upsert_course(course_code, name, credits, lecture_hours, lab_hours=0):
     """
     إضافة/تحديث مقرر في قاعدة البيانات.
     ملاحظة: max_capacity لم يعد موجوداً في المقررات، السعة متاحة فقط في الشعب.
     """
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
     try:
-        cur.execute(
-            """
-            INSERT INTO courses (course_code, name, credits, lecture_hours, lab_hours)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(course_code) DO UPDATE SET
-                name = excluded.name,
-                credits = excluded.credits,
-                lecture_hours = excluded.lecture_hours,
-                lab_hours = excluded.lab_hours
-            """,
-            (course_code, name, credits, lecture_hours, lab_hours or 0),
-        )
+        cur.execute(_SQL_UPSERT_COURSE, (course_code, name, credits, lecture_hours, lab_hours or 0))
         conn.commit()
     except Exception as e:
         conn.rollback()
         raise e
-    finally:
-        conn.close()
 
 
+_SQL_COURSE_EXISTS = _query("course_exists", "SELECT 1 FROM courses WHERE course_code = ?")
+
+
+@_pooled
 def course_exists(course_code: str) -> bool:
     """Check if a course with the given code exists."""
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
-    cur.execute("SELECT 1 FROM courses WHERE course_code = ?", (course_code,))
-    exists = cur.fetchone() is not None
-    conn.close()
-    return exists
+    cur.execute(_SQL_COURSE_EXISTS, (course_code,))
+    return cur.fetchone() is not None
+
+
+@_pooled
+def find_missing_courses(course_codes: list[str]) -> list[str]:
+    """
+    رموز المقررات غير الموجودة من بين course_codes (بنفس ترتيبها).
+    أي عدد من الرموز يُحل باستعلام IN واحد لكل BULK_CHUNK_SIZE رمز على اتصال واحد.
+    """
+    if not course_codes:
+        return []
+    conn = _current_connection()
+    existing = _existing_course_codes(conn.cursor(), course_codes)
+    return [code for code in course_codes if code not in existing]
 
 
 def validate_prerequisites(prereq_codes: list[str]) -> tuple[bool, list[str]]:
@@ -592,63 +1437,94 @@ def validate_prerequisites(prereq_codes: list[str]) -> tuple[bool, list[str]]:
     Validates if all prerequisite course codes exist.
     Returns (True, []) if all exist, else (False, [missing_prereqs]).
     """
-    missing_prereqs = []
-    for prereq_code in prereq_codes:
-        if not course_exists(prereq_code):
-            missing_prereqs.append(prereq_code)
+    missing_prereqs = find_missing_courses(prereq_codes)
     return (True, []) if not missing_prereqs else (False, missing_prereqs)
 
 
+_SQL_DELETE_PREREQUISITES = _query(
+    "set_course_prerequisites.delete", "DELETE FROM prerequisites WHERE course_code = ?"
+)
+_SQL_INSERT_PREREQUISITE = _query(
+    "set_course_prerequisites.insert", "INSERT INTO prerequisites (course_code, prereq_code) VALUES (?, ?)"
+)
+
+
+@_pooled
 def set_course_prerequisites(course_code: str, prereq_codes: list[str]):
     """
     Sets prerequisites for a course. Deletes existing prerequisites
     and inserts new ones.
     """
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
     try:
         # Start a transaction
         cur.execute("BEGIN;")
 
         # Delete existing prerequisites for the course
-        cur.execute("DELETE FROM prerequisites WHERE course_code = ?", (course_code,))
+        cur.execute(_SQL_DELETE_PREREQUISITES, (course_code,))
 
         # Insert new prerequisites
         for prereq_code in prereq_codes:
-            cur.execute(
-                """
-                INSERT INTO prerequisites (course_code, prereq_code)
-                VALUES (?, ?)
-                """,
-                (course_code, prereq_code)
-            )
+            cur.execute(_SQL_INSERT_PREREQUISITE, (course_code, prereq_code))
         conn.commit()
     except Exception as e:
         conn.rollback()
         raise e
-    finally:
-        conn.close()
 
 
+def _delete_record_sql(table: str, id_field: str) -> str:
+    return f"DELETE FROM {table} WHERE {id_field} = ?"
+
+
+# الجداول التي تحذف منها delete_record (عبر delete_course وdelete_section و...)
+for _table, _id_field in (("courses", "course_code"), ("sections", "section_id"),
+                          ("program_plans", "course_code"), ("doctors", "doctor_id"),
+                          ("doctor_assignments", "assignment_id")):
+    _query(f"delete_record.{_table}", _delete_record_sql(_table, _id_field))
+
+
+@_pooled
 def delete_record(table: str, id_field: str, record_id: str):
     """Delete a record from any table (generic delete function)."""
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
-    cur.execute(f"DELETE FROM {table} WHERE {id_field} = ?", (record_id,))
+    cur.execute(_delete_record_sql(table, id_field), (record_id,))
     conn.commit()
-    conn.close()
 
 
 def delete_course(course_code):
     """Delete a course (backward compatibility)."""
     delete_record("courses", "course_code", course_code)
+    # الشعب والتسجيلات المرتبطة تُحذف بالتتابع (ON DELETE CASCADE)
+    _notify_student_changed(None)
 
 
 def delete_section(section_id):
     """Delete a section (backward compatibility)."""
     delete_record("sections", "section_id", section_id)
+    _notify_student_changed(None)
 
 
+_SQL_UPSERT_SECTION = _query("upsert_section", """
+    INSERT INTO sections (
+        section_id, course_code, instructor, start_time,
+        end_time, hall, max_capacity, current_enrollment, days
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(section_id) DO UPDATE SET
+        course_code = excluded.course_code,
+        instructor = excluded.instructor,
+        start_time = excluded.start_time,
+        end_time = excluded.end_time,
+        hall = excluded.hall,
+        max_capacity = excluded.max_capacity,
+        current_enrollment = excluded.current_enrollment,
+        days = excluded.days
+""")
+
+
+@_pooled
 def upsert_section(
     section_id,
     course_code,
@@ -660,25 +1536,10 @@ def upsert_section(
     current_enrollment=0,
     days='',
 ):
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
     cur.execute(
-        """
-        INSERT INTO sections (
-            section_id, course_code, instructor, start_time,
-            end_time, hall, max_capacity, current_enrollment, days
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(section_id) DO UPDATE SET
-            course_code = excluded.course_code,
-            instructor = excluded.instructor,
-            start_time = excluded.start_time,
-            end_time = excluded.end_time,
-            hall = excluded.hall,
-            max_capacity = excluded.max_capacity,
-            current_enrollment = excluded.current_enrollment,
-            days = excluded.days
-        """,
+        _SQL_UPSERT_SECTION,
         (
             section_id,
             course_code,
@@ -692,134 +1553,310 @@ def upsert_section(
         ),
     )
     conn.commit()
-    conn.close()
 
 
 
 
+_SQL_SECTION_CAPACITY = _query(
+    "update_section_enrollment.capacity",
+    "SELECT current_enrollment, max_capacity FROM sections WHERE section_id = ?"
+)
+_SQL_SECTION_ENROLLMENT = _query(
+    "update_section_enrollment.enrollment",
+    "SELECT current_enrollment FROM sections WHERE section_id = ?"
+)
+_SQL_INCREMENT_ENROLLMENT = _query(
+    "update_section_enrollment.increment",
+    "UPDATE sections SET current_enrollment = current_enrollment + 1 WHERE section_id = ?"
+)
+_SQL_DECREMENT_ENROLLMENT = _query(
+    "update_section_enrollment.decrement",
+    "UPDATE sections SET current_enrollment = current_enrollment - 1 WHERE section_id = ?"
+)
+
+
+@_pooled
 def update_section_enrollment(section_id: str, increment: bool = True) -> Tuple[bool, Optional[str]]:
     """Update section enrollment (increment or decrement)."""
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
-    
+        
     if increment:
-        cur.execute("SELECT current_enrollment, max_capacity FROM sections WHERE section_id = ?", (section_id,))
+        cur.execute(_SQL_SECTION_CAPACITY, (section_id,))
         row = cur.fetchone()
         if not row:
-            conn.close()
             return False, "Section not found"
         current, max_cap = row
         if current >= max_cap:
-            conn.close()
             return False, "Section is already full"
-        cur.execute("UPDATE sections SET current_enrollment = current_enrollment + 1 WHERE section_id = ?", (section_id,))
+        cur.execute(_SQL_INCREMENT_ENROLLMENT, (section_id,))
     else:
-        cur.execute("SELECT current_enrollment FROM sections WHERE section_id = ?", (section_id,))
+        cur.execute(_SQL_SECTION_ENROLLMENT, (section_id,))
         row = cur.fetchone()
         if not row:
-            conn.close()
             return False, "Section not found"
         if row[0] <= 0:
-            conn.close()
             return False, "Section enrollment cannot go below zero"
-        cur.execute("UPDATE sections SET current_enrollment = current_enrollment - 1 WHERE section_id = ?", (section_id,))
-    
+        cur.execute(_SQL_DECREMENT_ENROLLMENT, (section_id,))
+        
     conn.commit()
-    conn.close()
     return True, None
 
 
-def increment_section_enrollment(section_id):
-    """Increment section enrollment (backward compatibility)."""
-    return update_section_enrollment(section_id, increment=True)
+def increment_section_enrollment(section_id):
+    """Increment section enrollment (backward compatibility)."""
+    return update_section_enrollment(section_id, increment=True)
+
+
+def decrement_section_enrollment(section_id):
+    """Decrement section enrollment (backward compatibility)."""
+    return update_section_enrollment(section_id, increment=False)
+
+
+# ============================================================================
+# REGISTRATION MANAGEMENT
+# ============================================================================
+
+_SQL_INSERT_REGISTRATION = _query("add_registration", """
+    INSERT INTO registrations (student_id, section_id, registration_time)
+    VALUES (?, ?, ?)
+""")
+
+
+@_pooled
+def add_registration(student_id: str, section_id: str, registration_time: str):
+    """Add a new course registration for a student."""
+    conn = _current_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(_SQL_INSERT_REGISTRATION, (student_id, section_id, registration_time))
+        conn.commit()
+    except sqlite3.IntegrityError as e:
+        conn.rollback()
+        raise ValueError(f"Registration already exists or invalid data: {e}")
+    _notify_student_changed(student_id)
+
+
+_SQL_DELETE_REGISTRATION = _query(
+    "remove_registration", "DELETE FROM registrations WHERE student_id = ? AND section_id = ?"
+)
+
+
+@_pooled
+def remove_registration(student_id: str, section_id: str):
+    """Remove a course registration for a student."""
+    conn = _current_connection()
+    cur = conn.cursor()
+    cur.execute(_SQL_DELETE_REGISTRATION, (student_id, section_id))
+    conn.commit()
+    _notify_student_changed(student_id)
+
+
+@_pooled
+def register_student_sections(student_id: str, section_ids: List[str], registration_time: str) -> Tuple[bool, Optional[str]]:
+    """
+    تسجيل طالب في عدة شعب داخل معاملة واحدة (BEGIN IMMEDIATE).
+
+    الوظيفة:
+        لكل شعبة: زيادة عدد المسجلين بشرط عدم امتلاء الشعبة (UPDATE مشروط)
+        ثم إدراج التسجيل. أي فشل يلغي المعاملة بالكامل، لذلك لا حاجة لعمليات
+        تعويضية، وقاعدة البيانات نفسها تمنع تجاوز السعة عند التزامن.
+
+    Returns:
+        (True, None) عند النجاح، أو (False, رسالة الخطأ)
+    """
+    conn = _current_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("BEGIN IMMEDIATE;")
+        error = _register_sections_in_transaction(cur, student_id, section_ids, registration_time)
+        if error:
+            conn.rollback()
+            return False, error
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    _notify_student_changed(student_id)
+    return True, None
+
 
+_SQL_RESERVE_SEAT = _query("register_sections.reserve", """
+    UPDATE sections
+    SET current_enrollment = current_enrollment + 1
+    WHERE section_id = ? AND current_enrollment < max_capacity
+""")
+_SQL_SECTION_EXISTS = _query("register_sections.exists", "SELECT 1 FROM sections WHERE section_id = ?")
 
-def decrement_section_enrollment(section_id):
-    """Decrement section enrollment (backward compatibility)."""
-    return update_section_enrollment(section_id, increment=False)
 
+def _register_sections_in_transaction(cur, student_id: str, section_ids: List[str],
+                                      registration_time: str) -> Optional[str]:
+    """
+    خطوات تسجيل طالب داخل معاملة مفتوحة: UPDATE مشروط للسعة ثم INSERT لكل شعبة.
+    Returns: None عند النجاح، أو رسالة الخطأ (على المستدعي إلغاء التغييرات)
+    """
+    try:
+        for section_id in section_ids:
+            cur.execute(_SQL_RESERVE_SEAT, (section_id,))
+            if cur.rowcount != 1:
+                cur.execute(_SQL_SECTION_EXISTS, (section_id,))
+                if cur.fetchone() is None:
+                    return f"Section {section_id} not found"
+                return f"Section {section_id} is full"
+            cur.execute(_SQL_INSERT_REGISTRATION, (student_id, section_id, registration_time))
+    except sqlite3.IntegrityError as e:
+        return f"Registration already exists or invalid data: {e}"
+    return None
 
-# ============================================================================
-# REGISTRATION MANAGEMENT
-# ============================================================================
 
-def add_registration(student_id: str, section_id: str, registration_time: str):
-    """Add a new course registration for a student."""
-    conn = get_connection()
+def bulk_register_sections(requests: List[Tuple[str, List[str]]], registration_time: str,
+                           chunk_size: Optional[int] = None) -> List[Tuple[bool, Optional[str]]]:
+    """
+    تسجيل عدة طلاب في شعبهم (مثل التسجيل المسبق لدفعة كاملة) في معاملات مجمّعة.
+    
+    الوظيفة:
+        معاملة BEGIN IMMEDIATE لكل chunk_size طالب، و SAVEPOINT لكل طالب داخلها:
+        فشل طالب (شعبة ممتلئة/غير موجودة، تسجيل مكرر) يُلغي تغييراته فقط (ROLLBACK TO)
+        ويكمل باقي الدفعة. الـ UPDATE المشروط يمنع تجاوز السعة حتى مع التسجيل المتزامن.
+    
+    Args:
+        requests: [(student_id, [section_id, ...]), ...]
+        registration_time: وقت التسجيل لجميع الطلاب
+        chunk_size: عدد الطلاب في كل معاملة (افتراضياً BULK_CHUNK_SIZE)
+    
+    Returns:
+        نتيجة لكل طلب بنفس الترتيب: (True, None) أو (False, رسالة الخطأ)
+    """
+    results: List[Tuple[bool, Optional[str]]] = []
+    for chunk in _chunked(requests, max(1, chunk_size or BULK_CHUNK_SIZE)):
+        chunk_results = []
+        with connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute("BEGIN IMMEDIATE;")
+                for student_id, section_ids in chunk:
+                    cur.execute("SAVEPOINT student_registration;")
+                    error = _register_sections_in_transaction(cur, student_id, section_ids, registration_time)
+                    if error:
+                        cur.execute("ROLLBACK TO student_registration;")
+                    cur.execute("RELEASE student_registration;")
+                    chunk_results.append((error is None, error))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        results.extend(chunk_results)
+        for (student_id, _), (success, _) in zip(chunk, chunk_results):
+            if success:
+                _notify_student_changed(student_id)
+    return results
+
+
+_SQL_RELEASE_SEAT = _query("unregister_student_section.release", """
+    UPDATE sections
+    SET current_enrollment = current_enrollment - 1
+    WHERE section_id = ? AND current_enrollment > 0
+""")
+
+
+@_pooled
+def unregister_student_section(student_id: str, section_id: str) -> Tuple[bool, Optional[str]]:
+    """
+    إلغاء تسجيل طالب من شعبة مع إنقاص عدد المسجلين في معاملة واحدة.
+    Returns: (True, None) عند النجاح، أو (False, رسالة الخطأ)
+    """
+    conn = _current_connection()
     cur = conn.cursor()
     try:
-        cur.execute(
-            """
-            INSERT INTO registrations (student_id, section_id, registration_time)
-            VALUES (?, ?, ?)
-            """,
-            (student_id, section_id, registration_time),
-        )
+        cur.execute("BEGIN IMMEDIATE;")
+        cur.execute(_SQL_DELETE_REGISTRATION, (student_id, section_id))
+        if cur.rowcount != 1:
+            conn.rollback()
+            return False, "Student not registered in this section"
+        cur.execute(_SQL_RELEASE_SEAT, (section_id,))
+        if cur.rowcount != 1:
+            conn.rollback()
+            return False, "Section enrollment cannot go below zero"
         conn.commit()
-    except sqlite3.IntegrityError as e:
+    except Exception:
         conn.rollback()
-        raise ValueError(f"Registration already exists or invalid data: {e}")
-    finally:
-        conn.close()
+        raise
+    _notify_student_changed(student_id)
+    return True, None
 
 
-def remove_registration(student_id: str, section_id: str):
-    """Remove a course registration for a student."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        DELETE FROM registrations
-        WHERE student_id = ? AND section_id = ?
-        """,
-        (student_id, section_id),
-    )
-    conn.commit()
-    conn.close()
+_SQL_GET_REGISTRATIONS = _query("get_student_registrations", """
+    SELECT section_id, registration_time
+    FROM registrations
+    WHERE student_id = ?
+    ORDER BY registration_time
+""")
 
 
+@_pooled
 def get_student_registrations(student_id: str):
     """Retrieve all registrations for a student.
     Returns: list of tuples (section_id, registration_time)
     """
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT section_id, registration_time
-        FROM registrations
-        WHERE student_id = ?
-        ORDER BY registration_time
-        """,
-        (student_id,),
-    )
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    cur.execute(_SQL_GET_REGISTRATIONS, (student_id,))
+    return cur.fetchall()
 
 
 # PROGRAM PLANS MANAGEMENT
+
+# عداد إصدار لجدول program_plans: يزداد مع كل كتابة عبر هذه الوحدة حتى تتمكن
+# الفهارس في الذاكرة (RegistrationSystem) من معرفة أنها أصبحت قديمة.
+_program_plan_version = 0
+_program_plan_version_lock = threading.Lock()
+
+
+def _bump_program_plan_version():
+    global _program_plan_version
+    with _program_plan_version_lock:
+        _program_plan_version += 1
+
+
+def get_program_plan_version() -> int:
+    """رقم إصدار program_plans الحالي (يتغير بعد كل إضافة/حذف)."""
+    return _program_plan_version
+
+
+_SQL_INSERT_PLAN = _query(
+    "manage_program_plan.add",
+    "INSERT INTO program_plans (program, level, course_code) VALUES (?, ?, ?) ON CONFLICT DO NOTHING"
+)
+# الطلاب في مستويات أعلى يحتاجون إعادة تعبئة سجلهم عند الدخول التالي
+_SQL_RESET_BACKFILL = _query(
+    "manage_program_plan.reset_backfill",
+    "UPDATE students SET backfilled_level = 0 WHERE program = ? AND level > ? AND backfilled_level > 0"
+)
+_SQL_DELETE_PLAN = _query(
+    "manage_program_plan.remove",
+    "DELETE FROM program_plans WHERE course_code = ? AND program = ? AND level = ?"
+)
+
+
+@_pooled
 def manage_program_plan(course_code: str, program: str, level: int, action: str = 'add'):
     """Add or remove a course from a program plan."""
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
     try:
         if action == 'add':
-            cur.execute(
-                "INSERT INTO program_plans (program, level, course_code) VALUES (?, ?, ?) ON CONFLICT DO NOTHING",
-                (program, level, course_code)
-            )
+            cur.execute(_SQL_INSERT_PLAN, (program, level, course_code))
+            # الطلاب في مستويات أعلى يحتاجون إعادة تعبئة سجلهم عند الدخول التالي
+            cur.execute(_SQL_RESET_BACKFILL, (program, level))
         else:  # remove
-            cur.execute(
-                "DELETE FROM program_plans WHERE course_code = ? AND program = ? AND level = ?",
-                (course_code, program, level)
-            )
+            cur.execute(_SQL_DELETE_PLAN, (course_code, program, level))
         conn.commit()
     except Exception as e:
         conn.rollback()
         raise e
-    finally:
-        conn.close()
+    _bump_program_plan_version()
+    if action == 'add':
+        _notify_student_changed(None)
 
 
 def add_course_to_program_plan(course_code: str, program: str, level: int):
@@ -831,31 +1868,66 @@ def remove_course_from_program_plan(course_code: str, program: str, level: int):
     manage_program_plan(course_code, program, level, 'remove')
 
 
+_SQL_COURSE_PLANS = _query("get_course_program_plans", """
+    SELECT program, level
+    FROM program_plans
+    WHERE course_code = ?
+    ORDER BY program, level
+""")
+
+
+@_pooled
 def get_course_program_plans(course_code: str):
     """Get all program plans for a course.
     Returns list of tuples: [(program, level), ...]
     """
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT program, level
-        FROM program_plans
-        WHERE course_code = ?
-        ORDER BY program, level
-        """,
-        (course_code,)
-    )
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    cur.execute(_SQL_COURSE_PLANS, (course_code,))
+    return cur.fetchall()
 
 
 def remove_all_course_program_plans(course_code: str):
     """Remove all program plans for a course."""
     delete_record("program_plans", "course_code", course_code)
+    _bump_program_plan_version()
 
 
+_SQL_FETCH_PLANS = _query("fetch_program_plans", """
+    SELECT program, level, course_code
+    FROM program_plans
+    ORDER BY program, level, course_code
+""", allow_scan=True)
+
+
+@_pooled
+def fetch_program_plans() -> Dict[Tuple[str, int], List[str]]:
+    """
+    جلب جدول program_plans كاملاً في استعلام واحد.
+    
+    Returns:
+        قاموس {(program, level): [course_code, ...]} مع رموز مرتبة تصاعدياً
+    """
+    conn = _current_connection()
+    cur = conn.cursor()
+    cur.execute(_SQL_FETCH_PLANS)
+    rows = cur.fetchall()
+    
+    plans: Dict[Tuple[str, int], List[str]] = {}
+    for program, level, course_code in rows:
+        plans.setdefault((program, level), []).append(course_code)
+    return plans
+
+
+_SQL_PLAN_COURSES = _query("get_courses_for_program_and_level", """
+    SELECT course_code
+    FROM program_plans
+    WHERE program = ? AND level = ?
+    ORDER BY course_code
+""")
+
+
+@_pooled
 def get_courses_for_program_and_level(program: str, level: int) -> List[str]:
     """
     جلب رموز المقررات المتاحة لبرنامج ومستوى محدد من جدول program_plans.
@@ -875,19 +1947,10 @@ def get_courses_for_program_and_level(program: str, level: int) -> List[str]:
     if program == 'Communications':
         program = 'Comm'
     
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT course_code
-        FROM program_plans
-        WHERE program = ? AND level = ?
-        ORDER BY course_code
-        """,
-        (program, level)
-    )
+    cur.execute(_SQL_PLAN_COURSES, (program, level))
     rows = cur.fetchall()
-    conn.close()
     return [row[0] for row in rows]
 
 
@@ -895,45 +1958,52 @@ def get_courses_for_program_and_level(program: str, level: int) -> List[str]:
 # DOCTOR/FACULTY MANAGEMENT FUNCTIONS
 # ============================================================================
 
+_SQL_UPSERT_DOCTOR = _query("add_doctor", """
+    INSERT INTO doctors (doctor_id, name, email, preferred_courses, time_availability)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(doctor_id) DO UPDATE SET
+        name = excluded.name,
+        email = excluded.email,
+        preferred_courses = excluded.preferred_courses,
+        time_availability = excluded.time_availability
+""")
+
+
+@_pooled
 def add_doctor(doctor_id: str, name: str, email: str, preferred_courses: str = '', time_availability: str = ''):
     """Add a new doctor/faculty member."""
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
     try:
-        cur.execute(
-            """
-            INSERT INTO doctors (doctor_id, name, email, preferred_courses, time_availability)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(doctor_id) DO UPDATE SET
-                name = excluded.name,
-                email = excluded.email,
-                preferred_courses = excluded.preferred_courses,
-                time_availability = excluded.time_availability
-            """,
-            (doctor_id, name, email, preferred_courses, time_availability)
-        )
+        cur.execute(_SQL_UPSERT_DOCTOR, (doctor_id, name, email, preferred_courses, time_availability))
         conn.commit()
     except Exception as e:
         conn.rollback()
         raise e
-    finally:
-        conn.close()
 
 
+_SQL_GET_DOCTOR = _query(
+    "get_doctor",
+    "SELECT doctor_id, name, email, preferred_courses, time_availability FROM doctors WHERE doctor_id = ?"
+)
+_SQL_ALL_DOCTORS = _query(
+    "get_all_doctors",
+    "SELECT doctor_id, name, email, preferred_courses, time_availability FROM doctors ORDER BY name",
+    allow_scan=True
+)
+
+
+@_pooled
 def get_doctor(doctor_id: str = None) -> Optional[Tuple] | List[Tuple]:
     """Get doctor(s) - all if doctor_id is None, specific if provided."""
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
     if doctor_id:
-        cur.execute("SELECT doctor_id, name, email, preferred_courses, time_availability FROM doctors WHERE doctor_id = ?", (doctor_id,))
-        row = cur.fetchone()
-        conn.close()
-        return row
+        cur.execute(_SQL_GET_DOCTOR, (doctor_id,))
+        return cur.fetchone()
     else:
-        cur.execute("SELECT doctor_id, name, email, preferred_courses, time_availability FROM doctors ORDER BY name")
-        rows = cur.fetchall()
-        conn.close()
-        return rows
+        cur.execute(_SQL_ALL_DOCTORS)
+        return cur.fetchall()
 
 
 def get_all_doctors() -> List[Tuple]:
@@ -946,44 +2016,42 @@ def delete_doctor(doctor_id: str):
     delete_record("doctors", "doctor_id", doctor_id)
 
 
+_SQL_INSERT_ASSIGNMENT = _query("assign_course_to_doctor", """
+    INSERT INTO doctor_assignments (doctor_id, course_code, section_id)
+    VALUES (?, ?, ?)
+""")
+
+
+@_pooled
 def assign_course_to_doctor(doctor_id: str, course_code: str, section_id: Optional[str] = None) -> int:
     """Assign a course to a doctor. Returns assignment_id."""
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
     try:
-        cur.execute(
-            """
-            INSERT INTO doctor_assignments (doctor_id, course_code, section_id)
-            VALUES (?, ?, ?)
-            """,
-            (doctor_id, course_code, section_id)
-        )
+        cur.execute(_SQL_INSERT_ASSIGNMENT, (doctor_id, course_code, section_id))
         assignment_id = cur.lastrowid
         conn.commit()
         return assignment_id
     except Exception as e:
         conn.rollback()
         raise e
-    finally:
-        conn.close()
 
 
+_SQL_DOCTOR_ASSIGNMENTS = _query("get_doctor_assignments", """
+    SELECT assignment_id, doctor_id, course_code, section_id
+    FROM doctor_assignments
+    WHERE doctor_id = ?
+    ORDER BY course_code
+""")
+
+
+@_pooled
 def get_doctor_assignments(doctor_id: str) -> List[Tuple]:
     """Get all course assignments for a doctor."""
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT assignment_id, doctor_id, course_code, section_id
-        FROM doctor_assignments
-        WHERE doctor_id = ?
-        ORDER BY course_code
-        """,
-        (doctor_id,)
-    )
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    cur.execute(_SQL_DOCTOR_ASSIGNMENTS, (doctor_id,))
+    return cur.fetchall()
 
 
 def remove_doctor_assignment(assignment_id: int):
@@ -991,75 +2059,621 @@ def remove_doctor_assignment(assignment_id: int):
     delete_record("doctor_assignments", "assignment_id", str(assignment_id))
 
 
+_SQL_DOCTOR_SCHEDULE = _query("get_doctor_schedule", """
+    SELECT s.section_id, s.course_code, s.start_time, s.end_time, s.hall,
+           c.name as course_name, da.assignment_id
+    FROM doctor_assignments da
+    JOIN sections s ON da.section_id = s.section_id
+    JOIN courses c ON s.course_code = c.course_code
+    WHERE da.doctor_id = ?
+    ORDER BY s.start_time
+""")
+
+
+@_pooled
 def get_doctor_schedule(doctor_id: str) -> List[Dict]:
     """Get the schedule (sections) for a doctor."""
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT s.section_id, s.course_code, s.start_time, s.end_time, s.hall,
-               c.name as course_name, da.assignment_id
-        FROM doctor_assignments da
-        JOIN sections s ON da.section_id = s.section_id
-        JOIN courses c ON s.course_code = c.course_code
-        WHERE da.doctor_id = ?
-        ORDER BY s.start_time
-        """,
-        (doctor_id,)
-    )
+    cur.execute(_SQL_DOCTOR_SCHEDULE, (doctor_id,))
     columns = [description[0] for description in cur.description]
     rows = cur.fetchall()
-    conn.close()
     return [dict(zip(columns, row)) for row in rows]
 
 
+_SQL_DOCTOR_CONFLICT_EXCLUDING = _query("check_doctor_time_conflict.excluding", """
+    SELECT COUNT(*) FROM doctor_assignments da
+    JOIN sections s ON da.section_id = s.section_id
+    WHERE da.doctor_id = ?
+    AND s.section_id != ?
+    AND NOT (s.end_time <= ? OR s.start_time >= ?)
+""")
+_SQL_DOCTOR_CONFLICT = _query("check_doctor_time_conflict", """
+    SELECT COUNT(*) FROM doctor_assignments da
+    JOIN sections s ON da.section_id = s.section_id
+    WHERE da.doctor_id = ?
+    AND NOT (s.end_time <= ? OR s.start_time >= ?)
+""")
+
+
+@_pooled
 def check_doctor_time_conflict(doctor_id: str, start_time: int, end_time: int, exclude_section_id: Optional[str] = None) -> bool:
     """Check if a doctor has a time conflict with their existing assignments."""
-    conn = get_connection()
+    conn = _current_connection()
     cur = conn.cursor()
-    
+        
     if exclude_section_id:
-        cur.execute(
-            """
-            SELECT COUNT(*) FROM doctor_assignments da
-            JOIN sections s ON da.section_id = s.section_id
-            WHERE da.doctor_id = ? 
-            AND s.section_id != ?
-            AND NOT (s.end_time <= ? OR s.start_time >= ?)
-            """,
-            (doctor_id, exclude_section_id, start_time, end_time)
-        )
+        cur.execute(_SQL_DOCTOR_CONFLICT_EXCLUDING, (doctor_id, exclude_section_id, start_time, end_time))
     else:
-        cur.execute(
-            """
-            SELECT COUNT(*) FROM doctor_assignments da
-            JOIN sections s ON da.section_id = s.section_id
-            WHERE da.doctor_id = ? 
-            AND NOT (s.end_time <= ? OR s.start_time >= ?)
-            """,
-            (doctor_id, start_time, end_time)
-        )
-    
+        cur.execute(_SQL_DOCTOR_CONFLICT, (doctor_id, start_time, end_time))
+        
     count = cur.fetchone()[0]
-    conn.close()
     return count > 0
 
 
+# ============================================================================
+# BULK CATALOG IMPORT (استيراد الكتالوج دفعة واحدة)
+# ============================================================================
+
+# عدد الصفوف في كل معاملة (Transaction) أثناء الاستيراد الجماعي
+BULK_CHUNK_SIZE = 500
+
+# أنواع بيانات الكتالوج بترتيب الاستيراد (المقررات أولاً بسبب المفاتيح الأجنبية)
+CATALOG_KINDS = ("courses", "sections", "prerequisites", "program_plans")
+
+
+def _chunked(rows: Iterable, size: int) -> Iterator[List]:
+    """تقسيم أي مصدر صفوف (حتى المولدات) إلى دفعات دون تحميله كاملاً في الذاكرة."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _existing_course_codes_sql(id_count: int) -> str:
+    placeholders = ",".join("?" * id_count)
+    return f"SELECT course_code FROM courses WHERE course_code IN ({placeholders})"
+
+
+_query("_existing_course_codes", _existing_course_codes_sql(3))
+
+
+def _existing_course_codes(cur, course_codes) -> set:
+    """رموز المقررات الموجودة من بين course_codes (استعلام IN لكل دفعة)."""
+    codes = list(set(course_codes))
+    found = set()
+    for start in range(0, len(codes), BULK_CHUNK_SIZE):
+        part = codes[start:start + BULK_CHUNK_SIZE]
+        cur.execute(_existing_course_codes_sql(len(part)), part)
+        found.update(row[0] for row in cur.fetchall())
+    return found
+
+
+def _row_text(row: Dict, key: str, required: bool = True) -> str:
+    value = row.get(key)
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise ValueError(f"missing '{key}'")
+    return value
+
+
+def _row_int(row: Dict, key: str, default: Optional[int] = None, minimum: Optional[int] = None) -> int:
+    value = row.get(key)
+    if value is None or str(value).strip() == "":
+        if default is None:
+            raise ValueError(f"missing '{key}'")
+        return default
+    try:
+        number = int(str(value).strip())
+    except ValueError:
+        raise ValueError(f"'{key}' must be an integer")
+    if minimum is not None and number < minimum:
+        raise ValueError(f"'{key}' must be >= {minimum}")
+    return number
+
+
+@_pooled
+def _bulk_write(rows: Iterable, parse_row, referenced_courses, statements, chunk_size: int,
+                after_commit=None) -> Tuple[int, List[str]]:
+    """
+    المحرك المشترك للاستيراد الجماعي.
+    
+    لكل دفعة من chunk_size صف:
+        1. parse_row(row) يحول الصف ويتحقق منه (ValueError = صف غير صالح)
+        2. referenced_courses(values) يرجع المقررات التي يجب أن تكون موجودة؛
+           يتم التحقق منها كلها باستعلام IN واحد للدفعة
+        3. executemany لكل (sql, params) في statements داخل معاملة واحدة
+        4. after_commit(cur, [values]) (اختياري) بعد نجاح حفظ الدفعة فقط
+    الصفوف غير الصالحة تُتجاوز وتُسجل برقمها؛ أخطاء قاعدة البيانات تلغي الدفعة وتُرفع.
+    
+    Returns:
+        (عدد الصفوف المكتوبة، قائمة الأخطاء)
+    """
+    written = 0
+    errors: List[str] = []
+    row_number = 0
+    conn = _current_connection()
+    cur = conn.cursor()
+    for chunk in _chunked(rows, chunk_size):
+        parsed = []
+        for row in chunk:
+            row_number += 1
+            try:
+                parsed.append((row_number, parse_row(row)))
+            except (ValueError, TypeError, AttributeError) as e:
+                errors.append(f"row {row_number}: {e}")
+            
+        if referenced_courses and parsed:
+            existing = _existing_course_codes(
+                cur, [code for _, values in parsed for code in referenced_courses(values)]
+            )
+            valid = []
+            for number, values in parsed:
+                missing = [code for code in referenced_courses(values) if code not in existing]
+                if missing:
+                    errors.append(f"row {number}: course '{missing[0]}' does not exist")
+                else:
+                    valid.append((number, values))
+            parsed = valid
+            
+        if not parsed:
+            continue
+        try:
+            cur.execute("BEGIN IMMEDIATE;")
+            for sql, make_params in statements:
+                cur.executemany(sql, [params for _, values in parsed for params in make_params(values)])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        written += len(parsed)
+        if after_commit:
+            after_commit(cur, [values for _, values in parsed])
+    return written, errors
+
+
+def bulk_upsert_courses(rows: Iterable[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> Tuple[int, List[str]]:
+    """
+    إضافة/تحديث مقررات دفعة واحدة.
+    الأعمدة: course_code, name, credits, lecture_hours, lab_hours (اختياري)
+    """
+    def parse(row):
+        return (
+            _row_text(row, "course_code"),
+            _row_text(row, "name"),
+            _row_int(row, "credits", minimum=1),
+            _row_int(row, "lecture_hours", minimum=0),
+            _row_int(row, "lab_hours", default=0, minimum=0),
+        )
+    
+    statements = [(_SQL_UPSERT_COURSE, lambda values: [values])]
+    return _bulk_write(rows, parse, None, statements, chunk_size)
+
+
+# التحديث لا يغير current_enrollment (بخلاف upsert_section) حتى لا تضيع التسجيلات الحالية
+_SQL_BULK_UPSERT_SECTION = _query("bulk_upsert_sections", """
+    INSERT INTO sections (
+        section_id, course_code, instructor, start_time,
+        end_time, hall, max_capacity, current_enrollment, days
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(section_id) DO UPDATE SET
+        course_code = excluded.course_code,
+        instructor = excluded.instructor,
+        start_time = excluded.start_time,
+        end_time = excluded.end_time,
+        hall = excluded.hall,
+        max_capacity = excluded.max_capacity,
+        days = excluded.days
+""")
+
+
+def bulk_upsert_sections(rows: Iterable[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> Tuple[int, List[str]]:
+    """
+    إضافة/تحديث شعب دفعة واحدة.
+    الأعمدة: section_id, course_code, instructor, start_time, end_time, hall,
+             max_capacity, days (اختياري), current_enrollment (اختياري)
+    ملاحظة: current_enrollment يُستخدم للشعب الجديدة فقط؛ التحديث لا يغيره حتى لا تضيع
+    التسجيلات الحالية.
+    """
+    def parse(row):
+        start_time = _row_int(row, "start_time", minimum=0)
+        end_time = _row_int(row, "end_time", minimum=0)
+        max_capacity = _row_int(row, "max_capacity", minimum=1)
+        current_enrollment = _row_int(row, "current_enrollment", default=0, minimum=0)
+        # نفس تحويل week_mask_for_slot: الساعات قبل FIRST_MORNING_HOUR بعد الظهر
+        start_24 = start_time + 12 if start_time < FIRST_MORNING_HOUR else start_time
+        end_24 = end_time + 12 if end_time < FIRST_MORNING_HOUR else end_time
+        if end_24 <= start_24:
+            raise ValueError("'end_time' must be after 'start_time'")
+        if current_enrollment > max_capacity:
+            raise ValueError("'current_enrollment' must be <= 'max_capacity'")
+        return (
+            _row_text(row, "section_id"),
+            _row_text(row, "course_code"),
+            _row_text(row, "instructor", required=False),
+            start_time,
+            end_time,
+            _row_text(row, "hall", required=False),
+            max_capacity,
+            current_enrollment,
+            _row_text(row, "days", required=False),
+        )
+    
+    statements = [(_SQL_BULK_UPSERT_SECTION, lambda values: [values])]
+    return _bulk_write(rows, parse, lambda values: [values[1]], statements, chunk_size)
+
+
+def bulk_set_prerequisites(prerequisites: Dict[str, List[str]], chunk_size: int = BULK_CHUNK_SIZE) -> Tuple[int, List[str]]:
+    """
+    تعيين المتطلبات السابقة لعدة مقررات (يستبدل المتطلبات الحالية لكل مقرر مذكور).
+    
+    Args:
+        prerequisites: {course_code: [prereq_code, ...]}
+    
+    Returns:
+        (عدد المقررات المحدّثة، قائمة الأخطاء)
+    """
+    def parse(item):
+        course_code, prereq_codes = item
+        course_code = str(course_code).strip()
+        if not course_code:
+            raise ValueError("missing 'course_code'")
+        codes = sorted({str(code).strip() for code in prereq_codes if str(code).strip()})
+        if course_code in codes:
+            raise ValueError(f"course '{course_code}' cannot be its own prerequisite")
+        return course_code, codes
+    
+    statements = [
+        (_SQL_DELETE_PREREQUISITES, lambda values: [(values[0],)]),
+        (_SQL_INSERT_PREREQUISITE, lambda values: [(values[0], code) for code in values[1]]),
+    ]
+    return _bulk_write(
+        prerequisites.items(), parse, lambda values: [values[0], *values[1]], statements, chunk_size
+    )
+
+
+_SQL_PLAN_STUDENTS_ABOVE = _query(
+    "bulk_program_plans.affected", "SELECT student_id FROM students WHERE program = ? AND level > ?"
+)
+
+
+def bulk_program_plans(rows: Iterable[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> Tuple[int, List[str]]:
+    """
+    إضافة مقررات إلى خطط البرامج دفعة واحدة.
+    الأعمدة: program (أو All لجميع البرامج), level (1-10), course_code
+    """
+    def parse(row):
+        program = _row_text(row, "program")
+        if program == 'Communications':
+            program = 'Comm'
+        programs = ALLOWED_PROGRAMS if program == 'All' else (program,)
+        if program != 'All' and program not in ALLOWED_PROGRAMS:
+            raise ValueError(f"invalid program '{program}'")
+        level = _row_int(row, "level", minimum=1)
+        if level > 10:
+            raise ValueError("'level' must be <= 10")
+        return programs, level, _row_text(row, "course_code")
+    
+    statements = [
+        (_SQL_INSERT_PLAN, lambda values: [(program, values[1], values[2]) for program in values[0]]),
+        # الطلاب في مستويات أعلى من الخطة يحتاجون إعادة تعبئة سجلهم (نفس manage_program_plan)
+        (_SQL_RESET_BACKFILL, lambda values: [(program, values[1]) for program in values[0]]),
+    ]
+    
+    def after_commit(cur, parsed):
+        _bump_program_plan_version()
+        plans = {(program, level) for programs, level, _ in parsed for program in programs}
+        affected = set()
+        for program, level in plans:
+            cur.execute(_SQL_PLAN_STUDENTS_ABOVE, (program, level))
+            affected.update(row[0] for row in cur.fetchall())
+        for student_id in affected:
+            _notify_student_changed(student_id)
+    
+    return _bulk_write(rows, parse, lambda values: [values[2]], statements, chunk_size, after_commit)
+
+
+def read_catalog_rows(path: str) -> Iterator[Dict]:
+    """
+    قراءة صفوف من ملف CSV أو JSON Lines بشكل متدفق (صف بصف).
+    ملفات .json العادية (قائمة من الكائنات) تُقرأ كاملة ثم تُعاد صفاً صفاً.
+    """
+    lower = path.lower()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if lower.endswith(".csv"):
+            yield from csv.DictReader(f)
+        elif lower.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            data = json.load(f)
+            yield from (data if isinstance(data, list) else [data])
+
+
+def load_catalog_json(path: str) -> Dict[str, list]:
+    """
+    قراءة ملف كتالوج JSON واحد يحتوي على كل الأنواع:
+    {"courses": [...], "sections": [...], "prerequisites": [...], "program_plans": [...]}
+    """
+    with open(path, encoding="utf-8-sig") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("Catalog JSON must be an object with keys: " + ", ".join(CATALOG_KINDS))
+    return {kind: data.get(kind, []) for kind in CATALOG_KINDS}
+
+
+def detect_catalog_kind(columns) -> Optional[str]:
+    """تحديد نوع البيانات (courses/sections/...) من أسماء الأعمدة."""
+    columns = set(columns)
+    if "section_id" in columns:
+        return "sections"
+    if "program" in columns and "level" in columns:
+        return "program_plans"
+    if "name" in columns and "credits" in columns:
+        return "courses"
+    if "course_code" in columns and ({"prereq_code", "prerequisites"} & columns):
+        return "prerequisites"
+    return None
+
+
+# ============================================================================
+# ID SEQUENCES (توليد المعرفات من تسلسلات)
+# ============================================================================
+
+# عدد المعرفات المحجوزة في كل معاملة على id_sequences
+ID_BLOCK_SIZE = 20
+
+# التسلسلات المعروفة: الاسم -> نطاقات (القالب، أول قيمة، آخر قيمة) تُستهلك بالترتيب
+# - student: معرفات UserManager (S1000 .. S9999)
+# - academic: المعرف الجامعي للطلاب (7 أرقام تبدأ بـ 16 ثم 27)
+ID_SEQUENCES: Dict[str, Tuple[Tuple[str, int, int], ...]] = {
+    "student": (("S{}", 1000, 9999),),
+    "academic": (("{}", 1610000, 1699999), ("{}", 2710000, 2799999)),
+}
+
+
+def register_id_sequence(name: str, ranges: Tuple[Tuple[str, int, int], ...]):
+    """تسجيل (أو استبدال) تسلسل معرفات: ranges = ((القالب، أول قيمة، آخر قيمة), ...)."""
+    if not ranges or any(first > last for _, first, last in ranges):
+        raise ValueError(f"Invalid ranges for ID sequence '{name}'")
+    ID_SEQUENCES[name] = tuple(ranges)
+
+
+def _sequence_candidates(ranges, value: int, count: int) -> Tuple[List[str], Optional[int]]:
+    """
+    أخذ حتى count معرفاً بدءاً من value عبر النطاقات.
+    
+    Returns:
+        (المعرفات المنسقة، القيمة التالية أو None إذا انتهت جميع النطاقات)
+    """
+    ids = []
+    for template, first, last in ranges:
+        if value > last:
+            continue
+        value = max(value, first)
+        take = min(count - len(ids), last - value + 1)
+        ids.extend(template.format(v) for v in range(value, value + take))
+        value += take
+        if len(ids) >= count:
+            return ids, value
+    return ids, None
+
+
+def _existing_user_ids_sql(id_count: int) -> str:
+    placeholders = ",".join("?" * id_count)
+    return f"""
+        SELECT student_id FROM users WHERE student_id IN ({placeholders})
+        UNION SELECT student_id FROM students WHERE student_id IN ({placeholders})
+        UNION SELECT doctor_id FROM doctors WHERE doctor_id IN ({placeholders})
+    """
+
+
+_query("_existing_user_ids", _existing_user_ids_sql(3))
+
+
+def _existing_user_ids(cur, candidates: List[str]) -> set:
+    """المعرفات المستخدمة من بين candidates (حسابات أو طلاب أو أطباء أنشئت قبل التسلسلات)."""
+    used = set()
+    # كل معرف يُربط ثلاث مرات، وblock_size قابل للتغيير
+    for part in _chunked(candidates, SQLITE_MAX_VARIABLES // 3):
+        cur.execute(_existing_user_ids_sql(len(part)), part * 3)
+        used.update(row[0] for row in cur.fetchall())
+    return used
+
+
+_SQL_SEQUENCE_INIT = _query(
+    "IdAllocator.init", "INSERT OR IGNORE INTO id_sequences (name, next_value) VALUES (?, ?)"
+)
+_SQL_SEQUENCE_NEXT = _query("IdAllocator.next", "SELECT next_value FROM id_sequences WHERE name = ?")
+_SQL_SEQUENCE_ADVANCE = _query("IdAllocator.advance", "UPDATE id_sequences SET next_value = ? WHERE name = ?")
+
+
+class IdAllocator:
+    """
+    توزيع معرفات فريدة من جدول id_sequences بدل التجربة العشوائية.
+    
+    الوظيفة:
+        - كل حجز معاملة BEGIN IMMEDIATE واحدة تقدّم next_value بمقدار block_size
+          وتحفظ الكتلة في الذاكرة؛ allocate() تأخذ من الكتلة بدون قاعدة بيانات
+        - المعرفات العشوائية القديمة تُستبعد باستعلام IN واحد لكل كتلة
+        - العمليات الأخرى تحجز كتلاً مختلفة؛ المعرفات غير المستخدمة عند الإغلاق تُترك (فجوات)
+    """
+    
+    def __init__(self, block_size: int = ID_BLOCK_SIZE):
+        self.block_size = max(1, block_size)
+        self._lock = threading.Lock()
+        self._blocks: Dict[str, deque] = {}
+    
+    # + public method
+    def allocate(self, sequence: str) -> str:
+        """
+        المعرف التالي من التسلسل.
+        
+        Raises:
+            KeyError: تسلسل غير مسجل
+            ValueError: انتهت جميع نطاقات التسلسل
+        """
+        ranges = ID_SEQUENCES[sequence]
+        with self._lock:
+            block = self._blocks.setdefault(sequence, deque())
+            if not block:
+                block.extend(self._reserve_block(sequence, ranges))
+            return block.popleft()
+    
+    # + public method
+    def reset(self):
+        """إسقاط الكتل المحجوزة (عند تغيير قاعدة البيانات)."""
+        with self._lock:
+            self._blocks.clear()
+    
+    # _ private method
+    @_pooled
+    def _reserve_block(self, sequence: str, ranges) -> List[str]:
+        conn = _current_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("BEGIN IMMEDIATE;")
+            cur.execute(_SQL_SEQUENCE_INIT, (sequence, ranges[0][1]))
+            cur.execute(_SQL_SEQUENCE_NEXT, (sequence,))
+            value = cur.fetchone()[0]
+            reserved = []
+            while value is not None and len(reserved) < self.block_size:
+                candidates, value = _sequence_candidates(ranges, value, self.block_size - len(reserved))
+                if not candidates:
+                    break
+                used = _existing_user_ids(cur, candidates)
+                reserved.extend(c for c in candidates if c not in used)
+            if not reserved:
+                conn.rollback()
+                raise ValueError(f"ID sequence '{sequence}' is exhausted")
+            # القيمة بعد آخر نطاق تعني الانتهاء
+            next_value = value if value is not None else ranges[-1][2] + 1
+            cur.execute(_SQL_SEQUENCE_ADVANCE, (next_value, sequence))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        return reserved
+
+
+_id_allocator = IdAllocator()
+
+
+def allocate_id(sequence: str) -> str:
+    """معرف فريد جديد من تسلسل مسجل في ID_SEQUENCES (بدون تجربة عشوائية)."""
+    return _id_allocator.allocate(sequence)
+
+
+# ============================================================================
+# QUERY PLAN DIAGNOSTICS (تشخيص خطط الاستعلامات)
+# ============================================================================
+
+# الجمل التي لها خطة تنفيذ (BEGIN/COMMIT/PRAGMA/SAVEPOINT/ANALYZE تُتجاوز)
+_EXPLAINABLE_PREFIXES = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+
+def _plan_entry(name: str, sql: str, params, allow_scan: bool) -> Optional[Dict]:
+    try:
+        plan = _db_manager.explain(sql, params)
+    except sqlite3.Error:
+        return None  # جدول مؤقت أو جدول حُذف بعد التنفيذ
+    scans = [detail for detail in plan if detail.startswith("SCAN")]
+    return {
+        "name": name,
+        "plan": plan,
+        "scans": scans,
+        "temp_sort": any("USE TEMP B-TREE" in detail for detail in plan),
+        "flagged": bool(scans) and not allow_scan,
+    }
+
+
+def explain_query_plans(*stats: QueryStats) -> List[Dict]:
+    """
+    تشغيل EXPLAIN QUERY PLAN على كل استعلامات الوحدة (QUERY_PLAN_CHECKS) بمعاملات فارغة.
+    
+    القائمة الثابتة هي نفس ثوابت SQL التي تنفذها الدوال، فتُفحص كل المسارات حتى دون تشغيل حمل.
+    الجمل المنفذة التي سجلتها طبقة القياس (QueryStats) مصدر إضافي اختياري لما ليس في القائمة.
+    
+    Args:
+        stats: مصادر إضافية للجمل المنفذة (الافتراضي: إحصائيات مدير قاعدة البيانات إن كان القياس مفعلاً)
+    
+    Returns:
+        قائمة {name, plan: [تفاصيل الخطة], scans: [خطوات SCAN], temp_sort: bool, flagged: bool}
+        flagged = مسح كامل لجدول في استعلام لم يُعلَّم allow_scan (كل جملة منفذة خارج القائمة تُعلَّم إن مسحت)
+    """
+    report = []
+    seen = set()
+    for name, sql, allow_scan in QUERY_PLAN_CHECKS:
+        seen.add(_normalize_sql(sql))
+        entry = _plan_entry(name, sql, ("",) * sql.count("?"), allow_scan)
+        if entry is not None:
+            report.append(entry)
+
+    sources = [source for source in (stats or (get_query_stats(),)) if source is not None]
+    for source in sources:
+        for name in source.snapshot():
+            if name in seen or not name.lstrip("( ").upper().startswith(_EXPLAINABLE_PREFIXES):
+                continue
+            seen.add(name)
+            sql, params = source.example(name)
+            if params is None:
+                # executemany لا يحفظ معاملاته: نفس عدد العلامات بقيم فارغة
+                params = (None,) * sql.count("?")
+            entry = _plan_entry(name, sql, params, allow_scan=False)
+            if entry is not None:
+                report.append(entry)
+    return report
+
+
+def format_query_plan_report(report: List[Dict]) -> str:
+    """تقرير نصي: الاستعلامات التي ما زالت تمسح الجداول أولاً."""
+    lines = []
+    for entry in sorted(report, key=lambda e: (not e["flagged"], e["name"])):
+        status = "SCAN" if entry["flagged"] else ("sort" if entry["temp_sort"] else "ok")
+        lines.append(f"[{status:>4}] {entry['name']}: {' | '.join(entry['plan'])}")
+    flagged = sum(1 for entry in report if entry["flagged"])
+    lines.append(f"{flagged} of {len(report)} queries scan a table")
+    return "\n".join(lines)
+
+
 # تصدير الدوال المهمة
 __all__ = [
     'DatabaseManager',
+    'connection',
     'get_connection',
+    'get_pool_stats',
+    'use_database',
+    'add_student_change_listener',
+    'remove_student_change_listener',
+    'QueryStats',
+    'get_query_stats',
+    'enable_query_instrumentation',
+    'slowest_statements_report',
     'DB_NAME',
+    'PERFORMANCE_PROFILES',
+    'DEFAULT_PROFILE',
     'ALLOWED_PROGRAMS',
+    'FIRST_MORNING_HOUR',
     # Student management
     'add_student',
     'get_transcript',
+    'add_course_to_transcript',
+    'backfill_transcript',
+    'load_student_profile',
+    'load_student_profiles',
     'list_students',
     'delete_student_record',
     # Course & Section management
     'fetch_courses_with_sections',
     'upsert_course',
     'course_exists',
+    'find_missing_courses',
     'validate_prerequisites',
     'set_course_prerequisites',
     'delete_course',
@@ -1070,12 +2684,27 @@ __all__ = [
     # Registration management
     'add_registration',
     'remove_registration',
+    'register_student_sections',
+    'bulk_register_sections',
+    'unregister_student_section',
     'get_student_registrations',
     # Program plans management
     'add_course_to_program_plan',
     'remove_course_from_program_plan',
     'get_course_program_plans',
     'remove_all_course_program_plans',
+    'fetch_program_plans',
+    # Bulk catalog import
+    'BULK_CHUNK_SIZE',
+    'CATALOG_KINDS',
+    'bulk_upsert_courses',
+    'bulk_upsert_sections',
+    'bulk_set_prerequisites',
+    'bulk_program_plans',
+    'read_catalog_rows',
+    'load_catalog_json',
+    'detect_catalog_kind',
+    'get_program_plan_version',
     'get_courses_for_program_and_level',
     # Doctor/Faculty management
     'add_doctor',
@@ -1087,5 +2716,21 @@ __all__ = [
     'remove_doctor_assignment',
     'get_doctor_schedule',
     'check_doctor_time_conflict',
+    # ID sequences
+    'ID_BLOCK_SIZE',
+    'ID_SEQUENCES',
+    'IdAllocator',
+    'register_id_sequence',
+    'allocate_id',
+    # Query plan diagnostics
+    'SECONDARY_INDEXES',
+    'QUERY_PLAN_CHECKS',
+    'explain_query_plans',
+    'format_query_plan_report',
 ]
 
+
+if __name__ == "__main__":
+    # فحص خطط كل استعلامات الوحدة على قاعدة البيانات الحالية
+    print(format_query_plan_report(explain_query_plans()))
+
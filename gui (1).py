@@ -50,7 +50,7 @@
         * registration_system.py (User, RegistrationSystem, UserManager, StudentManager)
         * student.py (StudentDashboard)
         * admin.py (AdminDashboard)
-        * database.py (get_connection, add_student)
+        * database.py (connection, add_student)
         * styles.py (apply_shadow, LIGHT_MODE_QSS, DARK_MODE_QSS)
         * PyQt6 (مكتبة الواجهات الرسومية)
     - يستخدمه:
@@ -88,7 +88,6 @@ import sys
 import random
 import re
 import time
-import bcrypt
 import smtplib
 from email.message import EmailMessage
 
@@ -103,20 +102,20 @@ from PyQt6.QtGui import QRegularExpressionValidator
 
 # Import OOP core module
 from registration_system import (
-    User,
+    User, PasswordHasher_registration_system,
     RegistrationSystem_registration_system, UserManager_registration_system, StudentManager_registration_system
 )
 
 # Import database functions
 from database import (
-    get_connection, add_student
+    connection, add_student, allocate_id, register_id_sequence
 )
 
 # Import styles and utilities
 from styles import apply_shadow, LIGHT_MODE_QSS, DARK_MODE_QSS
 
 # Import dashboard modules
-from student import StudentDashboard_DashboardBase_student
+from student import StudentDashboard_DashboardBase_student, DatabaseFacade_QObject_student
 from admin import AdminDashboard_DashboardBase_admin
 
 
@@ -127,51 +126,45 @@ from admin import AdminDashboard_DashboardBase_admin
 def login_user_database_passwordhasher(academic_id, email, password):
     """محاولة تسجيل الدخول من قاعدة بيانات SQLite.
     ترجع dict فيها (id, role, name, email, program, level) أو None إذا فشلت.
-    يدعم كلا النوعين من التشفير: bcrypt و SHA-256 (PasswordHasher).
+    يدعم جميع صيغ PasswordHasher (PBKDF2/scrypt، و bcrypt و SHA-256 القديمة)،
+    ويعيد تشفير الصيغ القديمة بعد التحقق الناجح.
     """
     from registration_system import PasswordHasher_registration_system
     
-    conn = get_connection()
-    cur = conn.cursor()
-    # البحث بالمعرف أو البريد (مثل UserManager.authenticate)
-    # يمكن البحث بالمعرف في حقل المعرف أو البريد، أو بالبريد في أي من الحقلين
-    cur.execute(
-        """
-        SELECT u.student_id,
-               u.role,
-               u.password_hash,
-               COALESCE(s.name, u.display_name),
-               COALESCE(s.email, u.email),
-               s.program,
-               s.level
-        FROM users u
-        LEFT JOIN students s ON u.student_id = s.student_id
-        WHERE (u.student_id = ? OR u.email = ? OR u.student_id = ? OR u.email = ?)
-        """, (academic_id, academic_id, email, email)
-    )
-    row = cur.fetchone()
-    conn.close()
+    with connection() as conn:
+        cur = conn.cursor()
+        # البحث بالمعرف أو البريد (مثل UserManager.authenticate)
+        # يمكن البحث بالمعرف في حقل المعرف أو البريد، أو بالبريد في أي من الحقلين
+        cur.execute(
+            """
+            SELECT u.student_id,
+                   u.role,
+                   u.password_hash,
+                   COALESCE(s.name, u.display_name),
+                   COALESCE(s.email, u.email),
+                   s.program,
+                   s.level,
+                   u.user_id
+            FROM users u
+            LEFT JOIN students s ON u.student_id = s.student_id
+            WHERE (u.student_id = ? OR u.email = ? OR u.student_id = ? OR u.email = ?)
+            """, (academic_id, academic_id, email, email)
+        )
+        row = cur.fetchone()
     
     if not row:
         return None
     
-    user_id, role, stored_password_hash, name, db_email, program, level = row
+    user_id, role, stored_password_hash, name, db_email, program, level, user_pk = row
     
-    # التحقق من كلمة المرور - دعم كلا النوعين
-    password_valid = False
+    # التحقق من كلمة المرور (PasswordHasher يتعرف على الصيغة من التشفير نفسه)
+    password_hasher = PasswordHasher_registration_system()
+    if not password_hasher.verify_password(password, stored_password_hash):
+        return None
     try:
-        # محاولة التحقق باستخدام bcrypt (للكلمات القديمة)
-        if stored_password_hash.startswith('$2b$') or stored_password_hash.startswith('$2a$'):
-            password_valid = bcrypt.checkpw(password.encode(), stored_password_hash.encode())
-        else:
-            # استخدام PasswordHasher (SHA-256) للكلمات الجديدة
-            password_hasher = PasswordHasher_registration_system()
-            password_valid = password_hasher.verify_password(password, stored_password_hash)
+        password_hasher.upgrade_stored_hash(user_pk, password, stored_password_hash)
     except Exception:
-        return None
-    
-    if not password_valid:
-        return None
+        pass  # الدخول صحيح حتى لو فشل التحديث
     
     return {
         "id": user_id,
@@ -183,22 +176,11 @@ def login_user_database_passwordhasher(academic_id, email, password):
     }
 
 
-def user_identifier_exists(identifier):
-    """التحقق من وجود معرف في قاعدة البيانات."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT 1 FROM users WHERE student_id = ? OR email = ?", (identifier, identifier))
-    exists = cur.fetchone() is not None
-    conn.close()
-    return exists
-
-
 def generate_unique_identifier(prefix=""):
-    """توليد معرف فريد."""
-    while True:
-        identifier = f"{prefix}{random.randint(100000, 999999)}"
-        if not user_identifier_exists(identifier):
-            return identifier
+    """توليد معرف فريد (prefix + 6 أرقام) من تسلسل خاص بالبادئة في id_sequences."""
+    sequence = f"identifier:{prefix}"
+    register_id_sequence(sequence, ((prefix + "{}", 100000, 999999),))
+    return allocate_id(sequence)
 
 
 # ============================================================================
@@ -278,11 +260,10 @@ class ForgotPasswordDialog_QDialog_gui(QDialog):
             return
         
         try:
-            conn = get_connection()
-            c = conn.cursor()
-            c.execute("SELECT * FROM users WHERE student_id=? AND email=?", (self.user_id, self.email))
-            user = c.fetchone()
-            conn.close()
+            with connection() as conn:
+                c = conn.cursor()
+                c.execute("SELECT * FROM users WHERE student_id=? AND email=?", (self.user_id, self.email))
+                user = c.fetchone()
             
             if not user:
                 QMessageBox.warning(self, "خطأ", "المعرف أو البريد غير صحيحين!")
@@ -339,11 +320,10 @@ class ForgotPasswordDialog_QDialog_gui(QDialog):
             password_hasher = PasswordHasher_registration_system()
             hashed_pw = password_hasher.hash_password(new_pw)
             
-            conn = get_connection()
-            c = conn.cursor()
-            c.execute("UPDATE users SET password_hash=? WHERE student_id=?", (hashed_pw, self.user_id))
-            conn.commit()
-            conn.close()
+            with connection() as conn:
+                c = conn.cursor()
+                c.execute("UPDATE users SET password_hash=? WHERE student_id=?", (hashed_pw, self.user_id))
+                conn.commit()
             QMessageBox.information(self, "نجاح", "تم تحديث كلمة المرور!")
             self.accept()
         except Exception as e:
@@ -384,6 +364,9 @@ class LoginDialog_QDialog_gui(QDialog):
         self.user_manager = user_manager
         self.current_user = None
         self.is_dark_mode = False
+        # التحقق من كلمة المرور (اشتقاق مفتاح مكلف) في خيط منفصل حتى لا تتجمد النافذة
+        self.db = DatabaseFacade_QObject_student(parent=self)
+        self.db.busy_changed.connect(self.set_busy)
         
         self.setWindowTitle('تسجيل الدخول - نظام ODUS')
         self.setLayoutDirection(Qt.LayoutDirection.RightToLeft)
@@ -502,21 +485,27 @@ class LoginDialog_QDialog_gui(QDialog):
                 QMessageBox.warning(self, 'خطأ', 'البريد الإلكتروني غير صالح!')
                 return
         
+        self.db.submit(
+            self._authenticate, academic_id, email, password,
+            on_done=self.on_login_finished,
+            on_error=lambda e: QMessageBox.critical(self, 'خطأ', f'فشل تسجيل الدخول: {str(e)}')
+        )
+    
+    def _authenticate(self, academic_id: str, email: str, password: str):
+        """التحقق من بيانات الدخول (يعمل في خيط منفصل). Returns: User أو None"""
         # محاولة تسجيل الدخول باستخدام UserManager (يدعم البحث بالمعرف أو البريد)
         # نستخدم المعرف إذا كان موجوداً، وإلا نستخدم البريد
         identifier = academic_id if academic_id else email
         user = self.user_manager.authenticate_user_passwordhasher_accesslogger_registration_system(identifier, password)
         if user:
-            self.current_user = user
-            self.accept()
-            return
+            return user
         
         # محاولة تسجيل الدخول من قاعدة البيانات (للتوافق مع الكود القديم)
         if academic_id and email:
             db_user = login_user_database_passwordhasher(academic_id, email, password)
             if db_user is not None:
                 # إنشاء كائن User من البيانات
-                user = User(
+                return User(
                     user_id=db_user["id"],
                     email=db_user["email"],
                     password_hash="",  # لا نحتاج كلمة المرور بعد التحقق
@@ -524,12 +513,31 @@ class LoginDialog_QDialog_gui(QDialog):
                     display_name=db_user.get("name", ""),
                     mobile=""
                 )
-                self.current_user = user
-                self.accept()
-                return
-        
+        return None
+    
+    def on_login_finished(self, user):
+        """نتيجة التحقق (في خيط الواجهة)"""
+        if user:
+            self.current_user = user
+            self.accept()
+            return
         QMessageBox.warning(self, 'خطأ', 'المعرف أو البريد الإلكتروني أو كلمة المرور غير صحيحة')
     
+    def set_busy(self, busy: bool):
+        """تعطيل الأزرار وإظهار مؤشر الانتظار أثناء التحقق"""
+        self.login_button.setEnabled(not busy)
+        self.register_button.setEnabled(not busy)
+        self.login_button.setText('جارٍ التحقق...' if busy else 'تسجيل الدخول')
+        if busy:
+            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        else:
+            QApplication.restoreOverrideCursor()
+    
+    def done(self, result):
+        """إيقاف خيط التحقق عند إغلاق النافذة"""
+        self.db.shutdown(wait=False)
+        super().done(result)
+    
     def handle_register(self):
         """Handle student registration."""
         dialog = RegisterWindow_QDialog_gui(role='student', user_manager=self.user_manager, parent=self)
@@ -626,22 +634,6 @@ class RegisterWindow_QDialog_gui(QDialog):
             return
         
         if self.role == 'student':
-            # Generate unique student ID (7 digits, starts with 16 or 27)
-            user_id = None
-            max_attempts = 1000
-            attempts = 0
-            while user_id is None and attempts < max_attempts:
-                # Generate ID starting with 16 or 27
-                prefix = random.choice(['16', '27'])
-                candidate_id = f"{prefix}{random.randint(10000, 99999)}"
-                if not user_identifier_exists(candidate_id):
-                    user_id = candidate_id
-                attempts += 1
-            
-            if user_id is None:
-                QMessageBox.critical(self, 'خطأ', 'فشل توليد معرف فريد. يرجى المحاولة مرة أخرى.')
-                return
-            
             # Validate password
             if not (len(new_password) >= 8 and any(c.isdigit() for c in new_password) and any(c.isalpha() for c in new_password)):
                 QMessageBox.warning(self, 'خطأ', 'كلمة المرور يجب أن تحتوي على 8+ خانات، أرقام، وحروف.')
@@ -663,6 +655,14 @@ class RegisterWindow_QDialog_gui(QDialog):
             except Exception:
                 level_int = 1
             
+            # Generate unique student ID (7 digits, starts with 16 or 27) after validation,
+            # so rejected forms do not consume IDs
+            try:
+                user_id = allocate_id("academic")
+            except ValueError:
+                QMessageBox.critical(self, 'خطأ', 'فشل توليد معرف فريد. يرجى المحاولة مرة أخرى.')
+                return
+            
             # Add student to database
             db_message = add_student(user_id, name, email, program_for_db, level_int)
             if not db_message.startswith("✅"):
@@ -706,12 +706,26 @@ class MainApp_QApplication_gui(QApplication):
         super().__init__(argv)
         self.setStyleSheet(LIGHT_MODE_QSS)
         
+        # معايرة تكلفة تشفير كلمات المرور مرة واحدة عند بدء التشغيل
+        PasswordHasher_registration_system.calibrate()
+        
         self.registration_system = RegistrationSystem_registration_system()
         self.user_manager = UserManager_registration_system()
         self.student_manager = StudentManager_registration_system()
     
     def run(self):
         """Main application loop."""
+        try:
+            self._run_sessions()
+        finally:
+            # كتابة سجلات الدخول وتحديثات الجلسات المنتظرة قبل الخروج
+            # (المدير والمسجل مشتركان بين كل UserManager، فيُغلقان مرة واحدة هنا)
+            self.user_manager.session_manager.close()
+            self.user_manager.access_logger.close()
+        sys.exit(0)
+    
+    def _run_sessions(self):
+        """Show login/dashboards until the user quits."""
         while True:
             # Show login dialog
             login = LoginDialog_QDialog_gui(self.user_manager)
@@ -750,8 +764,6 @@ class MainApp_QApplication_gui(QApplication):
                 
                 if exit_code != 100:  # Not logout
                     break
-        
-        sys.exit(0)
 
 
 # ============================================================================
@@ -39,9 +39,9 @@
     4. PASSWORD & SECURITY (الأمان وكلمات المرور)
     ============================================================================
     - PasswordValidator: يتحقق من قوة كلمة المرور
-    - PasswordHasher: يشفر كلمات المرور
+    - PasswordHasher: يشفر كلمات المرور (PBKDF2/scrypt بتكلفة معايرة، مع دعم الصيغ القديمة)
     - SessionManager: يدير الجلسات والرموز (Tokens)
-    - AccessLogger: يسجل محاولات الدخول والأحداث
+    - AccessLogger: يسجل محاولات الدخول والأحداث (مخزن مؤقت يُكتب على دفعات)
     
     ============================================================================
     5. REGISTRATION SYSTEM (نظام التسجيل)
@@ -52,6 +52,7 @@
     6. USER MANAGEMENT (إدارة المستخدمين)
     ============================================================================
     - UserManager: يدير المستخدمين والمصادقة
+    - StudentCache: ذاكرة مؤقتة LRU + TTL لملفات الطلاب (تُبطَل عند الكتابة)
     - StudentManager: يدير بيانات الطلاب
     
 العلاقات مع الملفات الأخرى:
@@ -86,14 +87,26 @@
 """
 
 import sqlite3
+import bisect
+import itertools
 import hashlib
+import heapq
 import secrets
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass, field
+import threading
+import time
+import atexit
+import weakref
+from collections import OrderedDict, deque
+from typing import List, Dict, Iterable, Iterator, Optional, Set, Tuple
+from dataclasses import dataclass, field, replace
 from datetime import datetime
 
 import database 
-from database import get_connection, get_courses_for_program_and_level
+
+try:
+    import bcrypt  # اختياري: للتحقق من كلمات المرور القديمة المشفرة بـ bcrypt
+except ImportError:
+    bcrypt = None
 
 
 # ============================================================================
@@ -274,6 +287,47 @@ class Student:
             self.transcript.append(course_code)
 
 
+# أيام الأسبوع بالترتيب المستخدم في section.days وفي واجهة المدير
+WEEK_DAYS = ('الأحد', 'الإثنين', 'الثلاثاء', 'الأربعاء', 'الخميس', 'الجمعة', 'السبت')
+HOURS_PER_DAY = 24
+# الأوقات المسجلة قبل الساعة 8 تعني بعد الظهر (مثل "من 2 إلى 4" و "من 12 إلى 1")
+FIRST_MORNING_HOUR = database.FIRST_MORNING_HOUR
+
+
+def week_mask_for_slot(days: str, start_time: int, end_time: int) -> int:
+    """
+    بناء قناع أسبوعي (bitmask) لفترة زمنية: البت (day * 24 + hour) يعني أن الساعة مشغولة.
+    
+    - days فارغ يعني جميع الأيام (سلوك المقارنة القديم الذي يتجاهل الأيام)
+    - الساعات الأقل من FIRST_MORNING_HOUR تُحوَّل إلى نظام 24 ساعة (+12)
+    """
+    if start_time < FIRST_MORNING_HOUR:
+        start_time += 12
+    if end_time < FIRST_MORNING_HOUR:
+        end_time += 12
+    if end_time <= start_time:
+        return 0
+    
+    hours = ((1 << (end_time - start_time)) - 1) << start_time
+    day_names = [day.strip() for day in (days or '').split(',') if day.strip()]
+    day_indexes = [WEEK_DAYS.index(day) for day in day_names if day in WEEK_DAYS]
+    if not day_indexes:
+        day_indexes = range(len(WEEK_DAYS))
+    
+    mask = 0
+    for day_index in day_indexes:
+        mask |= hours << (day_index * HOURS_PER_DAY)
+    return mask
+
+
+def combined_week_mask(sections: List['Section']) -> int:
+    """دمج أقنعة مجموعة شعب (OR) في قناع واحد لفحص التعارض مع جدول كامل."""
+    mask = 0
+    for section in sections:
+        mask |= section.week_mask
+    return mask
+
+
 @dataclass
 class Section:
     """Represents a specific section of a course."""
@@ -286,15 +340,24 @@ class Section:
     max_capacity: int
     current_enrollment: int = 0
     days: str = ''  # أيام الأسبوع (مثل: "الأحد,الثلاثاء,الخميس")
+    # قناع الإشغال الأسبوعي (محسوب من days و start_time/end_time)
+    week_mask: int = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        """Precompute the weekly occupancy bitmask."""
+        self.week_mask = week_mask_for_slot(self.days, self.start_time, self.end_time)
     
     def is_full(self) -> bool:
         """Check if section is at capacity."""
         return self.current_enrollment >= self.max_capacity
     
     def has_time_conflict_section(self, other: 'Section') -> bool:
-        """Check if this section conflicts with another section's time."""
-        return not (self.end_time <= other.start_time or 
-                    self.start_time >= other.end_time)
+        """Check if this section conflicts with another section's time (same day and overlapping hours)."""
+        return bool(self.week_mask & other.week_mask)
+    
+    def conflicts_with_mask(self, schedule_mask: int) -> bool:
+        """Check this section against a combined schedule mask (see combined_week_mask)."""
+        return bool(self.week_mask & schedule_mask)
 
 
 # ============================================================================
@@ -473,6 +536,229 @@ class User:
         return self.role == 'student'
 
 
+# ============================================================================
+# PREREQUISITE GRAPH (OOP Design)
+# ============================================================================
+
+class PrerequisiteGraph_registration_system:
+    """
+    رسم بياني للمتطلبات السابقة (course -> prerequisites).
+    
+    الوظيفة:
+        - كشف الدورات (Cycles) قبل حفظ متطلبات مقرر
+        - ترتيب طوبولوجي للمقررات (المتطلب قبل المقرر)
+        - إغلاق متعدٍّ (Transitive Closure) مخزّن كـ bitmask لكل مقرر
+        - استعلام جماعي: ما المقررات التي يستطيع الطالب التسجيل فيها؟
+    
+    التمثيل:
+        كل مقرر يأخذ رقم بت ثابت؛ المتطلبات المباشرة والإغلاق المتعدي أعداد صحيحة
+        (bitmask) فيصبح فحص "هل أكمل الطالب كل المتطلبات" عملية AND واحدة.
+    
+    الإبطال التدريجي:
+        عند تغيير متطلبات مقرر يُحذف الإغلاق المخزّن لهذا المقرر ولكل من يعتمد عليه
+        (عبر الحواف العكسية _dependents) فقط، دون إعادة بناء الرسم كاملاً.
+    
+    الربط:
+        - يُبنى في RegistrationSystem.refresh_cache() من Course.prerequisites
+          (المحمّلة من جدول prerequisites)
+        - يُحدَّث من RegistrationSystem.add_course() / delete_course()
+    """
+    
+    def __init__(self, prerequisites: Optional[Dict[str, List[str]]] = None):
+        """Build the graph from {course_code: [prereq_code, ...]}."""
+        # _ private attribute: رقم البت لكل مقرر
+        self._bit_index: Dict[str, int] = {}
+        # _ private attribute: المتطلبات المباشرة
+        self._prereqs: Dict[str, Set[str]] = {}
+        # _ private attribute: الحواف العكسية (المقررات التي تعتمد على المقرر)
+        self._dependents: Dict[str, Set[str]] = {}
+        # _ private attribute: قناع المتطلبات المباشرة
+        self._direct_masks: Dict[str, int] = {}
+        # _ private attribute: الإغلاق المتعدي المخزّن (يُحسب عند الطلب)
+        self._closure_masks: Dict[str, int] = {}
+        
+        for course_code, prereq_codes in (prerequisites or {}).items():
+            self._set_edges(course_code, prereq_codes)
+    
+    # _ private method
+    def _bit(self, course_code: str) -> int:
+        """رقم البت الخاص بالمقرر (يُخصص عند أول ظهور)."""
+        index = self._bit_index.get(course_code)
+        if index is None:
+            index = len(self._bit_index)
+            self._bit_index[course_code] = index
+        return 1 << index
+    
+    # _ private method
+    def _mask_of(self, course_codes) -> int:
+        mask = 0
+        for course_code in course_codes:
+            mask |= self._bit(course_code)
+        return mask
+    
+    # _ private method
+    def _existing_mask_of(self, course_codes) -> int:
+        """قناع للاستعلامات: المقررات بلا بت لا تظهر في أي قناع متطلبات فتُتجاهل (لا يُخصص بت)."""
+        mask = 0
+        for course_code in course_codes:
+            index = self._bit_index.get(course_code)
+            if index is not None:
+                mask |= 1 << index
+        return mask
+    
+    # _ private method
+    def _set_edges(self, course_code: str, prereq_codes: List[str]):
+        """استبدال الحواف الخارجة من مقرر دون فحص الدورات."""
+        self._bit(course_code)
+        for old_prereq in self._prereqs.get(course_code, ()):
+            self._dependents.get(old_prereq, set()).discard(course_code)
+        
+        new_prereqs = set(prereq_codes)
+        self._prereqs[course_code] = new_prereqs
+        for prereq_code in new_prereqs:
+            self._dependents.setdefault(prereq_code, set()).add(course_code)
+        self._direct_masks[course_code] = self._mask_of(new_prereqs)
+    
+    # _ private method
+    def _invalidate(self, course_code: str):
+        """حذف الإغلاق المخزّن للمقرر ولكل المقررات التي تعتمد عليه (مباشرة أو بشكل متعدٍّ)."""
+        pending = [course_code]
+        seen = set()
+        while pending:
+            code = pending.pop()
+            if code in seen:
+                continue
+            seen.add(code)
+            self._closure_masks.pop(code, None)
+            pending.extend(self._dependents.get(code, ()))
+    
+    # _ private method
+    def _closure_mask(self, course_code: str) -> int:
+        """الإغلاق المتعدي كـ bitmask (مع التخزين المؤقت). الدورات الموجودة مسبقاً لا تسبب حلقة لا نهائية."""
+        cached = self._closure_masks.get(course_code)
+        if cached is not None:
+            return cached
+        
+        # DFS تكراري: يتجنب حد العمق ويتحمل البيانات القديمة التي قد تحتوي دورات
+        in_progress = {course_code}
+        stack = [(course_code, iter(self._prereqs.get(course_code, ())))]
+        while stack:
+            code, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                in_progress.discard(code)
+                mask = self._direct_masks.get(code, 0)
+                for prereq_code in self._prereqs.get(code, ()):
+                    mask |= self._closure_masks.get(prereq_code, 0)
+                self._closure_masks[code] = mask
+            elif child not in self._closure_masks and child not in in_progress:
+                in_progress.add(child)
+                stack.append((child, iter(self._prereqs.get(child, ()))))
+        return self._closure_masks[course_code]
+    
+    # _ private method
+    def _codes_of(self, mask: int) -> List[str]:
+        return sorted(code for code, index in self._bit_index.items() if mask >> index & 1)
+    
+    # + public method
+    def find_cycle(self, course_code: str, prereq_codes: List[str]) -> Optional[str]:
+        """
+        فحص ما إذا كان تعيين prereq_codes كمتطلبات لـ course_code سيُنشئ دورة.
+        Returns: رمز المتطلب الذي يسبب الدورة أو None
+        """
+        course_bit = self._existing_mask_of((course_code,))
+        for prereq_code in prereq_codes:
+            if prereq_code == course_code:
+                return prereq_code
+            if self._closure_mask(prereq_code) & course_bit:
+                return prereq_code
+        return None
+    
+    # + public method
+    def set_prerequisites(self, course_code: str, prereq_codes: List[str]):
+        """
+        تعيين المتطلبات المباشرة لمقرر مع كشف الدورات والإبطال التدريجي.
+        Raises: ValueError إذا كان التعيين سيُنشئ دورة
+        """
+        cycle_prereq = self.find_cycle(course_code, prereq_codes)
+        if cycle_prereq is not None:
+            raise ValueError(
+                f"Prerequisite '{cycle_prereq}' would create a cycle with '{course_code}'."
+            )
+        self._set_edges(course_code, prereq_codes)
+        self._invalidate(course_code)
+    
+    # + public method
+    def remove_course(self, course_code: str):
+        """حذف المتطلبات الخارجة من مقرر محذوف (مطابق لـ ON DELETE CASCADE)."""
+        if course_code not in self._prereqs:
+            return
+        self._set_edges(course_code, [])
+        self._invalidate(course_code)
+        del self._prereqs[course_code]
+        del self._direct_masks[course_code]
+    
+    # + public method
+    def get_prerequisites(self, course_code: str) -> List[str]:
+        """المتطلبات المباشرة (مرتبة)."""
+        return sorted(self._prereqs.get(course_code, ()))
+    
+    # + public method
+    def get_all_prerequisites(self, course_code: str) -> List[str]:
+        """جميع المتطلبات المباشرة وغير المباشرة (الإغلاق المتعدي، مرتبة)."""
+        return self._codes_of(self._closure_mask(course_code))
+    
+    # + public method
+    def topological_order(self) -> List[str]:
+        """
+        ترتيب طوبولوجي (Kahn): كل متطلب يظهر قبل المقررات التي تعتمد عليه.
+        Raises: ValueError إذا احتوى الرسم على دورة
+        """
+        courses = set(self._prereqs) | set(self._dependents)
+        remaining = {code: len(self._prereqs.get(code, ())) for code in courses}
+        # كومة صغرى: أصغر رمز جاهز أولاً (ترتيب ثابت) في O((n+e) log n)
+        ready = [code for code, count in remaining.items() if count == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            code = heapq.heappop(ready)
+            order.append(code)
+            for dependent in self._dependents.get(code, ()):
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    heapq.heappush(ready, dependent)
+        if len(order) != len(courses):
+            raise ValueError("Prerequisite graph contains a cycle")
+        return order
+    
+    # + public method
+    def missing_prerequisites(self, course_code: str, transcript: List[str]) -> List[str]:
+        """المتطلبات المباشرة غير المكتملة (نفس دلالة Course.check_prerequisites_transcript)."""
+        missing_mask = self._direct_masks.get(course_code, 0) & ~self._existing_mask_of(transcript)
+        return self._codes_of(missing_mask) if missing_mask else []
+    
+    # + public method
+    def eligible_courses(self, transcript: List[str], candidates: Optional[List[str]] = None) -> List[str]:
+        """
+        استعلام جماعي: المقررات غير المكتملة التي اكتملت جميع متطلباتها المباشرة.
+        
+        Args:
+            transcript: المقررات المكتملة
+            candidates: تقييد النتيجة بهذه المقررات (افتراضياً جميع المقررات)
+        
+        Returns: رموز المقررات المؤهلة مرتبة
+        """
+        completed = set(transcript)
+        completed_mask = self._existing_mask_of(completed)
+        codes = self._prereqs.keys() if candidates is None else candidates
+        return sorted(
+            code for code in codes
+            if code not in completed
+            and not self._direct_masks.get(code, 0) & ~completed_mask
+        )
+
+
 # ============================================================================
 # REGISTRATION SYSTEM CLASS (As specified in project requirements)
 # ============================================================================
@@ -507,7 +793,7 @@ class RegistrationSystem_registration_system:
         
         الربط:
             - يستخدم database.fetch_courses_with_sections() (من database.py) لجلب البيانات
-            - يستخدم database.get_courses_for_program_and_level() لتصفية المقررات حسب البرنامج والمستوى
+            - يستخدم database.fetch_program_plans() لبناء فهرس (البرنامج، المستوى) في الذاكرة
         """
         # التخزين المؤقت للمقررات والشعب (Cache)
         # يتم تحميله من قاعدة البيانات عند الإنشاء وعند التحديث
@@ -515,6 +801,18 @@ class RegistrationSystem_registration_system:
         self._course_cache: Dict[str, Course] = {}
         # _ private attribute
         self._section_cache: Dict[str, Section] = {}
+        # _ private attribute: فهرس ثانوي للشعب حسب المقرر (مرتبة حسب section_id)
+        self._sections_by_course: Dict[str, List[Section]] = {}
+        # _ private attribute: فهرس program_plans {(program, level): [course_code مرتبة]}
+        self._plan_index: Dict[Tuple[str, int], List[str]] = {}
+        # _ private attribute: إصدار program_plans الذي بُني منه الفهرس (None = غير محمّل)
+        self._plan_index_version: Optional[int] = None
+        # _ private attribute: رسم المتطلبات السابقة (يُبنى في refresh_cache)
+        self._prereq_graph = PrerequisiteGraph_registration_system()
+        
+        # _ private attribute: يحمي التخزين المؤقت؛ خيط قاعدة البيانات في الواجهة يكتب فيه
+        # بينما يقرأ خيط الواجهة (القراءات تُرجع نسخاً، وrefresh_cache يستبدل القواميس كاملة)
+        self._cache_lock = threading.RLock()
         
         # ملاحظة: تم إزالة حدود الساعات المعتمدة - الطلاب يمكنهم التسجيل لأي عدد من الساعات
         
@@ -531,10 +829,11 @@ class RegistrationSystem_registration_system:
             (Cache) لتحسين الأداء وتقليل عمليات قاعدة البيانات.
         
         التدفق:
-            1. جلب البيانات من قاعدة البيانات عبر database.fetch_courses_with_sections()
-            2. مسح التخزين المؤقت الحالي
-            3. تحويل البيانات إلى كائنات Course و Section
-            4. تخزينها في التخزين المؤقت
+            1. load_cache(): جلب البيانات وبناء قواميس جديدة (بدون لمس التخزين الحالي)
+            2. apply_cache(): استبدال التخزين المؤقت بها دفعة واحدة تحت القفل
+        
+        من الواجهة: load_cache() في خيط قاعدة البيانات ثم apply_cache() في on_done
+        (انظر student.py - StudentDashboard.load_data()).
         
         الربط:
             - يستخدم database.fetch_courses_with_sections() (من database.py)
@@ -542,20 +841,32 @@ class RegistrationSystem_registration_system:
             - يُستدعى من: __init__() و بعد إضافة/تحديث/حذف المقررات
         
         يُستدعى من:
-            - __init__() (السطر 615) - عند بدء النظام
-            - بعد add_course(), delete_course(), add_section(), delete_section()
-            - من student.py - StudentDashboard.load_data() عند الضغط على "تحديث"
+            - __init__() - عند بدء النظام
+            - import_catalog() - بعد الاستيراد (الاستبدال تحت القفل آمن من خيط الخلفية)
+        
+        ملاحظة:
+            عمليات الإضافة/الحذف/التسجيل لا تعيد التحميل الكامل، بل تحدّث العناصر
+            المتأثرة فقط (_cache_put_course, _cache_put_section, ...). هذه الدالة
+            تبقى كخيار احتياطي صريح لإعادة المزامنة الكاملة مع قاعدة البيانات.
+        """
+        self.apply_cache(self.load_cache())
+    
+    # + public method
+    def load_cache(self) -> Tuple[Dict[str, Course], Dict[str, Section], Dict[str, List[Section]],
+                                  PrerequisiteGraph_registration_system]:
+        """
+        جلب المقررات والشعب من قاعدة البيانات وبناء تخزين مؤقت جديد دون تعديل الحالي
+        (آمنة في خيط الخلفية). Returns: لقطة تُمرر إلى apply_cache()
         """
         # جلب جميع المقررات والشعب والمتطلبات السابقة من قاعدة البيانات
         data = database.fetch_courses_with_sections()
-        
-        # مسح التخزين المؤقت الحالي
-        self._course_cache.clear()
-        self._section_cache.clear()
+        course_cache: Dict[str, Course] = {}
+        section_cache: Dict[str, Section] = {}
+        sections_by_course: Dict[str, List[Section]] = {}
         
         # تحويل البيانات إلى كائنات Course وتخزينها في التخزين المؤقت
         for course_code, course_data in data.items():
-            course = Course(
+            course_cache[course_code] = Course(
                 course_code=course_code,
                 name=course_data['name'],
                 credits=course_data['credit_hours'],
@@ -563,9 +874,10 @@ class RegistrationSystem_registration_system:
                 lab_hours=course_data.get('lab_hours', 0),
                 prerequisites=course_data.get('prerequisites', [])
             )
-            self._course_cache[course_code] = course
             
             # تحويل الشعب إلى كائنات Section وتخزينها
+            # (الشعب تصل مرتبة حسب section_id من fetch_courses_with_sections)
+            course_sections = sections_by_course.setdefault(course_code, [])
             for section_data in course_data.get('sections', []):
                 section = Section(
                     section_id=section_data['id'],
@@ -578,15 +890,146 @@ class RegistrationSystem_registration_system:
                     current_enrollment=section_data.get('current_enrollment', 0),
                     days=section_data.get('days', '')
                 )
-                self._section_cache[section_data['id']] = section
+                section_cache[section_data['id']] = section
+                course_sections.append(section)
+        
+        # بناء رسم المتطلبات السابقة من المقررات المحمّلة
+        prereq_graph = PrerequisiteGraph_registration_system(
+            {code: course.prerequisites for code, course in course_cache.items()}
+        )
+        return course_cache, section_cache, sections_by_course, prereq_graph
+    
+    # + public method
+    def apply_cache(self, snapshot: Tuple[Dict[str, Course], Dict[str, Section], Dict[str, List[Section]],
+                                          PrerequisiteGraph_registration_system]):
+        """استبدال التخزين المؤقت بلقطة من load_cache() (القراءات الجارية تكمل على القواميس القديمة)."""
+        with self._cache_lock:
+            self._course_cache, self._section_cache, self._sections_by_course, self._prereq_graph = snapshot
+            # فهرس الخطط يُعاد تحميله عند أول استخدام
+            self._plan_index_version = None
+    
+    # _ private method
+    def _cache_put_course(self, course: Course):
+        """إضافة/استبدال مقرر واحد في التخزين المؤقت (Write-through)."""
+        with self._cache_lock:
+            self._course_cache[course.course_code] = course
+            self._prereq_graph.set_prerequisites(course.course_code, course.prerequisites)
+    
+    # _ private method
+    def _cache_remove_course(self, course_code: str):
+        """حذف مقرر وشعبه من التخزين المؤقت (مطابق لـ ON DELETE CASCADE)."""
+        with self._cache_lock:
+            self._course_cache.pop(course_code, None)
+            self._prereq_graph.remove_course(course_code)
+            for section in self._sections_by_course.pop(course_code, []):
+                self._section_cache.pop(section.section_id, None)
+    
+    # _ private method
+    def _cache_put_section(self, section: Section):
+        """إضافة/استبدال شعبة واحدة في التخزين المؤقت والفهرس حسب المقرر."""
+        with self._cache_lock:
+            self._cache_remove_section(section.section_id)
+            self._section_cache[section.section_id] = section
+            bisect.insort(
+                self._sections_by_course.setdefault(section.course_code, []),
+                section,
+                key=lambda s: s.section_id,
+            )
+    
+    # _ private method
+    def _cache_remove_section(self, section_id: str):
+        """حذف شعبة واحدة من التخزين المؤقت والفهرس حسب المقرر."""
+        with self._cache_lock:
+            section = self._section_cache.pop(section_id, None)
+            if not section:
+                return
+            bucket = self._sections_by_course.get(section.course_code)
+            if bucket is not None:
+                # قائمة جديدة بدل التعديل في مكانها (get_sections_for_course قد تنسخ القديمة)
+                self._sections_by_course[section.course_code] = [s for s in bucket if s.section_id != section_id]
+    
+    # _ private method
+    def _cache_adjust_enrollment(self, section_ids: List[str], delta: int):
+        """تعديل عدد المسجلين في الشعب المتأثرة فقط بعد نجاح المعاملة."""
+        with self._cache_lock:
+            for section_id in section_ids:
+                section = self._section_cache.get(section_id)
+                if section:
+                    section.current_enrollment = max(0, section.current_enrollment + delta)
     
     def get_course(self, course_code: str) -> Optional[Course]:
         """Get course by code."""
-        return self._course_cache.get(course_code)
+        with self._cache_lock:
+            return self._course_cache.get(course_code)
+    
+    # + public method
+    def get_courses(self) -> List[Course]:
+        """نسخة من قائمة المقررات في التخزين المؤقت (بترتيب التحميل)."""
+        with self._cache_lock:
+            return list(self._course_cache.values())
     
     def get_section(self, section_id: str) -> Optional[Section]:
         """Get section by ID."""
-        return self._section_cache.get(section_id)
+        with self._cache_lock:
+            return self._section_cache.get(section_id)
+    
+    # _ private method
+    def _get_plan_course_codes(self, program: str, level: int) -> List[str]:
+        """
+        رموز المقررات لبرنامج ومستوى من فهرس program_plans في الذاكرة.
+        يُعاد بناء الفهرس (استعلام واحد) فقط عندما يتغير database.get_program_plan_version().
+        """
+        version = database.get_program_plan_version()
+        with self._cache_lock:
+            if self._plan_index_version == version:
+                return self._plan_index.get((program, level), [])
+        plan_index = database.fetch_program_plans()
+        with self._cache_lock:
+            self._plan_index = plan_index
+            self._plan_index_version = version
+        return plan_index.get((program, level), [])
+    
+    # + public method
+    def find_missing_courses(self, course_codes: List[str]) -> List[str]:
+        """
+        رموز المقررات غير الموجودة (بنفس الترتيب).
+        تُجاب من التخزين المؤقت؛ فقط الرموز غير الموجودة فيه تُتحقق منها قاعدة البيانات
+        باستعلام واحد (قد تكون أضيفت من عملية أخرى بعد آخر تحديث).
+        """
+        with self._cache_lock:
+            not_cached = [code for code in course_codes if code not in self._course_cache]
+        if not not_cached:
+            return []
+        return database.find_missing_courses(not_cached)
+    
+    # + public method
+    def get_prerequisite_graph(self) -> PrerequisiteGraph_registration_system:
+        """رسم المتطلبات السابقة المبني من التخزين المؤقت."""
+        with self._cache_lock:
+            return self._prereq_graph
+    
+    # + public method
+    def get_eligible_courses(self, student: Student, candidates: Optional[List[Course]] = None) -> List[Course]:
+        """
+        المقررات التي يستطيع الطالب التسجيل فيها (غير مكتملة ومتطلباتها مكتملة).
+        
+        Args:
+            student: الطالب (يُستخدم transcript)
+            candidates: تقييد البحث بقائمة مقررات (مثل ناتج get_available_courses)
+        """
+        candidate_codes = None if candidates is None else [c.course_code for c in candidates]
+        with self._cache_lock:
+            eligible = self._prereq_graph.eligible_courses(student.transcript, candidate_codes)
+            return [self._course_cache[code] for code in eligible if code in self._course_cache]
+    
+    # + public method
+    def get_sections_for_course(self, course_code: str) -> List[Section]:
+        """
+        جلب شعب مقرر واحد من الفهرس الثانوي (O(k) بدلاً من المرور على جميع الشعب).
+        Returns: قائمة جديدة من كائنات Section مرتبة حسب section_id
+        """
+        with self._cache_lock:
+            return list(self._sections_by_course.get(course_code, ()))
     
     def get_available_courses(self, program: str, level: int) -> List[Course]:
         """
@@ -597,9 +1040,8 @@ class RegistrationSystem_registration_system:
             تعتمد على جدول program_plans الذي يحدده المدير، وليس على نمط الكود.
         
         التدفق:
-            1. جلب رموز المقررات من جدول program_plans للبرنامج والمستوى المحدد
+            1. جلب رموز المقررات (مرتبة) من فهرس program_plans في الذاكرة
             2. جلب كائنات المقررات من التخزين المؤقت بناءً على الرموز
-            3. ترتيب المقررات حسب الرمز للعرض الموحد
         
         معايير التصفية:
             - يتم تحديد المقررات المتاحة لكل برنامج ومستوى من قبل المدير
@@ -607,7 +1049,7 @@ class RegistrationSystem_registration_system:
             - لا يوجد اعتماد على نمط الكود (مثل "110" للمستوى 1)
         
         الربط:
-            - يستخدم database.get_courses_for_program_and_level() لجلب المقررات من program_plans
+            - يستخدم self._get_plan_course_codes() (فهرس program_plans في الذاكرة)
             - يستخدم self._course_cache (التخزين المؤقت)
             - يُستدعى من: student.py - StudentDashboard.load_available_courses()
         
@@ -622,19 +1064,17 @@ class RegistrationSystem_registration_system:
         if program == 'Communications':
             program = 'Comm'
         
-        # جلب رموز المقررات المتاحة للبرنامج والمستوى من جدول program_plans
+        # جلب رموز المقررات المتاحة للبرنامج والمستوى من فهرس program_plans
         # هذا يعتمد على ما حدده المدير، وليس على نمط الكود
-        available_course_codes = get_courses_for_program_and_level(program, level)
-        
-        # جلب كائنات المقررات من التخزين المؤقت
-        filtered_courses = []
-        for course_code in available_course_codes:
-            course = self._course_cache.get(course_code)
-            if course:
-                filtered_courses.append(course)
+        available_course_codes = self._get_plan_course_codes(program, level)
         
-        # ترتيب المقررات حسب الرمز للعرض الموحد
-        return sorted(filtered_courses, key=lambda c: c.course_code)
+        # جلب كائنات المقررات من التخزين المؤقت (الرموز مرتبة مسبقاً في الفهرس)
+        with self._cache_lock:
+            return [
+                self._course_cache[course_code]
+                for course_code in available_course_codes
+                if course_code in self._course_cache
+            ]
     
     # + public method
     def add_course(self, course: Course):
@@ -645,15 +1085,19 @@ class RegistrationSystem_registration_system:
         """
         # Validate prerequisites exist in the system
         if course.prerequisites:
-            all_valid, invalid_codes = database.validate_prerequisites(course.prerequisites)
-            if not all_valid:
+            invalid_codes = self.find_missing_courses(course.prerequisites)
+            if invalid_codes:
                 raise ValueError(f"Prerequisite '{invalid_codes[0]}' is not a valid course.")
+            
+            # منع الدورات (مثل A يتطلب B و B يتطلب A) قبل أي كتابة في قاعدة البيانات
+            with self._cache_lock:
+                cycle_prereq = self._prereq_graph.find_cycle(course.course_code, course.prerequisites)
+            if cycle_prereq is not None:
+                raise ValueError(
+                    f"Prerequisite '{cycle_prereq}' would create a cycle with '{course.course_code}'."
+                )
         
-        # Check if course code already exists (for new courses only)
-        # Note: upsert_course uses ON CONFLICT, so we check separately for new entries
-        if database.course_exists(course.course_code):
-            # Course exists - this is an update, which is allowed
-            pass
+        # Note: upsert_course uses ON CONFLICT, so updating an existing course is allowed
         
         # Save course to database
         database.upsert_course(
@@ -667,14 +1111,19 @@ class RegistrationSystem_registration_system:
         # Save prerequisites
         if course.prerequisites:
             database.set_course_prerequisites(course.course_code, course.prerequisites)
+            prerequisites = list(course.prerequisites)
+        else:
+            # المتطلبات القديمة تبقى في قاعدة البيانات إذا لم تُحدد متطلبات جديدة
+            existing = self.get_course(course.course_code)
+            prerequisites = list(existing.prerequisites) if existing else []
         
-        self.refresh_cache()
+        self._cache_put_course(replace(course, prerequisites=prerequisites))
     
     # + public method
     def delete_course(self, course_code: str):
         """Delete a course from the database."""
         database.delete_course(course_code)
-        self.refresh_cache()
+        self._cache_remove_course(course_code)
     
     # + public method
     def add_section(self, section: Section):
@@ -690,13 +1139,89 @@ class RegistrationSystem_registration_system:
             section.current_enrollment,
             section.days
         )
-        self.refresh_cache()
+        self._cache_put_section(section)
     
     # + public method
     def delete_section(self, section_id: str):
         """Delete a section from the database."""
         database.delete_section(section_id)
-        self.refresh_cache()
+        self._cache_remove_section(section_id)
+    
+    # + public method
+    def import_catalog(self, sources: Dict[str, Iterable]) -> Dict[str, Tuple[int, List[str]]]:
+        """
+        استيراد كتالوج كامل دفعة واحدة (بدلاً من حفظ كل مقرر/شعبة من النموذج).
+        
+        Args:
+            sources: {'courses': rows, 'sections': rows, 'prerequisites': rows,
+                      'program_plans': rows} - كل قيمة أي iterable من القواميس
+                      (صفوف المتطلبات: course_code مع prereq_code أو prerequisites مفصولة بفواصل)
+        
+        Returns:
+            {kind: (عدد الصفوف المكتوبة، الأخطاء)} لكل نوع تم استيراده
+        
+        Raises:
+            ValueError: إذا كانت المتطلبات الجديدة ستُنشئ دورة (قبل أي كتابة)
+        
+        ملاحظة: التخزين المؤقت يُعاد تحميله مرة واحدة فقط في النهاية.
+        """
+        prerequisites = None
+        if sources.get('prerequisites') is not None:
+            prerequisites = {}
+            for row in sources['prerequisites']:
+                course_code = str(row.get('course_code') or '').strip()
+                codes = row.get('prereq_code') or row.get('prerequisites') or []
+                if isinstance(codes, str):
+                    codes = codes.split(',')
+                prerequisites.setdefault(course_code, []).extend(c.strip() for c in codes if c.strip())
+            
+            # فحص الدورات على الرسم الحالي + المتطلبات الجديدة
+            merged = {course.course_code: course.prerequisites for course in self.get_courses()}
+            merged.update(prerequisites)
+            PrerequisiteGraph_registration_system(merged).topological_order()
+        
+        results: Dict[str, Tuple[int, List[str]]] = {}
+        try:
+            if sources.get('courses') is not None:
+                results['courses'] = database.bulk_upsert_courses(sources['courses'])
+            if sources.get('sections') is not None:
+                results['sections'] = database.bulk_upsert_sections(sources['sections'])
+            if prerequisites is not None:
+                results['prerequisites'] = database.bulk_set_prerequisites(prerequisites)
+            if sources.get('program_plans') is not None:
+                results['program_plans'] = database.bulk_program_plans(sources['program_plans'])
+        finally:
+            self.refresh_cache()
+        return results
+    
+    # + public method
+    def import_catalog_files(self, paths: List[str]) -> Dict[str, Tuple[int, List[str]]]:
+        """
+        استيراد كتالوج من ملفات CSV/JSON Lines (نوع كل ملف يُحدد من أعمدته)
+        أو ملف JSON واحد يحتوي على مفاتيح database.CATALOG_KINDS.
+        """
+        sources: Dict[str, Iterable] = {}
+        for path in paths:
+            if path.lower().endswith('.json'):
+                try:
+                    catalog = database.load_catalog_json(path)
+                except ValueError:
+                    catalog = None
+                if catalog is not None:
+                    for kind, rows in catalog.items():
+                        if rows:
+                            sources[kind] = itertools.chain(sources.get(kind, ()), rows)
+                    continue
+            
+            rows = database.read_catalog_rows(path)
+            first = next(rows, None)
+            if first is None:
+                continue
+            kind = database.detect_catalog_kind(first.keys())
+            if kind is None:
+                raise ValueError(f"Cannot detect catalog type of {path}")
+            sources[kind] = itertools.chain(sources.get(kind, ()), [first], rows)
+        return self.import_catalog(sources)
     
     # + public method
     def validate_schedule_student_course_registration_system(self, student: Student, selected_courses: List[str]) -> Tuple[bool, List[str]]:
@@ -717,15 +1242,15 @@ class RegistrationSystem_registration_system:
                     f"Cannot register for {course_code}: Course already completed (exists in transcript)"
                 )
         
-        # 2. Check prerequisites
+        # 2. Check prerequisites (bitmask من رسم المتطلبات)
         for course_code in selected_courses:
-            course = self._course_cache.get(course_code)
-            if course:
-                prereqs_met, missing = course.check_prerequisites_transcript(student.transcript)
-                if not prereqs_met:
-                    errors.append(
-                        f"Cannot register for {course_code}: Missing prerequisites {', '.join(missing)}"
-                    )
+            with self._cache_lock:
+                missing = (self._prereq_graph.missing_prerequisites(course_code, student.transcript)
+                           if course_code in self._course_cache else None)
+            if missing:
+                errors.append(
+                    f"Cannot register for {course_code}: Missing prerequisites {', '.join(missing)}"
+                )
         
         # 3. Check if courses match student level (using course code pattern)
         # Level validation is done in get_available_courses, so courses here should already be valid
@@ -770,11 +1295,13 @@ class RegistrationSystem_registration_system:
             if section.is_full():
                 return False, f"Section {section.section_id} is full"
         
-        # Check time conflicts
+        # Check time conflicts (قناع تراكمي: فحص واحد لكل شعبة)
+        occupied_mask = 0
         for i, section1 in enumerate(sections):
-            for section2 in sections[i+1:]:
-                if section1.has_time_conflict_section(section2):
-                    return False, f"Time conflict: {section1.section_id} overlaps with {section2.section_id}"
+            if section1.conflicts_with_mask(occupied_mask):
+                section2 = next(s for s in sections[:i] if s.has_time_conflict_section(section1))
+                return False, f"Time conflict: {section2.section_id} overlaps with {section1.section_id}"
+            occupied_mask |= section1.week_mask
         
         # Check if already registered in the same section
         for section in sections:
@@ -790,38 +1317,25 @@ class RegistrationSystem_registration_system:
                     return False, f"Already registered for course {course_code} (section: {existing_section.section_id}). Cannot register for the same course twice in the same term"
         
         # All validations passed - register student
+        # جميع الشعب في معاملة واحدة: الزيادة المشروطة للسعة + إدراج التسجيل
+        # (قاعدة البيانات تمنع تجاوز السعة حتى مع التسجيل المتزامن)
         registration_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        for section in sections:
-            # Increment enrollment
-            success, error = database.increment_section_enrollment(section.section_id)
-            if not success:
-                # Rollback any previous registrations
-                for prev_section in sections:
-                    if prev_section.section_id != section.section_id:
-                        database.remove_registration(student.student_id, prev_section.section_id)
-                        database.decrement_section_enrollment(prev_section.section_id)
-                return False, error or "Failed to update enrollment"
-            
-            # Save registration to database
-            try:
-                database.add_registration(student.student_id, section.section_id, registration_time)
-            except Exception as e:
-                # Rollback enrollment increment
-                database.decrement_section_enrollment(section.section_id)
-                # Rollback previous registrations
-                for prev_section in sections:
-                    if prev_section.section_id != section.section_id:
-                        database.remove_registration(student.student_id, prev_section.section_id)
-                        database.decrement_section_enrollment(prev_section.section_id)
-                return False, f"Failed to save registration: {str(e)}"
-            
-            # Add to student schedule
-            student.schedule.append({
-                'id': section.section_id,
-                'registration_time': registration_time
-            })
+        try:
+            success, error = database.register_student_sections(
+                student.student_id, [section.section_id for section in sections], registration_time
+            )
+        except Exception as e:
+            return False, f"Failed to save registration: {str(e)}"
+        if not success:
+            return False, error or "Failed to update enrollment"
         
-        self.refresh_cache()
+        # Add to student schedule (قائمة جديدة: خيط الواجهة قد يمر على القائمة الحالية)
+        student.schedule = student.schedule + [
+            {'id': section.section_id, 'registration_time': registration_time}
+            for section in sections
+        ]
+        
+        self._cache_adjust_enrollment([section.section_id for section in sections], +1)
         return True, "Registration successful"
     
     # + public method
@@ -841,27 +1355,502 @@ class RegistrationSystem_registration_system:
         if not item_to_remove:
             return False, "Student not registered in this section"
         
-        # Remove registration from database
+        # Remove registration and decrement enrollment in one transaction
         try:
-            database.remove_registration(student.student_id, section_id)
+            success, error = database.unregister_student_section(student.student_id, section_id)
         except Exception as e:
             return False, f"Failed to remove registration: {str(e)}"
-        
-        # Decrement enrollment
-        success, error = database.decrement_section_enrollment(section_id)
         if not success:
-            # Try to restore registration if enrollment decrement failed
-            try:
-                database.add_registration(student.student_id, section_id, item_to_remove.get('registration_time', datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-            except:
-                pass
             return False, error or "Failed to update enrollment"
         
-        # Remove from schedule
-        student.schedule.remove(item_to_remove)
+        # Remove from schedule (قائمة جديدة: خيط الواجهة قد يمر على القائمة الحالية)
+        student.schedule = [item for item in student.schedule if item is not item_to_remove]
         
-        self.refresh_cache()
+        self._cache_adjust_enrollment([section_id], -1)
         return True, "Unregistration successful"
+    
+    # + public method
+    def register_batch(self, requests: Iterable[Tuple[str, List[str]]],
+                       chunk_size: Optional[int] = None) -> List[Tuple[str, bool, str]]:
+        """
+        تسجيل عدة طلاب دفعة واحدة (مثل تسجيل جميع طلاب المستوى 1 في مقررات خطتهم).
+        
+        التدفق:
+            1. تحميل جميع الطلاب باستعلام مجمّع (StudentManager.get_students)
+            2. التحقق من كل طلب على لقطة في الذاكرة (Snapshot): نفس قيود
+               register_student_database_registration_system مع التعارض مع الجدول الحالي،
+               والمقاعد المتبقية تُنقص بعد كل طلب مقبول حتى لا تُمنح نفس المقاعد مرتين
+            3. كتابة الطلبات المقبولة عبر database.bulk_register_sections (معاملة لكل دفعة،
+               SAVEPOINT لكل طالب، والـ UPDATE المشروط يمنع تجاوز السعة عند التزامن)
+            4. تحديث عدد المسجلين في التخزين المؤقت للشعب المتأثرة فقط (بدون refresh_cache)
+        
+        Args:
+            requests: [(student_id, [section_id, ...]), ...]
+            chunk_size: عدد الطلاب في كل معاملة (افتراضياً database.BULK_CHUNK_SIZE)
+        
+        Returns:
+            نتيجة لكل طلب بنفس الترتيب: (student_id, success, message)
+        """
+        requests = [(student_id, list(section_ids)) for student_id, section_ids in requests]
+        students = StudentManager_registration_system().get_students(
+            [student_id for student_id, _ in requests]
+        )
+        
+        results: List[Optional[Tuple[str, bool, str]]] = [None] * len(requests)
+        remaining_seats: Dict[str, int] = {}
+        pending: Dict[str, List[Section]] = {}
+        accepted: List[int] = []
+        for index, (student_id, section_ids) in enumerate(requests):
+            student = students.get(student_id)
+            if student is None:
+                results[index] = (student_id, False, f"Student {student_id} not found")
+                continue
+            sections, error = self._validate_batch_request(
+                student, section_ids, pending.get(student_id, []), remaining_seats
+            )
+            if error:
+                results[index] = (student_id, False, error)
+                continue
+            for section in sections:
+                remaining_seats[section.section_id] -= 1
+            pending.setdefault(student_id, []).extend(sections)
+            accepted.append(index)
+        
+        registration_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        chunk_size = max(1, chunk_size or database.BULK_CHUNK_SIZE)
+        for start in range(0, len(accepted), chunk_size):
+            chunk = accepted[start:start + chunk_size]
+            try:
+                outcomes = database.bulk_register_sections(
+                    [requests[index] for index in chunk], registration_time, chunk_size=len(chunk)
+                )
+            except Exception as e:
+                outcomes = [(False, f"Failed to save registration: {str(e)}")] * len(chunk)
+            for index, (success, error) in zip(chunk, outcomes):
+                student_id, section_ids = requests[index]
+                if success:
+                    self._cache_adjust_enrollment(section_ids, +1)
+                    results[index] = (student_id, True, "Registration successful")
+                else:
+                    results[index] = (student_id, False, error or "Failed to update enrollment")
+        return results
+    
+    # _ private method
+    def _validate_batch_request(self, student: Student, section_ids: List[str], pending_sections: List[Section],
+                                remaining_seats: Dict[str, int]) -> Tuple[List[Section], Optional[str]]:
+        """
+        التحقق من طلب واحد في register_batch على لقطة الذاكرة.
+        
+        Args:
+            pending_sections: شعب قُبلت للطالب نفسه في طلبات سابقة من الدفعة
+            remaining_seats: المقاعد المتبقية لكل شعبة (تُملأ من التخزين المؤقت عند أول استخدام)
+        
+        Returns:
+            (الشعب، None) أو ([], رسالة الخطأ)
+        """
+        if not section_ids:
+            return [], "No sections requested"
+        sections = []
+        for section_id in section_ids:
+            section = self.get_section(section_id)
+            if not section:
+                return [], f"Section {section_id} not found"
+            sections.append(section)
+        
+        course_codes = [section.course_code for section in sections]
+        if len(set(course_codes)) != len(course_codes):
+            return [], "Cannot register for the same course twice in the same term"
+        is_valid, errors = self.validate_schedule_student_course_registration_system(student, course_codes)
+        if not is_valid:
+            return [], "; ".join(errors)
+        
+        existing_sections = [
+            section for section in (self.get_section(reg.get('id')) for reg in student.schedule) if section
+        ] + pending_sections
+        existing_courses = {section.course_code: section.section_id for section in existing_sections}
+        occupied_mask = combined_week_mask(existing_sections)
+        for section in sections:
+            if section.course_code in existing_courses:
+                return [], (f"Already registered for course {section.course_code} "
+                            f"(section: {existing_courses[section.course_code]})")
+            if section.conflicts_with_mask(occupied_mask):
+                other = next(s for s in existing_sections + sections if s is not section
+                             and s.has_time_conflict_section(section))
+                return [], f"Time conflict: {other.section_id} overlaps with {section.section_id}"
+            occupied_mask |= section.week_mask
+            seats = remaining_seats.setdefault(
+                section.section_id, max(0, section.max_capacity - section.current_enrollment)
+            )
+            if seats <= 0:
+                return [], f"Section {section.section_id} is full"
+        return sections, None
+    
+    # + public method
+    def iter_schedules(self, course_codes: List[str], limit: Optional[int] = None,
+                       base_sections: Iterable[Section] = ()) -> Iterator[List[Section]]:
+        """
+        توليد جميع تركيبات الشعب الخالية من التعارض لقائمة مقررات (انظر ScheduleSolver_registration_system).
+        
+        Args:
+            course_codes: المقررات المطلوبة (شعبة واحدة لكل مقرر)
+            limit: الحد الأقصى لعدد الجداول (None = الكل)
+            base_sections: شعب مسجلة مسبقاً يجب ألا تتعارض معها الجداول
+        """
+        return ScheduleSolver_registration_system(self).iter_schedules(course_codes, limit, base_sections)
+    
+    # + public method
+    def find_schedules(self, course_codes: List[str], limit: Optional[int] = None,
+                       base_sections: Iterable[Section] = ()) -> List[List[Section]]:
+        """قائمة الجداول الممكنة (limit افتراضياً DEFAULT_SCHEDULE_LIMIT)."""
+        if limit is None:
+            limit = DEFAULT_SCHEDULE_LIMIT
+        return list(self.iter_schedules(course_codes, limit, base_sections))
+    
+    # + public method
+    def suggest_schedules(self, course_codes: List[str], preferences: Optional['SchedulePreferences'] = None,
+                          top_k: Optional[int] = None, base_sections: Iterable[Section] = (),
+                          max_credits: Optional[int] = None) -> List['ScheduleSuggestion']:
+        """
+        أفضل top_k جداول حسب تفضيلات الطالب (انظر ScheduleRecommender_ScheduleSolver_registration_system).
+        
+        Args:
+            course_codes: المقررات المطلوبة (أو المرشحة عند تحديد max_credits)
+            preferences: SchedulePreferences (None = التفضيلات الافتراضية)
+            top_k: عدد الاقتراحات (افتراضياً DEFAULT_SUGGESTION_COUNT)
+            base_sections: شعب مسجلة مسبقاً (تدخل في حساب الأيام والفراغات)
+            max_credits: الساعات المتبقية؛ يُختار من course_codes أكبر مجموع ساعات لا يتجاوزها
+        """
+        if top_k is None:
+            top_k = DEFAULT_SUGGESTION_COUNT
+        return ScheduleRecommender_ScheduleSolver_registration_system(self).suggest(
+            course_codes, preferences, top_k, base_sections, max_credits
+        )
+
+
+# ============================================================================
+# SCHEDULE SOLVER (بناء الجداول الخالية من التعارض)
+# ============================================================================
+
+# الحد الافتراضي لعدد الجداول في find_schedules (عدد التركيبات ينمو أسياً مع عدد المقررات)
+DEFAULT_SCHEDULE_LIMIT = 1000
+
+
+class ScheduleSolver_registration_system:
+    """
+    إيجاد جميع تركيبات الشعب (شعبة لكل مقرر) الخالية من تعارض الأوقات وغير الممتلئة.
+    
+    الخوارزمية (Backtracking + bitmask):
+        - المرشحون لكل مقرر: الشعب غير الممتلئة التي لا تتعارض مع base_sections
+        - في كل خطوة يُختار المقرر صاحب أقل عدد من الشعب المتوافقة (Most-constrained first)
+        - بعد اختيار شعبة تُصفّى شعب المقررات المتبقية بقناعها الأسبوعي (AND واحد لكل شعبة)؛
+          إذا لم يبقَ لأي مقرر شعبة متوافقة يُقطع الفرع فوراً (Forward checking)
+    
+    الربط:
+        - يقرأ الشعب من RegistrationSystem_registration_system.get_sections_for_course() (التخزين المؤقت)
+        - يستخدم Section.week_mask (week_mask_for_slot)
+        - يُستدعى من: RegistrationSystem_registration_system.iter_schedules() / find_schedules()
+    """
+    
+    # + public method
+    def __init__(self, registration_system: 'RegistrationSystem_registration_system', include_full: bool = False):
+        """
+        Args:
+            registration_system: مصدر المقررات والشعب
+            include_full: تضمين الشعب الممتلئة (افتراضياً تُستبعد)
+        """
+        self.registration_system = registration_system
+        self.include_full = include_full
+    
+    # + public method
+    def iter_schedules(self, course_codes: List[str], limit: Optional[int] = None,
+                       base_sections: Iterable[Section] = ()) -> Iterator[List[Section]]:
+        """
+        مولّد (Generator) الجداول الممكنة؛ كل جدول قائمة شعب بترتيب course_codes.
+        يتوقف بعد limit جدول؛ النتائج تُنتج أثناء البحث دون بناء القائمة كاملة.
+        
+        مقرر بدون شعب متاحة (أو غير موجود) يعني عدم وجود أي جدول.
+        """
+        courses = list(dict.fromkeys(course_codes))
+        candidates = self._candidate_sections(courses, combined_week_mask(list(base_sections)))
+        if candidates is None or (limit is not None and limit <= 0):
+            return
+        produced = 0
+        for chosen in self._search(candidates, {}):
+            yield [chosen[code] for code in courses]
+            produced += 1
+            if limit is not None and produced >= limit:
+                return
+    
+    # + public method
+    def count_schedules(self, course_codes: List[str], base_sections: Iterable[Section] = ()) -> int:
+        """عدد الجداول الممكنة (بدون حد)."""
+        return sum(1 for _ in self.iter_schedules(course_codes, None, base_sections))
+    
+    # _ private method
+    def _candidate_sections(self, course_codes: List[str], base_mask: int,
+                            skip_empty: bool = False) -> Optional[List[Tuple[str, List[Section]]]]:
+        """
+        [(course_code, الشعب المرشحة)] أو None إذا كان أحد المقررات بلا شعب مرشحة
+        (skip_empty=True: يُحذف المقرر بدلاً من ذلك).
+        """
+        candidates = []
+        for course_code in course_codes:
+            options = [
+                section for section in self.registration_system.get_sections_for_course(course_code)
+                if (self.include_full or not section.is_full()) and not section.conflicts_with_mask(base_mask)
+            ]
+            if not options:
+                if skip_empty:
+                    continue
+                return None
+            candidates.append((course_code, options))
+        return candidates
+    
+    # _ private method
+    def _search(self, remaining: List[Tuple[str, List[Section]]],
+                chosen: Dict[str, Section]) -> Iterator[Dict[str, Section]]:
+        """
+        البحث التراجعي: remaining تحتوي فقط الشعب المتوافقة مع chosen.
+        يُنتج نفس القاموس chosen (المستدعي ينسخ ما يحتاجه قبل المتابعة).
+        """
+        if not remaining:
+            yield chosen
+            return
+        
+        # المقرر الأكثر تقييداً أولاً: أقل تفرع وقطع أبكر
+        index = min(range(len(remaining)), key=lambda i: len(remaining[i][1]))
+        course_code, options = remaining[index]
+        rest = remaining[:index] + remaining[index + 1:]
+        
+        for section in options:
+            mask = section.week_mask
+            filtered = []
+            for other_code, other_options in rest:
+                compatible = [s for s in other_options if not s.week_mask & mask]
+                if not compatible:
+                    break
+                filtered.append((other_code, compatible))
+            else:
+                chosen[course_code] = section
+                yield from self._search(filtered, chosen)
+                del chosen[course_code]
+
+
+# عدد الجداول المقترحة افتراضياً
+DEFAULT_SUGGESTION_COUNT = 5
+
+# قناع ساعات يوم واحد داخل القناع الأسبوعي
+_DAY_HOURS_MASK = (1 << HOURS_PER_DAY) - 1
+
+
+def _campus_days(week_mask: int) -> int:
+    """عدد الأيام التي فيها محاضرة واحدة على الأقل."""
+    return sum(
+        1 for day in range(len(WEEK_DAYS))
+        if (week_mask >> (day * HOURS_PER_DAY)) & _DAY_HOURS_MASK
+    )
+
+
+def _gap_hours(week_mask: int) -> int:
+    """مجموع ساعات الفراغ بين أول وآخر محاضرة في كل يوم."""
+    gaps = 0
+    for day in range(len(WEEK_DAYS)):
+        hours = (week_mask >> (day * HOURS_PER_DAY)) & _DAY_HOURS_MASK
+        if hours:
+            first = (hours & -hours).bit_length() - 1
+            gaps += hours.bit_length() - first - hours.bit_count()
+    return gaps
+
+
+@dataclass
+class SchedulePreferences:
+    """
+    تفضيلات ترتيب الجداول المقترحة: كل وزن تكلفة لكل وحدة (0 يلغي المعيار)، والأقل تكلفة أفضل.
+    """
+    earliest_hour: int = 10                 # الساعات قبلها مبكرة (نظام 24 ساعة)
+    preferred_instructors: List[str] = field(default_factory=list)
+    early_weight: float = 1.0               # لكل ساعة أسبوعية قبل earliest_hour
+    gap_weight: float = 1.0                 # لكل ساعة فراغ بين محاضرات اليوم
+    day_weight: float = 2.0                 # لكل يوم حضور إلى الجامعة
+    instructor_weight: float = 1.0          # لكل شعبة مدرسها غير مفضل (عند تحديد مفضلين)
+    seat_weight: float = 1.0                # نسبة امتلاء الشعبة (0 فارغة .. 1 ممتلئة)
+
+
+@dataclass
+class ScheduleSuggestion:
+    """جدول مقترح مع تكلفته وتفاصيلها (sections بترتيب المقررات المطلوبة)."""
+    sections: List[Section]
+    score: float
+    early_hours: int
+    gap_hours: int
+    campus_days: int
+    non_preferred: int
+    open_seats: int
+    credits: int = 0
+
+
+class ScheduleRecommender_ScheduleSolver_registration_system(ScheduleSolver_registration_system):
+    """
+    أفضل k جداول حسب SchedulePreferences باستخدام Branch-and-bound بدل تعداد كل التركيبات.
+    
+    التكلفة:
+        - لكل شعبة (جمعية): الساعات المبكرة، المدرس غير المفضل، نسبة الامتلاء
+        - للجدول كاملاً: أيام الحضور والفراغات (تشمل base_sections)
+    
+    الحد الأدنى (Bound) لأي فرع:
+        التكلفة الجمعية للشعب المختارة + أقل تكلفة جمعية لكل مقرر متبقٍ
+        + أيام الحضور الحالية (لا تنقص بإضافة شعب). الفراغات قد تنقص، لذا حدها 0.
+        يُقطع الفرع عندما لا يقل حده عن أسوأ الجداول الـ k الحالية؛ والشعب تُجرب من الأرخص
+        فتُوجد الجداول الجيدة مبكراً ويشتد القطع.
+    
+    حد الساعات (max_credits):
+        كل مقرر اختياري: فرع لكل شعبة تتسع لها الساعات المتبقية ثم فرع التخطي.
+        الترتيب: أكثر الساعات أولاً ثم الأقل تكلفة؛ الحد الأعلى للساعات في أي فرع
+        min(الساعات المختارة + ساعات المتبقي، max_credits)، وتكلفة المتبقي حدها 0 (قد يُتخطى).
+    """
+    
+    # + public method
+    def suggest(self, course_codes: List[str], preferences: Optional[SchedulePreferences] = None,
+                top_k: int = DEFAULT_SUGGESTION_COUNT,
+                base_sections: Iterable[Section] = (),
+                max_credits: Optional[int] = None) -> List[ScheduleSuggestion]:
+        """
+        أفضل top_k جداول مرتبة من الأقل تكلفة (قائمة فارغة إذا لم يوجد جدول ممكن).
+        مع max_credits: مجموعة جزئية من المقررات لا تتجاوز ساعاتها الحد، الأكثر ساعات أولاً.
+        """
+        preferences = preferences or SchedulePreferences()
+        courses = list(dict.fromkeys(course_codes))
+        base_mask = combined_week_mask(list(base_sections))
+        credits: Dict[str, int] = {}
+        if max_credits is not None:
+            for course_code in courses:
+                course = self.registration_system.get_course(course_code)
+                if course is not None and 0 < course.credits <= max_credits:
+                    credits[course_code] = course.credits
+            courses = [course_code for course_code in courses if course_code in credits]
+        candidates = self._candidate_sections(courses, base_mask, skip_empty=max_credits is not None)
+        if not candidates or top_k <= 0:
+            return []
+        
+        early_mask = self._early_mask(preferences)
+        preferred = {name.strip().lower() for name in preferences.preferred_instructors if name.strip()}
+        costs = {
+            section.section_id: self._section_cost(section, preferences, early_mask, preferred)
+            for _, options in candidates for section in options
+        }
+        candidates = [
+            (course_code, sorted(options, key=lambda section: costs[section.section_id]))
+            for course_code, options in candidates
+        ]
+        
+        # كومة بأسوأ جدول في القمة: (الساعات، -التكلفة، -ترتيب الإيجاد، الشعب المختارة)
+        best: List[Tuple[int, float, int, Dict[str, Section]]] = []
+        self._branch_and_bound(candidates, {}, 0.0, base_mask, costs, preferences, top_k, best, itertools.count(),
+                               credits if max_credits is not None else None, max_credits, 0)
+        
+        suggestions = []
+        for total_credits, negative_score, _, chosen in sorted(best, key=lambda entry: (-entry[0], -entry[1], -entry[2])):
+            sections = [chosen[code] for code in courses if code in chosen]
+            week_mask = base_mask | combined_week_mask(sections)
+            suggestions.append(ScheduleSuggestion(
+                sections=sections,
+                score=round(-negative_score, 3),
+                early_hours=sum((section.week_mask & early_mask).bit_count() for section in sections),
+                gap_hours=_gap_hours(week_mask),
+                campus_days=_campus_days(week_mask),
+                non_preferred=sum(
+                    1 for section in sections
+                    if preferred and section.instructor.strip().lower() not in preferred
+                ),
+                open_seats=sum(max(0, section.max_capacity - section.current_enrollment) for section in sections),
+                credits=total_credits,
+            ))
+        return suggestions
+    
+    # _ private method
+    @staticmethod
+    def _early_mask(preferences: SchedulePreferences) -> int:
+        hours = (1 << max(0, min(preferences.earliest_hour, HOURS_PER_DAY))) - 1
+        mask = 0
+        for day in range(len(WEEK_DAYS)):
+            mask |= hours << (day * HOURS_PER_DAY)
+        return mask
+    
+    # _ private method
+    @staticmethod
+    def _section_cost(section: Section, preferences: SchedulePreferences, early_mask: int, preferred: Set[str]) -> float:
+        """التكلفة الجمعية لشعبة واحدة."""
+        cost = preferences.early_weight * (section.week_mask & early_mask).bit_count()
+        if preferred and section.instructor.strip().lower() not in preferred:
+            cost += preferences.instructor_weight
+        fill_ratio = section.current_enrollment / section.max_capacity if section.max_capacity > 0 else 1.0
+        return cost + preferences.seat_weight * min(1.0, fill_ratio)
+    
+    # _ private method
+    def _branch_and_bound(self, remaining: List[Tuple[str, List[Section]]], chosen: Dict[str, Section],
+                          cost: float, week_mask: int, costs: Dict[str, float],
+                          preferences: SchedulePreferences, top_k: int,
+                          best: List[Tuple[int, float, int, Dict[str, Section]]], order: Iterator[int],
+                          credits: Optional[Dict[str, int]] = None, budget: Optional[int] = None,
+                          chosen_credits: int = 0):
+        """
+        credits=None: كل مقرر في remaining مطلوب. وإلا فالمقررات اختيارية و budget
+        الساعات المتبقية (remaining لا تحتوي إلا مقررات تتسع لها).
+        """
+        if credits is None:
+            # الشعب مرتبة حسب التكلفة، فأول شعبة هي الأرخص لكل مقرر متبقٍ
+            bound = (cost + preferences.day_weight * _campus_days(week_mask)
+                     + sum(costs[options[0].section_id] for _, options in remaining))
+            max_total = chosen_credits
+        else:
+            bound = cost + preferences.day_weight * _campus_days(week_mask)
+            max_total = chosen_credits + min(budget, sum(credits[code] for code, _ in remaining))
+        if len(best) >= top_k and (max_total, -bound) <= best[0][:2]:
+            return
+        
+        if not remaining:
+            if not chosen:
+                return
+            score = bound + preferences.gap_weight * _gap_hours(week_mask)
+            entry = (chosen_credits, -score, -next(order), dict(chosen))
+            if len(best) < top_k:
+                heapq.heappush(best, entry)
+            elif entry[:2] > best[0][:2]:
+                heapq.heapreplace(best, entry)
+            return
+        
+        index = min(range(len(remaining)), key=lambda i: len(remaining[i][1]))
+        course_code, options = remaining[index]
+        rest = remaining[:index] + remaining[index + 1:]
+        
+        for section in options:
+            mask = section.week_mask
+            left = budget - credits[course_code] if credits is not None else None
+            filtered = []
+            for other_code, other_options in rest:
+                if credits is not None and credits[other_code] > left:
+                    continue
+                compatible = [s for s in other_options if not s.week_mask & mask]
+                if not compatible:
+                    if credits is None:
+                        break
+                    continue
+                filtered.append((other_code, compatible))
+            else:
+                chosen[course_code] = section
+                self._branch_and_bound(
+                    filtered, chosen, cost + costs[section.section_id], week_mask | mask,
+                    costs, preferences, top_k, best, order,
+                    credits, left, chosen_credits + (credits[course_code] if credits is not None else 0)
+                )
+                del chosen[course_code]
+        
+        if credits is not None:
+            # فرع التخطي: المقرر لا يدخل في الجدول
+            self._branch_and_bound(
+                rest, chosen, cost, week_mask, costs, preferences, top_k, best, order,
+                credits, budget, chosen_credits
+            )
 
 
 # ============================================================================
@@ -903,52 +1892,343 @@ class PasswordValidator_registration_system:
         return True, "Password is valid"
 
 
+# زمن التحقق المستهدف لكلمة مرور واحدة (بالمللي ثانية)؛ تُعاير التكلفة عليه عند بدء التشغيل
+PASSWORD_HASH_TARGET_MS = 100
+
+# الخوارزمية المستخدمة للتشفيرات الجديدة
+DEFAULT_PASSWORD_ALGORITHM = "pbkdf2_sha256"
+
+# أدنى تكلفة مقبولة مهما كانت نتيجة المعايرة
+PBKDF2_MIN_ITERATIONS = 100_000
+SCRYPT_MIN_N = 2 ** 14
+SCRYPT_MAX_N = 2 ** 20
+
+# يُعاد التشفير عند الدخول إذا كانت تكلفة التشفير المخزن أقل من هذه النسبة من التكلفة الحالية
+# (هامش حتى لا يؤدي تذبذب المعايرة بين التشغيلات إلى إعادة تشفير في كل دخول)
+PASSWORD_REHASH_TOLERANCE = 0.75
+
+
+class HashBackendBase_registration_system:
+    """
+    كلاس أساسي لخوارزميات اشتقاق المفاتيح (Key Derivation) المستخدمة لتشفير كلمات المرور.
+    
+    صيغة التشفير المخزن:
+        $<name>$<k=v,k=v>$<salt hex>$<hash hex>
+    فيُعرف من التشفير نفسه الخوارزمية والتكلفة اللازمتان للتحقق منه.
+    
+    الكلاسات التي ترث منه:
+        - Pbkdf2HashBackend (pbkdf2_sha256)
+        - ScryptHashBackend (scrypt) إذا كان hashlib.scrypt متوفراً
+    """
+    
+    name = ""
+    SALT_BYTES = 16
+    KEY_BYTES = 32
+    
+    def derive(self, password: str, salt: bytes, params: Dict[str, int]) -> bytes:
+        """اشتقاق المفتاح من كلمة المرور (يجب أن تطبقها الكلاسات الفرعية)."""
+        raise NotImplementedError
+    
+    def calibrate(self, target_seconds: float) -> Dict[str, int]:
+        """اختيار معاملات التكلفة بحيث يستغرق derive() حوالي target_seconds."""
+        raise NotImplementedError
+    
+    def encode(self, password: str, params: Dict[str, int]) -> str:
+        salt = secrets.token_bytes(self.SALT_BYTES)
+        key = self.derive(password, salt, params)
+        encoded_params = ",".join(f"{k}={v}" for k, v in params.items())
+        return f"${self.name}${encoded_params}${salt.hex()}${key.hex()}"
+    
+    def verify(self, password: str, params: Dict[str, int], salt: bytes, key: bytes) -> bool:
+        return secrets.compare_digest(self.derive(password, salt, params), key)
+    
+    def is_weaker(self, params: Dict[str, int], current: Dict[str, int]) -> bool:
+        """هل معاملات التشفير المخزن أضعف بوضوح من المعاملات الحالية؟"""
+        return any(params.get(k, 0) < v * PASSWORD_REHASH_TOLERANCE for k, v in current.items())
+    
+    # _ private method
+    def _time(self, params: Dict[str, int], rounds: int = 3) -> float:
+        """أفضل زمن لعدة محاولات (أقل تأثراً بالضوضاء)."""
+        salt = secrets.token_bytes(self.SALT_BYTES)
+        best = float("inf")
+        for _ in range(rounds):
+            started = time.perf_counter()
+            self.derive("calibration", salt, params)
+            best = min(best, time.perf_counter() - started)
+        return best
+
+
+class Pbkdf2HashBackend_HashBackendBase_registration_system(HashBackendBase_registration_system):
+    """PBKDF2-HMAC-SHA256؛ التكلفة = عدد التكرارات (i)."""
+    
+    name = "pbkdf2_sha256"
+    PROBE_ITERATIONS = 20_000
+    
+    def derive(self, password: str, salt: bytes, params: Dict[str, int]) -> bytes:
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, params["i"], dklen=self.KEY_BYTES)
+    
+    def calibrate(self, target_seconds: float) -> Dict[str, int]:
+        # الزمن خطي في عدد التكرارات: قياس عينة ثم التحجيم
+        elapsed = self._time({"i": self.PROBE_ITERATIONS})
+        iterations = int(self.PROBE_ITERATIONS * target_seconds / max(elapsed, 1e-6))
+        iterations = max(PBKDF2_MIN_ITERATIONS, iterations // 1000 * 1000)
+        return {"i": iterations}
+
+
+class ScryptHashBackend_HashBackendBase_registration_system(HashBackendBase_registration_system):
+    """scrypt (صعب على الذاكرة)؛ التكلفة = n (قوة للعدد 2)، r، p."""
+    
+    name = "scrypt"
+    
+    def derive(self, password: str, salt: bytes, params: Dict[str, int]) -> bytes:
+        n, r, p = params["n"], params["r"], params["p"]
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r + (1 << 20), dklen=self.KEY_BYTES)
+    
+    def calibrate(self, target_seconds: float) -> Dict[str, int]:
+        # مضاعفة n حتى يقترب الزمن من الهدف (الذاكرة المستخدمة = 128 * n * r بايت)
+        params = {"n": SCRYPT_MIN_N, "r": 8, "p": 1}
+        elapsed = self._time(params, rounds=1)
+        while elapsed * 2 <= target_seconds and params["n"] < SCRYPT_MAX_N:
+            params["n"] *= 2
+            elapsed *= 2
+        return params
+
+
 class PasswordHasher_registration_system:
     """
     Password Hasher Class - Handles password hashing and verification
     Using OOP design for password security
+    
+    الخوارزميات (قابلة للإضافة عبر register_backend):
+        - pbkdf2_sha256 (افتراضي) و scrypt بتكلفة تُعاير مرة واحدة عند بدء التشغيل
+          بحيث يستغرق التحقق حوالي target_ms
+        - صيغ قديمة للتحقق فقط: bcrypt ($2b$... إذا كانت المكتبة مثبتة)،
+          SHA-256 مع ملح (salt:hash)، ونص صريح
+    
+    إعادة التشفير:
+        needs_rehash() صحيحة للصيغ القديمة، أو لخوارزمية غير الحالية، أو لتكلفة أضعف
+        بوضوح من المعايرة الحالية؛ UserManager.authenticate يعيد التشفير بعد الدخول الناجح.
+    
+    جميع الدوال classmethod: الحالة (الخوارزمية والمعايرة) مشتركة على مستوى العملية.
     """
     
-    @staticmethod
-    def hash_password(password: str) -> str:
+    BACKENDS: Dict[str, HashBackendBase_registration_system] = {}
+    algorithm = DEFAULT_PASSWORD_ALGORITHM
+    target_ms = PASSWORD_HASH_TARGET_MS
+    # _ private attribute: المعاملات المعايرة لكل خوارزمية
+    _params: Dict[str, Dict[str, int]] = {}
+    _calibration_lock = threading.Lock()
+    
+    @classmethod
+    def register_backend(cls, backend: HashBackendBase_registration_system):
+        """إضافة خوارزمية اشتقاق جديدة."""
+        cls.BACKENDS[backend.name] = backend
+    
+    @classmethod
+    def configure(cls, algorithm: Optional[str] = None, target_ms: Optional[float] = None):
+        """تغيير الخوارزمية و/أو زمن التحقق المستهدف (تُعاد المعايرة عند الاستخدام التالي)."""
+        if algorithm is not None:
+            if algorithm not in cls.BACKENDS:
+                raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+            cls.algorithm = algorithm
+        if target_ms is not None:
+            cls.target_ms = target_ms
+        with cls._calibration_lock:
+            cls._params.clear()
+    
+    @classmethod
+    def calibrate(cls, algorithm: Optional[str] = None) -> Dict[str, int]:
+        """معاملات التكلفة للخوارزمية (تُقاس مرة واحدة لكل عملية)."""
+        algorithm = algorithm or cls.algorithm
+        with cls._calibration_lock:
+            params = cls._params.get(algorithm)
+            if params is None:
+                params = cls.BACKENDS[algorithm].calibrate(cls.target_ms / 1000.0)
+                cls._params[algorithm] = params
+            return dict(params)
+    
+    @classmethod
+    def hash_password(cls, password: str) -> str:
         """
-        Hash password using SHA-256 with salt.
-        Note: In production, use bcrypt library for better security.
+        Hash password with the current algorithm and calibrated cost.
+        Returns: "$<algorithm>$<params>$<salt>$<hash>"
         """
-        salt = secrets.token_hex(16)
-        password_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-        return f"{salt}:{password_hash}"
+        return cls.BACKENDS[cls.algorithm].encode(password, cls.calibrate())
     
-    @staticmethod
-    def verify_password(password: str, password_hash: str) -> bool:
+    @classmethod
+    def verify_password(cls, password: str, password_hash: str) -> bool:
         """
         Verify password against hash.
         """
         try:
+            if password_hash.startswith("$2"):
+                # bcrypt قديم (يتطلب مكتبة bcrypt)
+                return bcrypt is not None and bcrypt.checkpw(password.encode(), password_hash.encode())
+            
+            if password_hash.startswith("$"):
+                parsed = cls._parse(password_hash)
+                if parsed is None:
+                    return False
+                backend, params, salt, key = parsed
+                return backend.verify(password, params, salt, key)
+            
             if ":" not in password_hash:
                 # Legacy plain text passwords - for backward compatibility
-                return password == password_hash
+                return secrets.compare_digest(password.encode(), password_hash.encode())
             
             salt, stored_hash = password_hash.split(":", 1)
             computed_hash = hashlib.sha256((password + salt).encode()).hexdigest()
             return secrets.compare_digest(computed_hash, stored_hash)
         except Exception:
             return False
+    
+    @classmethod
+    def needs_rehash(cls, password_hash: str) -> bool:
+        """هل يجب استبدال التشفير المخزن بتشفير بالخوارزمية والتكلفة الحاليتين؟"""
+        parsed = cls._parse(password_hash) if password_hash.startswith("$") else None
+        if parsed is None:
+            return True  # صيغة قديمة (bcrypt / sha256 / نص صريح)
+        backend, params, _, _ = parsed
+        if backend.name != cls.algorithm:
+            return True
+        return backend.is_weaker(params, cls.calibrate())
+    
+    @classmethod
+    def upgrade_stored_hash(cls, user_pk: int, password: str, old_hash: str) -> Optional[str]:
+        """
+        إعادة تشفير كلمة مرور تم التحقق منها إذا كان تشفيرها المخزن قديماً.
+        التحديث مشروط بعدم تغير التشفير منذ قراءته (لا يلغي تغيير كلمة مرور متزامن).
+        
+        Args:
+            user_pk: users.user_id (المفتاح الأساسي)؛ student_id قد يكون NULL لحسابات المدير/الدكتور
+        
+        Returns: التشفير الجديد إذا تم التحديث، وإلا None
+        """
+        if not cls.needs_rehash(old_hash):
+            return None
+        new_hash = cls.hash_password(password)
+        with database.connection() as conn:
+            cur = conn.execute(
+                "UPDATE users SET password_hash = ? WHERE user_id = ? AND password_hash = ?",
+                (new_hash, user_pk, old_hash)
+            )
+            conn.commit()
+            return new_hash if cur.rowcount == 1 else None
+    
+    # _ private method
+    @classmethod
+    def _parse(cls, password_hash: str):
+        """$name$k=v,...$salt$hash -> (backend, params, salt, key) أو None"""
+        parts = password_hash.split("$")
+        if len(parts) != 5 or parts[0]:
+            return None
+        _, name, encoded_params, salt_hex, key_hex = parts
+        backend = cls.BACKENDS.get(name)
+        if backend is None:
+            return None
+        try:
+            params = {k: int(v) for k, v in (item.split("=", 1) for item in encoded_params.split(",") if item)}
+            return backend, params, bytes.fromhex(salt_hex), bytes.fromhex(key_hex)
+        except ValueError:
+            return None
+
+
+PasswordHasher_registration_system.register_backend(Pbkdf2HashBackend_HashBackendBase_registration_system())
+if hasattr(hashlib, "scrypt"):
+    PasswordHasher_registration_system.register_backend(ScryptHashBackend_HashBackendBase_registration_system())
 
 
 # ============================================================================
 # SESSION MANAGEMENT (OOP Design)
 # ============================================================================
 
+# مهلة الخمول (بالثواني): تنتهي الجلسة إذا لم تُستخدم خلال هذه المدة (انتهاء منزلق)
+SESSION_IDLE_TTL = 30 * 60
+
+# العمر الأقصى للجلسة (بالثواني) مهما كان النشاط
+SESSION_ABSOLUTE_TTL = 12 * 60 * 60
+
+# دقة تحديث last_activity في قاعدة البيانات (بالثواني): تحديث واحد كل دقيقة على الأكثر
+SESSION_TOUCH_INTERVAL = 60
+
+# الحد الأقصى لعدد الجلسات في الذاكرة (الأقدم استخداماً يُطرد أولاً)
+SESSION_STORE_SIZE = 10000
+
+# الفاصل (بالثواني) بين عمليات حذف الجلسات المنتهية من الذاكرة وقاعدة البيانات
+SESSION_PURGE_INTERVAL = 5 * 60
+
+
+@dataclass
+class _SessionEntry:
+    """جلسة في الذاكرة: المعلومات العامة + أوقات الاستخدام (epoch seconds)."""
+    info: Dict
+    created: float
+    last_seen: float
+    last_written: float
+
+
 class SessionManager_registration_system:
     """
     Session Manager Class - Manages user sessions
     Using OOP design for session handling
+    
+    المخزن:
+        OrderedDict بترتيب آخر استخدام (LRU): التحقق من الرمز عملية O(1) في الذاكرة
+        ولا يلمس SQLite. عند الامتلاء تُطرد الجلسة الأقدم استخداماً.
+    
+    الانتهاء:
+        - idle_ttl: انتهاء منزلق، كل استخدام يمدد الجلسة
+        - absolute_ttl: عمر أقصى من وقت الإنشاء
+    
+    الكتابة في قاعدة البيانات:
+        - الإنشاء والإلغاء فوراً (مرة لكل دخول/خروج)
+        - last_activity / expires_at: تُجمع الجلسات المستخدمة وتُكتب دفعة واحدة
+          (executemany) مرة كل touch_interval على الأكثر
+        - الجلسات المنتهية تُحذف دفعة واحدة (DELETE ... WHERE expires_at < ?) كل purge_interval
+        هذه الصيانة تتم في maintenance()، يستدعيها خيط خلفي كل touch_interval
+        (أو يدوياً عند background=False)؛ get_session() لا يقرأ إلا الذاكرة.
+    
+    الإغلاق:
+        close() توقف الخيط الخلفي (join) وتكتب ما تبقى.
     """
     
-    def __init__(self):
+    def __init__(self, idle_ttl: float = SESSION_IDLE_TTL, absolute_ttl: float = SESSION_ABSOLUTE_TTL,
+                 max_sessions: int = SESSION_STORE_SIZE, touch_interval: float = SESSION_TOUCH_INTERVAL,
+                 purge_interval: float = SESSION_PURGE_INTERVAL, background: bool = True):
         """Initialize session manager."""
-        self._sessions: Dict[str, Dict] = {}
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be >= 1")
+        self.idle_ttl = idle_ttl
+        self.absolute_ttl = absolute_ttl
+        self.max_sessions = max_sessions
+        self.touch_interval = touch_interval
+        self.purge_interval = purge_interval
+        
+        self._sessions: "OrderedDict[str, _SessionEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        # _ private attribute: جلسات تحتاج تحديث last_activity، وجلسات مطرودة تحتاج حذفاً
+        self._dirty: Set[str] = set()
+        self._evicted: List[str] = []
+        self._last_purge = 0.0
+        self._stop = threading.Event()
+        self._maintainer: Optional[threading.Thread] = None
+        
+        self.evictions = 0
+        self.expirations = 0
+        self.purged_rows = 0
+        
+        # حذف الجلسات المنتهية من التشغيل السابق
+        self.purge_expired()
+        
+        if background:
+            # الخيط لا يحتفظ إلا بمرجع ضعيف، فلا يمنع جمع المدير
+            self._maintainer = threading.Thread(
+                target=_session_maintenance_loop,
+                args=(weakref.ref(self), self._stop, max(self.touch_interval, 1.0)),
+                name="session-maintenance", daemon=True
+            )
+            self._maintainer.start()
     
     def create_session(self, user_id: str, role: str) -> str:
         """
@@ -956,39 +2236,166 @@ class SessionManager_registration_system:
         Returns: session_token (str)
         """
         session_token = secrets.token_urlsafe(32)
-        self._sessions[session_token] = {
-            'user_id': user_id,
-            'role': role,
-            'created_at': datetime.now().isoformat(),
-            'last_activity': datetime.now().isoformat()
-        }
-        self._manage_session_db(session_token, user_id, 'save')
+        now = time.time()
+        now_iso = datetime.fromtimestamp(now).isoformat()
+        entry = _SessionEntry(
+            info={
+                'user_id': user_id,
+                'role': role,
+                'created_at': now_iso,
+                'last_activity': now_iso
+            },
+            created=now,
+            last_seen=now,
+            last_written=now,
+        )
+        with self._lock:
+            self._sessions[session_token] = entry
+            while len(self._sessions) > self.max_sessions:
+                evicted_token, _ = self._sessions.popitem(last=False)
+                self._dirty.discard(evicted_token)
+                self._evicted.append(evicted_token)
+                self.evictions += 1
+        self._manage_session_db(session_token, user_id, 'save', expires_at=self._expires_at(entry))
         return session_token
     
     def get_session(self, session_token: str) -> Optional[Dict]:
-        """Get session information by token."""
-        return self._sessions.get(session_token)
+        """Get session information by token (None if unknown or expired)."""
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_token)
+            if entry is not None:
+                if self._is_expired(entry, now):
+                    del self._sessions[session_token]
+                    self._dirty.discard(session_token)
+                    self.expirations += 1
+                    entry = None
+                else:
+                    self._sessions.move_to_end(session_token)
+                    entry.last_seen = now
+                    if now - entry.last_written >= self.touch_interval:
+                        self._dirty.add(session_token)
+        return entry.info if entry is not None else None
+    
+    def validate_session(self, session_token: str) -> bool:
+        """Is the token a live session? (in-memory check, no database access)"""
+        return self.get_session(session_token) is not None
     
     def invalidate_session(self, session_token: str):
         """Invalidate a session."""
-        if session_token in self._sessions:
-            del self._sessions[session_token]
+        with self._lock:
+            self._sessions.pop(session_token, None)
+            self._dirty.discard(session_token)
         self._manage_session_db(session_token, action='remove')
     
+    def purge_expired(self) -> int:
+        """
+        حذف الجلسات المنتهية من الذاكرة ومن جدول sessions (عبارة DELETE واحدة).
+        Returns: عدد الصفوف المحذوفة من قاعدة البيانات
+        """
+        now = time.time()
+        with self._lock:
+            self._last_purge = now
+            expired = [token for token, entry in self._sessions.items() if self._is_expired(entry, now)]
+            for token in expired:
+                del self._sessions[token]
+                self._dirty.discard(token)
+            self.expirations += len(expired)
+        with database.connection() as conn:
+            cur = conn.execute(
+                "DELETE FROM sessions WHERE expires_at < ?",
+                (datetime.fromtimestamp(now).isoformat(),)
+            )
+            conn.commit()
+            deleted = cur.rowcount
+        self.purged_rows += deleted
+        return deleted
+    
+    # + public method
+    def maintenance(self, now: Optional[float] = None):
+        """
+        كتابة تحديثات last_activity المتراكمة وحذف المطرود (دفعة واحدة)،
+        ثم حذف المنتهي إن حل موعد purge_interval.
+        """
+        if now is None:
+            now = time.time()
+        with self._lock:
+            touches = []
+            for token in self._dirty:
+                entry = self._sessions.get(token)
+                if entry is None:
+                    continue
+                entry.last_written = entry.last_seen
+                last_activity = datetime.fromtimestamp(entry.last_seen).isoformat()
+                entry.info['last_activity'] = last_activity
+                touches.append((last_activity, self._expires_at(entry), token))
+            self._dirty.clear()
+            evicted = [(token,) for token in self._evicted]
+            self._evicted.clear()
+            purge_due = now - self._last_purge >= self.purge_interval
+        
+        if touches or evicted:
+            with database.connection() as conn:
+                if touches:
+                    conn.executemany(
+                        "UPDATE sessions SET last_activity = ?, expires_at = ? WHERE session_id = ?",
+                        touches
+                    )
+                if evicted:
+                    conn.executemany("DELETE FROM sessions WHERE session_id = ?", evicted)
+                conn.commit()
+        if purge_due:
+            self.purge_expired()
+    
+    # + public method
+    def close(self):
+        """إيقاف خيط الصيانة وكتابة ما تبقى."""
+        self._stop.set()
+        maintainer = self._maintainer
+        if maintainer is not None and maintainer is not threading.current_thread():
+            maintainer.join(timeout=5.0)
+        self.maintenance()
+    
+    def stats(self) -> Dict[str, int]:
+        """إحصاءات مخزن الجلسات."""
+        with self._lock:
+            return {
+                'active': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'pending_touches': len(self._dirty),
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'purged_rows': self.purged_rows,
+            }
+    
     # _ private method
-    def _manage_session_db(self, session_token: str, user_id: str = None, action: str = 'save'):
+    def _is_expired(self, entry: _SessionEntry, now: float) -> bool:
+        return now - entry.last_seen > self.idle_ttl or now - entry.created > self.absolute_ttl
+    
+    # _ private method
+    def _expires_at(self, entry: _SessionEntry) -> str:
+        expires = min(entry.last_seen + self.idle_ttl, entry.created + self.absolute_ttl)
+        return datetime.fromtimestamp(expires).isoformat()
+    
+    # _ private method
+    def _manage_session_db(self, session_token: str, user_id: str = None, action: str = 'save',
+                           expires_at: Optional[str] = None):
         """Manage session in database (save or remove)."""
-        conn = get_connection()
-        cur = conn.cursor()
-        if action == 'save':
-            cur.execute(
-                "INSERT OR REPLACE INTO sessions (session_id, user_id, login_time) VALUES (?, (SELECT user_id FROM users WHERE student_id = ?), ?)",
-                (session_token, user_id, datetime.now().isoformat())
-            )
-        else:  # remove
-            cur.execute("DELETE FROM sessions WHERE session_id = ?", (session_token,))
-        conn.commit()
-        conn.close()
+        with database.connection() as conn:
+            cur = conn.cursor()
+            if action == 'save':
+                now = time.time()
+                now_iso = datetime.fromtimestamp(now).isoformat()
+                if expires_at is None:
+                    expires_at = datetime.fromtimestamp(now + min(self.idle_ttl, self.absolute_ttl)).isoformat()
+                cur.execute(
+                    "INSERT OR REPLACE INTO sessions (session_id, user_id, login_time, last_activity, expires_at) "
+                    "VALUES (?, (SELECT user_id FROM users WHERE student_id = ?), ?, ?, ?)",
+                    (session_token, user_id, now_iso, now_iso, expires_at)
+                )
+            else:  # remove
+                cur.execute("DELETE FROM sessions WHERE session_id = ?", (session_token,))
+            conn.commit()
     
     def _save_session_to_db(self, session_token: str, user_id: str):
         """Save session to database (backward compatibility)."""
@@ -999,65 +2406,302 @@ class SessionManager_registration_system:
         self._manage_session_db(session_token, action='remove')
 
 
+def _session_maintenance_loop(manager_ref: "weakref.ref", stop: threading.Event, interval: float):
+    """خيط الصيانة: maintenance() كل interval ثانية حتى close() أو جمع المدير."""
+    while not stop.wait(interval):
+        manager = manager_ref()
+        if manager is None:
+            return
+        try:
+            manager.maintenance()
+        except sqlite3.Error:
+            # التحديثات المفقودة تخص last_activity فقط؛ المحاولة في الدورة التالية
+            pass
+        manager = None
+
+
+# مدير الجلسات المشترك لجميع مديري المستخدمين (انظر get_session_manager)
+_shared_session_manager: Optional[SessionManager_registration_system] = None
+_shared_session_manager_lock = threading.Lock()
+
+
+def get_session_manager() -> SessionManager_registration_system:
+    """
+    مدير الجلسات المشترك: مخزن واحد وخيط صيانة واحد (وحذف واحد للجلسات المنتهية)
+    لجميع مديري المستخدمين بدلاً من مدير لكل UserManager. يُنشأ من جديد إن أُغلق.
+    """
+    global _shared_session_manager
+    with _shared_session_manager_lock:
+        manager = _shared_session_manager
+        if manager is None or manager._stop.is_set():
+            manager = _shared_session_manager = SessionManager_registration_system()
+        return manager
+
+
 # ============================================================================
 # ACCESS LOGGING (OOP Design)
 # ============================================================================
 
+# الحد الأقصى لعدد السجلات المنتظرة في الذاكرة
+ACCESS_LOG_BUFFER_SIZE = 10000
+
+# عدد السجلات الذي يستدعي كتابة دفعة فوراً
+ACCESS_LOG_FLUSH_SIZE = 200
+
+# أقصى مدة (بالثواني) يبقى فيها سجل في الذاكرة قبل كتابته
+ACCESS_LOG_FLUSH_INTERVAL = 2.0
+
+# سياسات امتلاء المخزن:
+#   flush       - الكتابة فوراً في خيط المستدعي (لا يضيع أي سجل)
+#   drop_oldest - حذف أقدم سجل منتظر
+#   drop_newest - تجاهل السجل الجديد
+ACCESS_LOG_OVERFLOW_POLICIES = ("flush", "drop_oldest", "drop_newest")
+
+# جميع المسجلات الحية، لكتابة ما تبقى عند إنهاء البرنامج
+_access_loggers: "weakref.WeakSet" = weakref.WeakSet()
+
+# المسجل المشترك لجميع مديري المستخدمين (انظر get_access_logger)
+_shared_access_logger: Optional["AccessLogger_registration_system"] = None
+_shared_access_logger_lock = threading.Lock()
+
+
 class AccessLogger_registration_system:
     """
     Access Logger Class - Logs user access attempts
     Using OOP design for logging functionality
+    
+    التخزين المؤقت (Write-Behind):
+        log_login_attempt() و log_access() تضيف السجل إلى مخزن في الذاكرة فقط؛
+        خيط خلفي يكتب المخزن دفعة واحدة (executemany في معاملة واحدة) عند بلوغ
+        flush_size سجلاً أو مرور flush_interval ثانية، فلا تتحول محاولات الدخول
+        الفاشلة المتتالية إلى سلسلة من عمليات fsync.
+    
+    حدود الذاكرة:
+        لا يتجاوز المخزن max_buffer سجلاً؛ عند الامتلاء تُطبق overflow_policy
+        (flush افتراضياً حتى لا تضيع سجلات الأمان).
+    
+    الإغلاق:
+        close() توقف الخيط الخلفي (join) وتكتب ما تبقى؛ تُستدعى من MainApp عند
+        الخروج، ومن atexit لكل مسجل حي. الخيط الخلفي لا يحتفظ إلا بمرجع ضعيف
+        للمسجل، فإن جُمع المسجل دون close() يُكتب مخزنه وينتهي الخيط.
     """
     
-    def __init__(self):
+    def __init__(self, max_buffer: int = ACCESS_LOG_BUFFER_SIZE, flush_size: int = ACCESS_LOG_FLUSH_SIZE,
+                 flush_interval: float = ACCESS_LOG_FLUSH_INTERVAL, overflow_policy: str = "flush"):
         """Initialize access logger."""
+        if overflow_policy not in ACCESS_LOG_OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        if max_buffer < 1 or flush_size < 1:
+            raise ValueError("max_buffer and flush_size must be >= 1")
+        self.max_buffer = max_buffer
+        self.flush_size = min(flush_size, max_buffer)
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        
+        # _ private attribute: (user_id, action, success, timestamp, ip_address)
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        # يضمن كتابة الدفعات بترتيب وصولها (خيط خلفي + flush يدوي)
+        self._flush_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+        
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        
         self._ensure_log_table()
+        _access_loggers.add(self)
+        # كتابة ما تبقى إن جُمع المسجل دون close(); atexit يمر عبر flush_access_logs
+        self._finalizer = weakref.finalize(self, _write_access_log_entries, self._buffer)
+        self._finalizer.atexit = False
     
     def log_login_attempt(self, user_id: str, success: bool, ip_address: str = ""):
         """
         Log login attempt.
         """
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            """INSERT INTO access_logs (user_id, action, success, timestamp, ip_address)
-               VALUES (?, ?, ?, ?, ?)""",
-            (user_id, 'login', success, datetime.now().isoformat(), ip_address)
-        )
-        conn.commit()
-        conn.close()
+        self._enqueue((user_id, 'login', success, datetime.now().isoformat(), ip_address))
     
     def log_access(self, user_id: str, action: str, success: bool = True):
         """
         Log general access action.
         """
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            """INSERT INTO access_logs (user_id, action, success, timestamp)
-               VALUES (?, ?, ?, ?)""",
-            (user_id, action, success, datetime.now().isoformat())
-        )
-        conn.commit()
-        conn.close()
+        self._enqueue((user_id, action, success, datetime.now().isoformat(), None))
+    
+    # + public method
+    def flush(self) -> int:
+        """
+        كتابة جميع السجلات المنتظرة الآن (معاملة واحدة).
+        Returns: عدد السجلات المكتوبة
+        """
+        with self._flush_lock:
+            with self._lock:
+                entries = list(self._buffer)
+                self._buffer.clear()
+            if not entries:
+                return 0
+            try:
+                _write_access_log_entries(entries)
+            except sqlite3.Error:
+                # إعادة السجلات إلى مقدمة المخزن لمحاولة لاحقة (ضمن حد الذاكرة)
+                with self._lock:
+                    self.failed_flushes += 1
+                    room = self.max_buffer - len(self._buffer)
+                    keep = entries[-room:] if room > 0 else []
+                    self.dropped += len(entries) - len(keep)
+                    self._buffer.extendleft(reversed(keep))
+                raise
+            with self._lock:
+                self.written += len(entries)
+                self.flushes += 1
+            return len(entries)
+    
+    # + public method
+    def close(self):
+        """إيقاف الخيط الخلفي وكتابة ما تبقى في المخزن."""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify_all()
+            flusher = self._flusher
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join(timeout=max(self.flush_interval, 1.0) * 2)
+        self.flush()
+    
+    # + public method
+    def stats(self) -> Dict[str, int]:
+        """إحصاءات المخزن: المنتظر، المكتوب، المحذوف، عدد الدفعات."""
+        with self._lock:
+            return {
+                'pending': len(self._buffer),
+                'written': self.written,
+                'dropped': self.dropped,
+                'flushes': self.flushes,
+                'failed_flushes': self.failed_flushes,
+            }
+    
+    # _ private method
+    def _enqueue(self, entry: Tuple):
+        flush_now = False
+        with self._lock:
+            if self._closed:
+                # بعد الإغلاق: كتابة مباشرة (نادر، مثل سجل أثناء إنهاء البرنامج)
+                self._buffer.append(entry)
+                flush_now = True
+            elif len(self._buffer) >= self.max_buffer:
+                if self.overflow_policy == "drop_newest":
+                    self.dropped += 1
+                    return
+                if self.overflow_policy == "drop_oldest":
+                    self._buffer.popleft()
+                    self.dropped += 1
+                    self._buffer.append(entry)
+                else:
+                    self._buffer.append(entry)
+                    flush_now = True
+            else:
+                self._buffer.append(entry)
+                if len(self._buffer) >= self.flush_size:
+                    self._wakeup.notify()
+            if not flush_now and self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=_access_log_flush_loop, args=(weakref.ref(self),),
+                    name="access-log-flusher", daemon=True
+                )
+                self._flusher.start()
+        if flush_now:
+            self.flush()
     
     # _ private method
     def _ensure_log_table(self):
         """Ensure access_logs table exists."""
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS access_logs (
-                log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT,
-                action TEXT NOT NULL,
-                success INTEGER NOT NULL,
-                timestamp TEXT NOT NULL,
-                ip_address TEXT
-            )
-        """)
+        with database.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS access_logs (
+                    log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT,
+                    action TEXT NOT NULL,
+                    success INTEGER NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    ip_address TEXT
+                )
+            """)
+            conn.commit()
+
+
+def _write_access_log_entries(entries) -> None:
+    """كتابة دفعة من السجلات في معاملة واحدة."""
+    if not entries:
+        return
+    with database.connection() as conn:
+        conn.executemany(
+            """INSERT INTO access_logs (user_id, action, success, timestamp, ip_address)
+               VALUES (?, ?, ?, ?, ?)""",
+            list(entries)
+        )
         conn.commit()
-        conn.close()
+
+
+def _access_log_flush_loop(logger_ref: "weakref.ref"):
+    """
+    الخيط الخلفي: الكتابة عند بلوغ flush_size أو مرور flush_interval.
+    
+    يحتفظ بمرجع ضعيف فقط ويتخلى عن المرجع القوي أثناء الانتظار، فلا يمنع
+    جمع المسجل؛ ينتهي الخيط عند close() أو عند جمع المسجل.
+    """
+    due = False
+    while True:
+        logger = logger_ref()
+        if logger is None:
+            return
+        wakeup = logger._wakeup
+        with wakeup:
+            if logger._closed:
+                return
+            pending = len(logger._buffer)
+            if not due and pending < logger.flush_size:
+                interval = logger.flush_interval
+                logger = None
+                wakeup.wait(interval)
+                due = True
+                continue
+        due = False
+        retry_after = logger.flush_interval
+        try:
+            if pending:
+                logger.flush()
+        except sqlite3.Error:
+            # السجلات أُعيدت إلى المخزن؛ المحاولة التالية بعد flush_interval
+            logger = None
+            time.sleep(retry_after)
+        logger = None
+
+
+def get_access_logger() -> AccessLogger_registration_system:
+    """
+    المسجل المشترك: مخزن واحد وخيط خلفي واحد لجميع مديري المستخدمين
+    بدلاً من خيط لكل UserManager. يُنشأ من جديد إن أُغلق.
+    """
+    global _shared_access_logger
+    with _shared_access_logger_lock:
+        logger = _shared_access_logger
+        if logger is None or logger._closed:
+            logger = _shared_access_logger = AccessLogger_registration_system()
+        return logger
+
+
+def flush_access_logs():
+    """كتابة ما تبقى في جميع مسجلات الدخول الحية (تُستدعى تلقائياً عند الخروج)."""
+    for logger in list(_access_loggers):
+        try:
+            logger.close()
+        except sqlite3.Error:
+            pass
+
+
+atexit.register(flush_access_logs)
 
 
 # ============================================================================
@@ -1074,8 +2718,8 @@ class UserManager_registration_system:
         """Initialize user manager with validators and hashers."""
         self.password_validator = PasswordValidator_registration_system()
         self.password_hasher = PasswordHasher_registration_system()
-        self.session_manager = SessionManager_registration_system()
-        self.access_logger = AccessLogger_registration_system()
+        self.session_manager = get_session_manager()
+        self.access_logger = get_access_logger()
         self._ensure_bootstrap_admin()
     
     # _ private method
@@ -1099,52 +2743,48 @@ class UserManager_registration_system:
                 return False, error_msg
         
         # Check for duplicate email/ID
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            """SELECT user_id FROM users 
-               WHERE (student_id = ? AND student_id IS NOT NULL) 
-                  OR (email = ? AND email IS NOT NULL)""",
-            (user_id, email)
-        )
-        row = cur.fetchone()
-        
-        if row:
-            conn.close()
-            return False, "Duplicate email or Student ID during sign-up"
-        
-        # Hash password
-        password_hash = self.password_hasher.hash_password(password)
-        
-        # Insert new user
-        try:
+        with database.connection() as conn:
+            cur = conn.cursor()
             cur.execute(
-                """INSERT INTO users (student_id, email, password_hash, role, display_name, mobile) 
-                   VALUES (?, ?, ?, ?, ?, ?)""",
-                (user_id, email, password_hash, role, display_name, mobile)
+                """SELECT user_id FROM users 
+                   WHERE (student_id = ? AND student_id IS NOT NULL) 
+                      OR (email = ? AND email IS NOT NULL)""",
+                (user_id, email)
             )
-            conn.commit()
-            conn.close()
-            return True, "User created successfully"
-        except sqlite3.IntegrityError:
-            conn.close()
-            return False, "Duplicate email or Student ID during sign-up"
+            row = cur.fetchone()
+            
+            if row:
+                return False, "Duplicate email or Student ID during sign-up"
+            
+            # Hash password
+            password_hash = self.password_hasher.hash_password(password)
+            
+            # Insert new user
+            try:
+                cur.execute(
+                    """INSERT INTO users (student_id, email, password_hash, role, display_name, mobile) 
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    (user_id, email, password_hash, role, display_name, mobile)
+                )
+                conn.commit()
+                return True, "User created successfully"
+            except sqlite3.IntegrityError:
+                return False, "Duplicate email or Student ID during sign-up"
     
     def authenticate_user_passwordhasher_accesslogger_registration_system(self, user_id: str, password: str) -> Optional[User]:
         """
         Authenticate user and return User object.
         Logs access attempts.
         """
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            """SELECT student_id, email, password_hash, role, 
-                      COALESCE(display_name, ''), COALESCE(mobile, '')
-               FROM users WHERE student_id = ? OR email = ?""",
-            (user_id, user_id)
-        )
-        row = cur.fetchone()
-        conn.close()
+        with database.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                """SELECT student_id, email, password_hash, role, 
+                          COALESCE(display_name, ''), COALESCE(mobile, ''), user_id
+                   FROM users WHERE student_id = ? OR email = ?""",
+                (user_id, user_id)
+            )
+            row = cur.fetchone()
         
         if not row:
             try:
@@ -1162,6 +2802,12 @@ class UserManager_registration_system:
                 pass  # Ignore logging errors
             return None
         
+        # إعادة تشفير التشفيرات القديمة/الأضعف بشكل شفاف بعد التحقق الناجح
+        try:
+            stored_hash = self.password_hasher.upgrade_stored_hash(row[6], password, stored_hash) or stored_hash
+        except sqlite3.Error:
+            pass  # الدخول صحيح حتى لو فشل التحديث؛ تُعاد المحاولة في الدخول التالي
+        
         # Log successful login
         try:
             self.access_logger.log_login_attempt(row[0], True)
@@ -1171,7 +2817,7 @@ class UserManager_registration_system:
         return User(
             user_id=row[0],
             email=row[1],
-            password_hash=row[2],
+            password_hash=stored_hash,
             role=row[3],
             display_name=row[4],
             mobile=row[5]
@@ -1179,12 +2825,10 @@ class UserManager_registration_system:
     
     def user_exists(self, user_id: str) -> bool:
         """Check if user ID exists."""
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT 1 FROM users WHERE student_id = ? OR email = ?", (user_id, user_id))
-        exists = cur.fetchone() is not None
-        conn.close()
-        return exists
+        with database.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT 1 FROM users WHERE student_id = ? OR email = ?", (user_id, user_id))
+            return cur.fetchone() is not None
     
     def create_session_sessionmanager_registration_system(self, user: User) -> str:
         """Create session for authenticated user."""
@@ -1199,55 +2843,218 @@ class UserManager_registration_system:
 # STUDENT MANAGEMENT
 # ============================================================================
 
+# الحد الأقصى لعدد ملفات الطلاب في الذاكرة المؤقتة
+DEFAULT_STUDENT_CACHE_SIZE = 512
+
+# مدة صلاحية الملف في الذاكرة المؤقتة بالثواني (None = بدون انتهاء)
+DEFAULT_STUDENT_CACHE_TTL = 300.0
+
+
+class StudentCache_registration_system:
+    """
+    ذاكرة مؤقتة محدودة (LRU) لكائنات Student مفهرسة بـ student_id.
+    
+    الوظيفة:
+        - إبقاء آخر maxsize ملفاً (الأقدم استخداماً يُطرد أولاً)
+        - انتهاء صلاحية كل ملف بعد ttl ثانية
+        - إبطال فوري عند الكتابة: تُسجَّل كمستمع في database
+          (add_course_to_transcript, add_registration, remove_registration,
+          delete_student_record, ...) فيُحذف ملف الطالب المتأثر، أو الكل عند None
+        - إحصاءات: hits, misses, evictions, expirations, invalidations
+    
+    سباق القراءة/الكتابة:
+        كل إبطال يزيد رقم الجيل (generation)؛ put() يتجاهل ملفاً قُرئ قبل آخر إبطال
+        حتى لا تُخزَّن نسخة قديمة قرأها خيط آخر أثناء الكتابة.
+    
+    الربط:
+        - نسخة مشتركة واحدة على مستوى الوحدة (get_student_cache())
+        - يستخدمها StudentManager.get_student()
+    """
+    
+    def __init__(self, maxsize: int = DEFAULT_STUDENT_CACHE_SIZE, ttl: Optional[float] = DEFAULT_STUDENT_CACHE_TTL):
+        """Create an empty cache holding at most maxsize students for ttl seconds."""
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        # _ private attribute: student_id -> (expires_at, Student) بترتيب الاستخدام
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Student]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    # + public method
+    def configure(self, maxsize: Optional[int] = None, ttl: Optional[float] = None):
+        """تغيير الحجم و/أو مدة الصلاحية (يُطرد الزائد فوراً عند تصغير الحجم)."""
+        with self._lock:
+            if maxsize is not None:
+                if maxsize < 0:
+                    raise ValueError("maxsize must be >= 0")
+                self.maxsize = maxsize
+                self._evict_overflow()
+            if ttl is not None:
+                self.ttl = ttl
+    
+    # + public method
+    def generation(self) -> int:
+        """رقم الجيل الحالي؛ يُمرَّر إلى put() للتحقق من عدم حدوث إبطال أثناء التحميل."""
+        return self._generation
+    
+    # + public method
+    def get(self, student_id: str) -> Optional[Student]:
+        """إرجاع نسخة من الملف المخزّن أو None (ويُحتسب hit/miss)."""
+        with self._lock:
+            entry = self._entries.get(student_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, student = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[student_id]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(student_id)
+            self.hits += 1
+            return self._copy(student)
+    
+    # + public method
+    def put(self, student: Student, generation: Optional[int] = None):
+        """تخزين نسخة من الملف، إلا إذا حدث إبطال منذ generation."""
+        with self._lock:
+            if self.maxsize == 0:
+                return
+            if generation is not None and generation != self._generation:
+                return
+            expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._entries[student.student_id] = (expires_at, self._copy(student))
+            self._entries.move_to_end(student.student_id)
+            self._evict_overflow()
+    
+    # + public method
+    def invalidate(self, student_id: Optional[str] = None):
+        """حذف ملف طالب واحد، أو جميع الملفات عند None."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if student_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(student_id, None)
+    
+    # + public method
+    def stats(self) -> Dict[str, float]:
+        """إحصاءات الذاكرة المؤقتة."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+    
+    # + public method
+    def reset_stats(self):
+        """تصفير العدادات دون مسح الملفات المخزّنة."""
+        with self._lock:
+            self.hits = self.misses = 0
+            self.evictions = self.expirations = self.invalidations = 0
+    
+    # _ private method
+    def _evict_overflow(self):
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    # _ private method
+    @staticmethod
+    def _copy(student: Student) -> Student:
+        """نسخة مستقلة حتى لا يُعدِّل المستدعي القوائم المخزّنة."""
+        return replace(
+            student,
+            transcript=list(student.transcript),
+            schedule=[dict(item) for item in student.schedule],
+        )
+
+
+# نسخة مشتركة بين جميع مديري الطلاب، تُبطَل تلقائياً من database
+_student_cache = StudentCache_registration_system()
+database.add_student_change_listener(_student_cache.invalidate)
+
+
+def get_student_cache() -> StudentCache_registration_system:
+    """الذاكرة المؤقتة المشتركة لملفات الطلاب."""
+    return _student_cache
+
+
 class StudentManager_registration_system:
     """Manages student data and operations."""
     
     def get_student(self, student_id: str) -> Optional[Student]:
-        """Get student by ID from database."""
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT student_id, name, email, program, level FROM students WHERE student_id = ?",
-            (student_id,)
-        )
-        row = cur.fetchone()
-        conn.close()
-        
-        if not row:
-            return None
-        
-        student_id, name, email, program, level = row
-        transcript = self._get_transcript_database(student_id)
-        schedule = self._get_schedule_database(student_id)
+        """Get student by ID (from the shared cache, or the database on a miss)."""
+        return self.get_students([student_id]).get(student_id)
+    
+    def get_students(self, student_ids: Iterable[str]) -> Dict[str, Student]:
+        """
+        Get many students at once (cache first, then one batched profile load).
+        Returns: {student_id: Student} for the students that exist
+        """
+        students: Dict[str, Student] = {}
+        missing = []
+        for student_id in dict.fromkeys(student_ids):
+            cached = _student_cache.get(student_id)
+            if cached is not None:
+                students[student_id] = cached
+            else:
+                missing.append(student_id)
+        if not missing:
+            return students
+        
+        # أي كتابة لاحقة أثناء القراءة تمنع تخزين هذه النسخ
+        generation = _student_cache.generation()
+        profiles = database.load_student_profiles(missing)
         
         # إذا كان مستوى الطالب أكبر من 1، إضافة جميع المواد من المستويات السابقة
-        if level > 1:
-            # حفظ البرنامج الأصلي للاستخدام مع get_courses_for_program_and_level
-            program_for_query = program  # 'Comm' أو 'Computer' إلخ
-            
-            # جمع جميع المواد من المستويات السابقة (من 1 إلى level - 1)
-            for prev_level in range(1, level):
-                courses_for_level = get_courses_for_program_and_level(program_for_query, prev_level)
-                # إضافة المواد إلى transcript في قاعدة البيانات إذا لم تكن موجودة بالفعل
-                for course_code in courses_for_level:
-                    if course_code not in transcript:
-                        # إضافة المادة إلى قاعدة البيانات
-                        database.add_course_to_transcript(student_id, course_code)
-                        # إضافة المادة إلى قائمة transcript في الذاكرة
-                        transcript.append(course_code)
-        
+        # (معاملة واحدة لكل طالب، وتُتجاوز تماماً إذا كان السجل معبأً حتى هذا المستوى)
+        stale = [sid for sid, profile in profiles.items()
+                 if profile['level'] > 1 and profile['backfilled_level'] < profile['level']]
+        if stale:
+            for student_id in stale:
+                database.backfill_transcript(student_id)
+            generation = _student_cache.generation()
+            profiles = database.load_student_profiles(missing)
+        
+        for student_id, profile in profiles.items():
+            student = self._student_from_profile(profile)
+            _student_cache.put(student, generation)
+            students[student_id] = student
+        return students
+    
+    # _ private method
+    def _student_from_profile(self, profile: Dict) -> Student:
+        program = profile['program']
         # تحويل 'Comm' إلى 'Communications' للتوافق مع الواجهة
         if program == 'Comm':
             program = 'Communications'
-        
         return Student(
-            student_id=student_id,
-            name=name,
-            email=email,
+            student_id=profile['student_id'],
+            name=profile['name'],
+            email=profile['email'],
             program=program,
-            level=level,
-            transcript=transcript,
-            schedule=schedule
+            level=profile['level'],
+            transcript=profile['transcript'],
+            schedule=[{'id': section_id, 'registration_time': registration_time}
+                      for section_id, registration_time in profile['schedule']]
         )
     
     def _get_transcript_database(self, student_id: str) -> List[str]:
@@ -1284,6 +3091,10 @@ class StudentManager_registration_system:
     def delete_student_database(self, student_id: str):
         """Delete student record."""
         database.delete_student_record(student_id)
+    
+    def get_cache_stats(self) -> Dict[str, float]:
+        """Hit/miss statistics of the shared student cache."""
+        return _student_cache.stats()
 
 
 # ============================================================================
@@ -1291,12 +3102,8 @@ class StudentManager_registration_system:
 # ============================================================================
 
 def generate_student_id_usermanager_registration_system(user_manager: UserManager_registration_system) -> str:
-    """Generate unique student ID."""
-    import random
-    while True:
-        candidate = f"S{random.randint(1000, 9999)}"
-        if not user_manager.user_exists(candidate):
-            return candidate
+    """Generate unique student ID from the "student" ID sequence (user_manager kept for compatibility)."""
+    return database.allocate_id("student")
 
 
 def generate_password() -> str:
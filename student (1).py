@@ -8,6 +8,13 @@
     يوفر واجهة كاملة للطالب لعرض المقررات، التسجيل، وعرض الجدول والسجل.
 
 البنية العامة للملف:
+    ============================================================================
+    0. DatabaseFacade Class (واجهة قاعدة البيانات غير المتزامنة)
+    ============================================================================
+    - ينفذ استدعاءات database.py / RegistrationSystem في خيط عامل منفصل
+    - يعيد النتائج إلى خيط الواجهة عبر إشارات Qt (on_done / on_error)
+    - إشارة busy_changed لإظهار مؤشر الانشغال أثناء وجود طلب قيد التنفيذ
+    
     ============================================================================
     1. BaseDashboard Class (كلاس لوحة التحكم الأساسية)
     ============================================================================
@@ -15,6 +22,7 @@
     - يوفر وظائف مشتركة بين جميع لوحات التحكم
     - toggle_theme(): تبديل الوضع الليلي/النهاري
     - handle_signout(): تسجيل الخروج
+    - run_async(): تشغيل عملية قاعدة بيانات دون تجميد النافذة
     
     ============================================================================
     2. StudentDashboard Class (لوحة تحكم الطالب)
@@ -33,6 +41,12 @@
     ============================================================================
     - حوار (Dialog) لعرض السجل الأكاديمي الكامل
     - يعرض المقررات المجتازة وإجمالي الساعات
+    
+    ============================================================================
+    4. ScheduleSuggestionsDialog Class (نافذة اقتراح الجداول)
+    ============================================================================
+    - أفضل الجداول حسب تفضيلات الطالب (RegistrationSystem.suggest_schedules)
+    - تسجيل الجدول المختار دفعة واحدة
 
 العلاقات مع الملفات الأخرى:
     - يستورد من:
@@ -73,15 +87,126 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QListWidget, 
     QListWidgetItem, QLabel, QFrame, QMessageBox, QDialog,
     QTableWidget, QTableWidgetItem, QHeaderView, QTabWidget,
-    QStatusBar, QApplication, QComboBox
+    QStatusBar, QApplication, QComboBox, QSpinBox, QLineEdit, QAbstractItemView
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QObject, pyqtSignal, pyqtSlot
 from PyQt6.QtGui import QFont, QColor, QBrush
 
-from registration_system import Student, RegistrationSystem_registration_system, Course, Section
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from registration_system import (
+    Student, RegistrationSystem_registration_system, Course, Section, combined_week_mask,
+    SchedulePreferences, ScheduleSuggestion, DEFAULT_SUGGESTION_COUNT
+)
 from styles import apply_shadow, LIGHT_MODE_QSS, DARK_MODE_QSS
 
 
+# عدد خيوط قاعدة البيانات لكل لوحة تحكم: خيط واحد يحافظ على ترتيب الطلبات
+# (حفظ ثم إعادة تحميل) ويتوافق مع الكاتب الوحيد في SQLite
+DB_WORKER_THREADS = 1
+
+# الحد الأقصى للساعات المسجلة في الترم
+MAX_REGISTERED_HOURS = 18
+
+
+class DatabaseFacade_QObject_student(QObject):
+    """
+    ============================================================================
+    واجهة قاعدة البيانات غير المتزامنة - Async Database Facade
+    ============================================================================
+    
+    الوظيفة:
+        تنفيذ استدعاءات قاعدة البيانات (database.py / RegistrationSystem / StudentManager)
+        في خيط عامل (ThreadPoolExecutor) بدلاً من خيط الواجهة، حتى لا تتجمد النافذة
+        أثناء قراءة بطيئة للقرص أو انتظار قفل.
+    
+    آلية التسليم:
+        عند انتهاء الطلب يُرسل Future عبر إشارة _future_done من خيط العامل؛
+        الاتصال Queued لأن هذا الكائن يعيش في خيط الواجهة، فتُستدعى on_done(result)
+        أو on_error(exception) دائماً في خيط الواجهة ويمكنها تعديل الويدجت مباشرة.
+    
+    الإشارات:
+        + busy_changed(bool): True عند بدء أول طلب، False عند انتهاء آخر طلب
+        + failed(object): استثناء طلب لم يحدد on_error
+    
+    الربط:
+        - يُنشأ في BaseDashboard.__init__() (self.db)
+        - يستخدمه StudentDashboard و AdminDashboard عبر run_async()
+    """
+    
+    _future_done = pyqtSignal(object)
+    # + public signal
+    busy_changed = pyqtSignal(bool)
+    # + public signal
+    failed = pyqtSignal(object)
+    
+    # + public method
+    def __init__(self, max_workers: int = DB_WORKER_THREADS, parent: Optional[QObject] = None):
+        """تهيئة الواجهة مع مجمع خيوط بحجم max_workers"""
+        super().__init__(parent)
+        # _ private attribute
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="odus-db")
+        # _ private attribute: future -> (on_done, on_error)
+        self._callbacks: Dict[Future, Tuple[Optional[Callable], Optional[Callable]]] = {}
+        self._pending = 0
+        self._closed = False
+        self._future_done.connect(self._dispatch)
+    
+    # + public method
+    def submit(self, fn: Callable, *args, on_done: Optional[Callable] = None,
+               on_error: Optional[Callable] = None, **kwargs) -> Future:
+        """
+        تنفيذ fn(*args, **kwargs) في خيط قاعدة البيانات
+        Args:
+            on_done: تُستدعى في خيط الواجهة بالنتيجة
+            on_error: تُستدعى في خيط الواجهة بالاستثناء (وإلا تُرسل إشارة failed)
+        Returns:
+            Future (يمكن انتظاره خارج خيط الواجهة فقط)
+        """
+        if self._closed:
+            raise RuntimeError("Database facade has been shut down")
+        future = self._executor.submit(fn, *args, **kwargs)
+        self._callbacks[future] = (on_done, on_error)
+        self._pending += 1
+        if self._pending == 1:
+            self.busy_changed.emit(True)
+        future.add_done_callback(self._future_done.emit)
+        return future
+    
+    # + public method
+    def is_busy(self) -> bool:
+        """هل يوجد طلب قيد التنفيذ؟"""
+        return self._pending > 0
+    
+    # + public method
+    def shutdown(self, wait: bool = True):
+        """إيقاف قبول الطلبات وانتظار انتهاء الطلبات الجارية (الحفظ لا يضيع عند الإغلاق)"""
+        self._closed = True
+        self._executor.shutdown(wait=wait)
+    
+    # _ private method
+    @pyqtSlot(object)
+    def _dispatch(self, future: Future):
+        """تسليم نتيجة طلب منتهٍ (يعمل في خيط الواجهة)"""
+        on_done, on_error = self._callbacks.pop(future, (None, None))
+        self._pending -= 1
+        try:
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                if on_error is not None:
+                    on_error(error)
+                else:
+                    self.failed.emit(error)
+            elif on_done is not None:
+                on_done(future.result())
+        finally:
+            if self._pending == 0:
+                self.busy_changed.emit(False)
+
+
 class DashboardBase_QWidget_student(QWidget):
     """
     ============================================================================
@@ -111,6 +236,7 @@ class DashboardBase_QWidget_student(QWidget):
         - توفير وظيفة toggle_theme() لتبديل الوضع الليلي/النهاري
         - توفير وظيفة handle_signout() لتسجيل الخروج
         - تخزين حالة الوضع الليلي (is_dark_mode)
+        - تشغيل عمليات قاعدة البيانات في الخلفية (run_async) مع مؤشر انشغال
         
     مثال الاستخدام:
         لا يتم استخدامه مباشرة، بل يتم استخدام الكلاسات التي ترث منه.
@@ -123,6 +249,41 @@ class DashboardBase_QWidget_student(QWidget):
         super().__init__()
         # + public attribute
         self.is_dark_mode = False
+        # + public attribute: واجهة قاعدة البيانات غير المتزامنة
+        self.db = DatabaseFacade_QObject_student(parent=self)
+        self.db.busy_changed.connect(self.set_busy)
+        self.db.failed.connect(self.show_database_error)
+        # + public attribute: مؤشر الانشغال (يُضاف إلى الشريط العلوي في init_ui)
+        self.busy_label = QLabel("⏳ جارٍ التحميل...")
+        self.busy_label.setVisible(False)
+    
+    # + public method
+    def run_async(self, fn, *args, on_done=None, on_error=None, **kwargs) -> Future:
+        """
+        تشغيل عملية قاعدة بيانات في الخلفية
+        وظيفته: عدم تجميد النافذة؛ on_done/on_error تُستدعى في خيط الواجهة
+        """
+        return self.db.submit(fn, *args, on_done=on_done, on_error=on_error, **kwargs)
+    
+    # + public method
+    def set_busy(self, busy: bool):
+        """إظهار/إخفاء مؤشر الانشغال (مؤشر الانتظار ونص الحالة)"""
+        if busy:
+            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        else:
+            QApplication.restoreOverrideCursor()
+        self.busy_label.setVisible(busy)
+    
+    # + public method
+    def show_database_error(self, error: Exception):
+        """عرض خطأ عملية قاعدة بيانات لم تحدد معالجاً خاصاً"""
+        QMessageBox.critical(self, 'خطأ', f'فشلت عملية قاعدة البيانات: {str(error)}')
+    
+    # + public method
+    def closeEvent(self, event):
+        """انتظار انتهاء عمليات الحفظ الجارية قبل إغلاق النافذة"""
+        self.db.shutdown(wait=True)
+        super().closeEvent(event)
     
     # + public method
     def toggle_theme(self):
@@ -240,6 +401,7 @@ class StudentDashboard_DashboardBase_student(DashboardBase_QWidget_student):
         top_bar.addWidget(self.theme_button)
         top_bar.addWidget(self.signout_button)
         top_bar.addStretch()
+        top_bar.addWidget(self.busy_label)
         layout.addLayout(top_bar)
         
         # شريط تنبيه للساعات المعتمدة
@@ -304,9 +466,16 @@ class StudentDashboard_DashboardBase_student(DashboardBase_QWidget_student):
         layout.addWidget(QLabel('الخطوة 1: اختر مادة'))
         
         self.courses_list = QListWidget()
+        # تحديد عدة مقررات (Ctrl/Shift) لاقتراح جدول يجمعها
+        self.courses_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         self.courses_list.currentItemChanged.connect(self.on_course_selected)
         layout.addWidget(self.courses_list)
         
+        # زر اقتراح جدول
+        self.suggest_button = QPushButton('💡 اقتراح جدول')
+        self.suggest_button.clicked.connect(self.handle_suggest_schedule)
+        layout.addWidget(self.suggest_button)
+        
         # زر التحديث
         refresh_button = QPushButton('🔄 تحديث قائمة المقررات')
         refresh_button.setProperty("class", "secondary")
@@ -442,8 +611,23 @@ class StudentDashboard_DashboardBase_student(DashboardBase_QWidget_student):
         return frame
     
     def load_data(self):
-        """تحميل جميع البيانات في الواجهة"""
-        self.registration_system.refresh_cache()
+        """تحميل جميع البيانات في الواجهة (بناء التخزين المؤقت في الخلفية ثم استبداله وتحديث العرض)"""
+        self.run_async(self.registration_system.load_cache, on_done=self.on_cache_loaded)
+    
+    def on_cache_loaded(self, snapshot):
+        """استبدال التخزين المؤقت في خيط الواجهة ثم تحديث العرض"""
+        self.registration_system.apply_cache(snapshot)
+        self.refresh_view()
+    
+    def set_busy(self, busy: bool):
+        """مؤشر الانشغال مع تعطيل أزرار التسجيل حتى لا يُرسل الطلب مرتين"""
+        super().set_busy(busy)
+        self.add_button.setEnabled(not busy)
+        self.remove_button.setEnabled(not busy)
+        self.suggest_button.setEnabled(not busy)
+    
+    def refresh_view(self):
+        """تحديث عناصر الواجهة من التخزين المؤقت الحالي بدون إعادة تحميله من قاعدة البيانات"""
         self.load_available_courses()
         self.load_registered_schedule()
         self.update_hours_display()
@@ -464,12 +648,15 @@ class StudentDashboard_DashboardBase_student(DashboardBase_QWidget_student):
             self.load_available_courses_for_level(self.student.level)
     
     def load_available_courses_for_level(self, level: int):
-        """تحميل المقررات المتاحة لبرنامج ومستوى محدد"""
-        self.courses_list.clear()
-        available_courses = self.registration_system.get_available_courses(
-            self.student.program, level
+        """تحميل المقررات المتاحة لبرنامج ومستوى محدد (في الخلفية)"""
+        self.run_async(
+            self.registration_system.get_available_courses, self.student.program, level,
+            on_done=self.show_available_courses
         )
-        
+    
+    def show_available_courses(self, available_courses):
+        """عرض المقررات المتاحة في القائمة"""
+        self.courses_list.clear()
         for course in available_courses:
             item = QListWidgetItem(f"{course.course_code} - {course.name}")
             item.setData(Qt.ItemDataRole.UserRole, course.course_code)
@@ -611,10 +798,10 @@ class StudentDashboard_DashboardBase_student(DashboardBase_QWidget_student):
                 f"⚠️ تحذير: عدد الساعات المسجلة ({registered}) أقل من الحد الأدنى المطلوب (12 ساعة)"
             )
             self.hours_warning_label.setVisible(True)
-        elif registered >= 12 and registered <= 18:
-            # إخفاء شريط التنبيه إذا كان بين 12 و 18
+        elif registered >= 12 and registered <= MAX_REGISTERED_HOURS:
+            # إخفاء شريط التنبيه إذا كان بين 12 و MAX_REGISTERED_HOURS
             self.hours_warning_label.setVisible(False)
-        # إذا كان أكثر من 18، سيتم منع الإضافة في handle_add_section
+        # إذا كان أكثر من MAX_REGISTERED_HOURS، سيتم منع الإضافة في handle_add_section
     
     def on_course_selected(self, current, previous):
         """
@@ -625,10 +812,7 @@ class StudentDashboard_DashboardBase_student(DashboardBase_QWidget_student):
             return
         
         course_code = current.data(Qt.ItemDataRole.UserRole)
-        sections = [
-            s for s in self.registration_system._section_cache.values()
-            if s.course_code == course_code
-        ]
+        sections = self.registration_system.get_sections_for_course(course_code)
         
         self.sections_table.setRowCount(0)
         for i, section in enumerate(sections):
@@ -691,21 +875,27 @@ class StudentDashboard_DashboardBase_student(DashboardBase_QWidget_student):
                 )
                 break
         
-        # 4. التحقق من حدود الساعات المعتمدة (الحد الأقصى 18)
+        # 4. التحقق من حدود الساعات المعتمدة (الحد الأقصى MAX_REGISTERED_HOURS)
         current_registered_hours = sum(self.registered_course_credits)
         if course:
             new_total = current_registered_hours + course.credits
-            if new_total > 18:
+            if new_total > MAX_REGISTERED_HOURS:
                 validation_errors.append(
                     f"تجاوز الحد الأقصى: إضافة هذه المادة ({course.credits} ساعة) "
-                    f"ستجعل مجموع الساعات ({new_total}) يتجاوز الحد الأقصى المسموح (18 ساعة)"
+                    f"ستجعل مجموع الساعات ({new_total}) يتجاوز الحد الأقصى المسموح ({MAX_REGISTERED_HOURS} ساعة)"
                 )
         
-        # 5. التحقق من تعارض الأوقات
-        for reg in self.student.schedule:
-            existing_section = self.registration_system.get_section(reg.get('id'))
-            if existing_section and section.has_time_conflict_section(existing_section):
-                validation_errors.append(f"تعارض في الوقت مع {existing_section.section_id}")
+        # 5. التحقق من تعارض الأوقات (فحص واحد مع قناع الجدول كاملاً)
+        existing_sections = [
+            existing_section
+            for existing_section in (self.registration_system.get_section(reg.get('id'))
+                                     for reg in self.student.schedule)
+            if existing_section
+        ]
+        if section.conflicts_with_mask(combined_week_mask(existing_sections)):
+            for existing_section in existing_sections:
+                if section.has_time_conflict_section(existing_section):
+                    validation_errors.append(f"تعارض في الوقت مع {existing_section.section_id}")
         
         # 4. التحقق من السعة
         if section.is_full():
@@ -721,16 +911,21 @@ class StudentDashboard_DashboardBase_student(DashboardBase_QWidget_student):
         # مسح رسالة التحقق إذا لم تكن هناك أخطاء
         self.validation_label.setText("")
         
-        # المتابعة مع التسجيل
-        success, message = self.registration_system.register_student_database_registration_system(
-            self.student, [section_id]
+        # المتابعة مع التسجيل (في الخلفية)
+        self.run_async(
+            self.registration_system.register_student_database_registration_system,
+            self.student, [section_id],
+            on_done=self.on_section_added
         )
-        
+    
+    def on_section_added(self, result):
+        """معالجة نتيجة التسجيل في شعبة"""
+        success, message = result
         if success:
             self.status_bar.showMessage(message, 3000)
             self.validation_label.setText("✅ تم التسجيل بنجاح")
             self.validation_label.setStyleSheet("color: #28a745; font-weight: bold; padding: 5px;")
-            self.load_data()  # هذا سيحدث القائمة وعرض الساعات وشريط التنبيه
+            self.refresh_view()  # التخزين المؤقت محدث بالفعل؛ تحديث القائمة وعرض الساعات وشريط التنبيه
         else:
             self.validation_label.setText(f"❌ {message}")
             self.validation_label.setStyleSheet("color: #dc3545; font-weight: bold; padding: 5px;")
@@ -744,14 +939,19 @@ class StudentDashboard_DashboardBase_student(DashboardBase_QWidget_student):
             return
         
         section_id = self.schedule_table.item(row, 5).text()
-        success, message = self.registration_system.unregister_student_database_registration_system(
-            self.student, section_id
+        self.run_async(
+            self.registration_system.unregister_student_database_registration_system,
+            self.student, section_id,
+            on_done=self.on_section_removed
         )
-        
+    
+    def on_section_removed(self, result):
+        """معالجة نتيجة إلغاء التسجيل"""
+        success, message = result
         if success:
             self.status_bar.showMessage(message, 3000)
             self.validation_label.setText("")  # مسح رسالة التحقق
-            self.load_data()  # هذا سيحدث القائمة وعرض الساعات وشريط التنبيه
+            self.refresh_view()  # التخزين المؤقت محدث بالفعل؛ تحديث القائمة وعرض الساعات وشريط التنبيه
         else:
             QMessageBox.warning(self, 'خطأ', message)
     
@@ -759,6 +959,205 @@ class StudentDashboard_DashboardBase_student(DashboardBase_QWidget_student):
         """عرض نافذة السجل الأكاديمي"""
         dialog = TranscriptDialog(self.student, self.registration_system, self)
         dialog.exec()
+    
+    def handle_suggest_schedule(self):
+        """
+        معالجة اقتراح جدول
+        وظيفته: فتح نافذة الاقتراحات للمقررات المحددة (أو جميع المقررات المعروضة إذا حُدد مقرر واحد فقط)
+        """
+        remaining_hours = MAX_REGISTERED_HOURS - sum(self.registered_course_credits)
+        if remaining_hours <= 0:
+            self.validation_label.setText(f"⚠️ وصلت إلى الحد الأقصى للساعات ({MAX_REGISTERED_HOURS} ساعة)")
+            self.validation_label.setStyleSheet("color: #ffc107; font-weight: bold; padding: 5px;")
+            return
+        course_codes = self.get_suggestion_course_codes()
+        if not course_codes:
+            self.validation_label.setText("⚠️ لا توجد مقررات متاحة للاقتراح (مجتازة أو مسجلة أو متطلباتها غير مستوفاة)")
+            self.validation_label.setStyleSheet("color: #ffc107; font-weight: bold; padding: 5px;")
+            return
+        dialog = ScheduleSuggestionsDialog_QDialog_student(self, course_codes, remaining_hours)
+        dialog.exec()
+    
+    def get_suggestion_course_codes(self) -> List[str]:
+        """المقررات المرشحة للاقتراح: غير المجتازة، غير المسجلة، ومتطلباتها مستوفاة"""
+        items = self.courses_list.selectedItems()
+        if len(items) < 2:
+            items = [self.courses_list.item(i) for i in range(self.courses_list.count())]
+        registered_courses = {
+            section.course_code for section in self.get_registered_sections()
+        }
+        candidates = [
+            course for course in (
+                self.registration_system.get_course(item.data(Qt.ItemDataRole.UserRole)) for item in items
+            )
+            if course and course.course_code not in registered_courses
+        ]
+        return [
+            course.course_code
+            for course in self.registration_system.get_eligible_courses(self.student, candidates)
+        ]
+    
+    def get_registered_sections(self) -> List[Section]:
+        """شعب الجدول الحالي من التخزين المؤقت"""
+        sections = (self.registration_system.get_section(reg.get('id')) for reg in self.student.schedule)
+        return [section for section in sections if section]
+
+
+class ScheduleSuggestionsDialog_QDialog_student(QDialog):
+    """
+    كلاس نافذة اقتراح الجداول - Schedule Suggestions Dialog Class
+    وظيفته: عرض أفضل الجداول للمقررات المطلوبة حسب تفضيلات الطالب وتسجيل الجدول المختار
+    مهامه:
+    - قراءة التفضيلات (أبكر ساعة، المدرسون المفضلون)
+    - البحث في الخلفية عبر RegistrationSystem.suggest_schedules (حول الجدول المسجل حالياً)
+    - تسجيل جميع شعب الاقتراح المختار في معاملة واحدة
+    """
+    
+    # + public method
+    def __init__(self, dashboard: StudentDashboard_DashboardBase_student, course_codes: List[str],
+                 max_credits: int = MAX_REGISTERED_HOURS):
+        """
+        تهيئة نافذة الاقتراحات
+        Args:
+            dashboard: لوحة تحكم الطالب (تنفيذ العمليات في الخلفية وتحديث العرض بعد التسجيل)
+            course_codes: المقررات المرشحة للجدولة
+            max_credits: الساعات المتبقية حتى الحد الأقصى (الاقتراحات لا تتجاوزها)
+        """
+        super().__init__(dashboard)
+        self.dashboard = dashboard
+        self.course_codes = course_codes
+        self.max_credits = max_credits
+        self.suggestions: List[ScheduleSuggestion] = []
+        
+        self.setWindowTitle('اقتراح جدول')
+        self.setLayoutDirection(Qt.LayoutDirection.RightToLeft)
+        self.setGeometry(200, 200, 900, 450)
+        
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"المقررات: {', '.join(course_codes)} (بحد أقصى {max_credits} ساعة)"))
+        
+        # التفضيلات
+        preferences_layout = QHBoxLayout()
+        preferences_layout.addWidget(QLabel('بدون محاضرات قبل الساعة:'))
+        self.earliest_hour_spin = QSpinBox()
+        self.earliest_hour_spin.setRange(8, 14)
+        self.earliest_hour_spin.setValue(SchedulePreferences.earliest_hour)
+        preferences_layout.addWidget(self.earliest_hour_spin)
+        preferences_layout.addWidget(QLabel('المدرسون المفضلون:'))
+        self.instructors_input = QLineEdit()
+        self.instructors_input.setPlaceholderText('أسماء مفصولة بفواصل')
+        preferences_layout.addWidget(self.instructors_input, 1)
+        self.search_button = QPushButton('🔍 بحث')
+        self.search_button.clicked.connect(self.search)
+        preferences_layout.addWidget(self.search_button)
+        layout.addLayout(preferences_layout)
+        
+        self.results_table = QTableWidget()
+        self.results_table.setColumnCount(7)
+        self.results_table.setHorizontalHeaderLabels(
+            ['الساعات', 'التكلفة', 'أيام الحضور', 'ساعات الفراغ', 'ساعات مبكرة', 'المقاعد المتاحة', 'الشعب']
+        )
+        self.results_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.results_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.results_table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.results_table)
+        
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+        
+        self.register_button = QPushButton('تسجيل الجدول المحدد')
+        self.register_button.clicked.connect(self.register_selected)
+        layout.addWidget(self.register_button)
+        
+        self.search()
+    
+    # + public method
+    def search(self):
+        """البحث عن أفضل الجداول في الخلفية"""
+        preferences = SchedulePreferences(
+            earliest_hour=self.earliest_hour_spin.value(),
+            preferred_instructors=[name for name in self.instructors_input.text().split(',') if name.strip()],
+        )
+        self.set_controls_enabled(False)
+        self.status_label.setText("⏳ جارٍ البحث...")
+        self.dashboard.run_async(
+            self.dashboard.registration_system.suggest_schedules,
+            self.course_codes, preferences, DEFAULT_SUGGESTION_COUNT, self.dashboard.get_registered_sections(),
+            self.max_credits, on_done=self.show_suggestions, on_error=self.on_failed
+        )
+    
+    # + public method
+    def show_suggestions(self, suggestions: List[ScheduleSuggestion]):
+        """عرض الاقتراحات مرتبة (الأقل تكلفة أولاً)"""
+        self.set_controls_enabled(True)
+        self.suggestions = suggestions
+        self.results_table.setRowCount(0)
+        for i, suggestion in enumerate(suggestions):
+            self.results_table.insertRow(i)
+            values = [
+                suggestion.credits, f"{suggestion.score:g}", suggestion.campus_days, suggestion.gap_hours,
+                suggestion.early_hours, suggestion.open_seats,
+                " | ".join(
+                    f"{section.course_code} ({section.section_id}، {section.instructor}، "
+                    f"{section.start_time}:00 - {section.end_time}:00)"
+                    for section in suggestion.sections
+                ),
+            ]
+            for column, value in enumerate(values):
+                self.results_table.setItem(i, column, QTableWidgetItem(str(value)))
+        if suggestions:
+            self.results_table.selectRow(0)
+            self.status_label.setText(f"✅ {len(suggestions)} اقتراح")
+        else:
+            self.status_label.setText("❌ لا يوجد جدول بدون تعارض لهذه المقررات (جرّب تحديد مقررات أقل)")
+    
+    # + public method
+    def register_selected(self):
+        """تسجيل شعب الاقتراح المحدد (بعد التحقق من حد الساعات)"""
+        row = self.results_table.currentRow()
+        if row < 0 or row >= len(self.suggestions):
+            QMessageBox.warning(self, 'تحذير', 'الرجاء اختيار جدول أولاً')
+            return
+        sections = self.suggestions[row].sections
+        registration_system = self.dashboard.registration_system
+        new_hours = sum(
+            course.credits for course in (registration_system.get_course(s.course_code) for s in sections) if course
+        )
+        total = sum(self.dashboard.registered_course_credits) + new_hours
+        if total > MAX_REGISTERED_HOURS:
+            QMessageBox.warning(
+                self, 'خطأ',
+                f"مجموع الساعات ({total}) يتجاوز الحد الأقصى المسموح ({MAX_REGISTERED_HOURS} ساعة). حدد مقررات أقل."
+            )
+            return
+        self.set_controls_enabled(False)
+        self.dashboard.run_async(
+            registration_system.register_student_database_registration_system,
+            self.dashboard.student, [section.section_id for section in sections],
+            on_done=self.on_registered, on_error=self.on_failed
+        )
+    
+    # + public method
+    def on_registered(self, result):
+        """نتيجة التسجيل: تحديث لوحة التحكم وإغلاق النافذة عند النجاح"""
+        self.set_controls_enabled(True)
+        self.dashboard.on_section_added(result)
+        if result[0]:
+            self.accept()
+    
+    # + public method
+    def on_failed(self, error: Exception):
+        """فشل البحث أو التسجيل"""
+        self.set_controls_enabled(True)
+        self.status_label.setText("")
+        self.dashboard.show_database_error(error)
+    
+    # + public method
+    def set_controls_enabled(self, enabled: bool):
+        """تعطيل الأزرار أثناء وجود طلب قيد التنفيذ"""
+        self.search_button.setEnabled(enabled)
+        self.register_button.setEnabled(enabled)
 
 
 class TranscriptDialog(QDialog):